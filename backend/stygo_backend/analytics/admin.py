@@ -0,0 +1,23 @@
+from django.contrib import admin
+from .models import ProductViewTotal, ShopViewTotal, ShopViewsDaily
+
+
+@admin.register(ShopViewTotal)
+class ShopViewTotalAdmin(admin.ModelAdmin):
+    list_display = ("seller", "views")
+    ordering = ("-views",)
+    raw_id_fields = ("seller",)
+
+
+@admin.register(ProductViewTotal)
+class ProductViewTotalAdmin(admin.ModelAdmin):
+    list_display = ("product", "seller", "views")
+    ordering = ("-views",)
+    raw_id_fields = ("product", "seller")
+
+
+@admin.register(ShopViewsDaily)
+class ShopViewsDailyAdmin(admin.ModelAdmin):
+    list_display = ("seller", "day", "views")
+    list_filter = ("day",)
+    raw_id_fields = ("seller",)
@@ -0,0 +1,223 @@
+"""
+Write-behind view counters.
+
+Counting a view (or a click on a product's contact buttons) on the request
+path is a dictionary increment: each process keeps its pending counts in
+memory, keyed by event, product and hour, and
+a background thread writes them out every ``VIEW_FLUSH_INTERVAL`` seconds
+(sooner once ``VIEW_FLUSH_THRESHOLD`` keys are pending, and once more when
+the process exits). A flush resolves the products' shops with one query
+and then adds the counts to the hourly, daily and running-total tables for
+products and shops with one upsert each, so the write load grows with the
+number of distinct products viewed per interval, not with traffic.
+
+Counts still buffered when a process is killed are lost; view counts are
+allowed to be slightly low. Set ``VIEW_FLUSH_ASYNC = False`` to write every
+view inline instead (tests, one-off scripts).
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement.
+UPSERT_BATCH = 500
+
+_lock = threading.Lock()
+_pending = Counter()
+_wake = threading.Event()
+_flusher = None
+
+
+def _async():
+    return getattr(settings, 'VIEW_FLUSH_ASYNC', True)
+
+
+def hour_of(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+EVENTS = ('views', 'clicks')
+
+
+def valid_product_id(pk):
+    """Whether ``pk`` fits a bigint primary key; others fail lookups (OverflowError on SQLite)."""
+    return isinstance(pk, int) and 0 < pk < 2 ** 63
+
+
+def record_views(product_ids, when=None):
+    """Count one view of each product. Never touches the database when async."""
+    _record('views', product_ids, when)
+
+
+def record_clicks(product_ids, when=None):
+    """Count one contact click (call / WhatsApp) on each product."""
+    _record('clicks', product_ids, when)
+
+
+def _record(event, product_ids, when):
+    hour = hour_of(when or timezone.now())
+    with _lock:
+        for pk in product_ids:
+            _pending[event, pk, hour] += 1
+        pending = len(_pending)
+    if not _async():
+        flush_views()
+        return
+    _start_flusher()
+    if pending >= getattr(settings, 'VIEW_FLUSH_THRESHOLD', 5000):
+        _wake.set()
+
+
+def pending_views():
+    with _lock:
+        return sum(_pending.values())
+
+
+def _drain():
+    global _pending
+    with _lock:
+        counts, _pending = _pending, Counter()
+    return counts
+
+
+def _restore(counts):
+    with _lock:
+        _pending.update(counts)
+
+
+def flush_views():
+    """Write every buffered count; returns the number of views written."""
+    counts = _drain()
+    # A key no flush can write would be restored and fail every later flush.
+    bad = [key for key in counts if key[0] not in EVENTS or not valid_product_id(key[1])]
+    if bad:
+        logger.warning("Dropping %s view counts with invalid keys, e.g. %r", len(bad), bad[0])
+        for key in bad:
+            del counts[key]
+    if not counts:
+        return 0
+    try:
+        return write_views(counts)
+    except Exception:
+        # Keep the counts for the next flush rather than dropping them.
+        _restore(counts)
+        raise
+
+
+def _run_flusher():
+    interval = getattr(settings, 'VIEW_FLUSH_INTERVAL', 30)
+    while True:
+        _wake.wait(interval)
+        _wake.clear()
+        close_old_connections()
+        try:
+            flush_views()
+        except Exception:
+            logger.exception("Flushing view counts failed")
+        finally:
+            close_old_connections()
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run_flusher, name='view-flusher', daemon=True)
+            _flusher.start()
+            atexit.register(_flush_at_exit)
+
+
+def _flush_at_exit():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception("Flushing view counts at exit failed")
+
+
+# Writing
+
+def _upsert_add(model, keys, rows, replace=(), counter='views'):
+    """
+    Add ``counter`` to existing rows of ``model`` or insert new ones.
+
+    ``rows`` are tuples of ``(*keys, *replace, count)`` with every key
+    distinct; columns in ``replace`` are overwritten rather than added to.
+    PostgreSQL and SQLite both support ON CONFLICT ... DO UPDATE.
+    """
+    if not rows:
+        return
+    fields = [model._meta.get_field(name) for name in (*keys, *replace, counter)]
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = [qn(field.column) for field in fields]
+    key_columns = columns[:len(keys)]
+    updates = [f"{column} = EXCLUDED.{column}" for column in columns[len(keys):-1]]
+    updates.append(f"{columns[-1]} = {table}.{columns[-1]} + EXCLUDED.{columns[-1]}")
+    placeholder = f"({', '.join(['%s'] * len(fields))})"
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH):
+            batch = rows[start:start + UPSERT_BATCH]
+            params = [
+                field.get_db_prep_value(value, connection)
+                for row in batch for field, value in zip(fields, row)
+            ]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([placeholder] * len(batch))} "
+                f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {', '.join(updates)}",
+                params,
+            )
+
+
+def write_views(counts):
+    """
+    Add ``{(event, product_id, hour): count}`` to the rollup tables; events
+    for products that no longer exist are dropped. Returns the views written.
+    """
+    from products.models import Product
+    from .models import (
+        ProductClicksHourly, ProductViewTotal, ProductViewsDaily, ProductViewsHourly,
+        ShopViewTotal, ShopViewsDaily, ShopViewsHourly,
+    )
+
+    sellers = dict(Product.objects.filter(pk__in={pk for _, pk, _ in counts}).values_list('pk', 'seller_id'))
+    product_hourly, product_daily, product_total = Counter(), Counter(), Counter()
+    shop_hourly, shop_daily, shop_total = Counter(), Counter(), Counter()
+    clicks_hourly = Counter()
+    for (event, pk, hour), views in counts.items():
+        seller_id = sellers.get(pk)
+        if seller_id is None:
+            continue
+        if event == 'clicks':
+            clicks_hourly[pk, hour] += views
+            continue
+        day = timezone.localtime(hour).date()
+        product_hourly[pk, hour] += views
+        product_daily[pk, day] += views
+        product_total[pk, seller_id] += views
+        shop_hourly[seller_id, hour] += views
+        shop_daily[seller_id, day] += views
+        shop_total[seller_id] += views
+
+    def rows(counter):
+        return [(*(key if isinstance(key, tuple) else (key,)), views) for key, views in sorted(counter.items())]
+
+    with transaction.atomic():
+        _upsert_add(ProductViewsHourly, ['product', 'hour'], rows(product_hourly))
+        _upsert_add(ProductViewsDaily, ['product', 'day'], rows(product_daily))
+        # A product that moved shops takes its total along.
+        _upsert_add(ProductViewTotal, ['product'], rows(product_total), replace=['seller'])
+        _upsert_add(ShopViewsHourly, ['seller', 'hour'], rows(shop_hourly))
+        _upsert_add(ShopViewsDaily, ['seller', 'day'], rows(shop_daily))
+        _upsert_add(ShopViewTotal, ['seller'], rows(shop_total))
+        _upsert_add(ProductClicksHourly, ['product', 'hour'], rows(clicks_hourly), counter='clicks')
+    return sum(shop_total.values())
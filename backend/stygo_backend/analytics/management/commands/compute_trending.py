@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from analytics.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = "Recompute the trending ranking from recent views, clicks and favorites (run from cron)"
+
+    def handle(self, *args, **options):
+        size = rebuild_trending()
+        self.stdout.write(f"Ranked {size} trending products")
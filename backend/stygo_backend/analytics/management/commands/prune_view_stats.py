@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from analytics.models import ProductViewsHourly, ShopViewsHourly
+
+
+class Command(BaseCommand):
+    help = "Delete hourly view rollups older than --days (daily rollups and totals are kept)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        products, _ = ProductViewsHourly.objects.filter(hour__lt=cutoff).delete()
+        shops, _ = ShopViewsHourly.objects.filter(hour__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {products} product and {shops} shop hourly rows before {cutoff:%Y-%m-%d %H:00}")
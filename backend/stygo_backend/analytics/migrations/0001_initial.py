@@ -0,0 +1,85 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0009_image_variants'),
+        ('sellers', '0005_product_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopViewTotal',
+            fields=[
+                ('seller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_total', serialize=False, to='sellers.sellerprofile')),
+                ('views', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductViewsDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'day'), name='unique_product_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductViewsHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='product_views_hour')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'hour'), name='unique_product_hour')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductViewTotal',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_total', serialize=False, to='products.product')),
+                ('views', models.PositiveBigIntegerField(default=0)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sellers.sellerprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['seller', '-views'], name='product_views_by_seller')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShopViewsDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sellers.sellerprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('seller', 'day'), name='unique_shop_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShopViewsHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sellers.sellerprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='shop_views_hour')],
+                'constraints': [models.UniqueConstraint(fields=('seller', 'hour'), name='unique_shop_hour')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('products', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingProduct',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='products.product')),
+                ('rank', models.PositiveIntegerField(unique=True)),
+                ('top_category', models.CharField(blank=True, max_length=20, null=True)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['top_category', 'rank'], name='trending_category_rank')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductClicksHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='product_clicks_hour')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'hour'), name='unique_product_click_hour')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+from django.db import models
+from products.models import Product
+from sellers.models import SellerProfile
+
+
+# View counts written by analytics.buffer in batches. Every table is keyed
+# by a unique constraint so a flush can add to existing rows with one
+# INSERT ... ON CONFLICT DO UPDATE per table.
+
+class ProductViewsHourly(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['product', 'hour'], name='unique_product_hour')]
+        # For prune_view_stats.
+        indexes = [models.Index(fields=['hour'], name='product_views_hour')]
+
+
+class ProductViewsDaily(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['product', 'day'], name='unique_product_day')]
+
+
+class ShopViewsHourly(models.Model):
+    seller = models.ForeignKey(SellerProfile, on_delete=models.CASCADE, related_name='+')
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['seller', 'hour'], name='unique_shop_hour')]
+        # For prune_view_stats.
+        indexes = [models.Index(fields=['hour'], name='shop_views_hour')]
+
+
+class ShopViewsDaily(models.Model):
+    seller = models.ForeignKey(SellerProfile, on_delete=models.CASCADE, related_name='+')
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['seller', 'day'], name='unique_shop_day')]
+
+
+class ProductViewTotal(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='view_total')
+    # Copied from the product so a shop's most viewed products are one index scan.
+    seller = models.ForeignKey(SellerProfile, on_delete=models.CASCADE, related_name='+')
+    views = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['seller', '-views'], name='product_views_by_seller')]
+
+
+class ShopViewTotal(models.Model):
+    seller = models.OneToOneField(SellerProfile, on_delete=models.CASCADE, primary_key=True, related_name='view_total')
+    views = models.PositiveBigIntegerField(default=0)
+
+
+class ProductClicksHourly(models.Model):
+    """Clicks on a product's call / WhatsApp buttons; an input to trending."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    hour = models.DateTimeField()
+    clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['product', 'hour'], name='unique_product_click_hour')]
+        indexes = [models.Index(fields=['hour'], name='product_clicks_hour')]
+
+
+class TrendingProduct(models.Model):
+    """
+    The trending ranking, rebuilt wholesale by ``compute_trending``. Rank 1
+    is the highest score; pages are range scans on ``rank`` (or on
+    ``top_category, rank`` for one category).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    rank = models.PositiveIntegerField(unique=True)
+    top_category = models.CharField(max_length=20, null=True, blank=True)
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['top_category', 'rank'], name='trending_category_rank')]
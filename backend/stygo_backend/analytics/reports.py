@@ -0,0 +1,55 @@
+"""
+Seller-facing view statistics, read from the rollup tables that
+analytics.buffer maintains. Each read is a bounded index range scan, so the
+cost does not grow with traffic or with the age of the shop.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .buffer import hour_of
+from .models import ProductViewTotal, ShopViewsDaily, ShopViewsHourly
+
+REPORT_DAYS = 30
+TOP_PRODUCTS = 10
+
+
+def shop_report(seller_id, total=0):
+    """
+    Views for the dashboard: three queries. ``total`` is the shop's running
+    total, loaded with the profile (``select_related('view_total')``).
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+    first_day = today - timedelta(days=REPORT_DAYS - 1)
+    by_day = dict(
+        ShopViewsDaily.objects.filter(seller_id=seller_id, day__gte=first_day).values_list('day', 'views')
+    )
+    daily = [
+        {'day': day, 'views': by_day.get(day, 0)}
+        for day in (first_day + timedelta(days=offset) for offset in range(REPORT_DAYS))
+    ]
+
+    first_hour = hour_of(now) - timedelta(hours=23)
+    by_hour = dict(
+        ShopViewsHourly.objects.filter(seller_id=seller_id, hour__gte=first_hour).values_list('hour', 'views')
+    )
+    hourly = [
+        {'hour': hour, 'views': by_hour.get(hour, 0)}
+        for hour in (first_hour + timedelta(hours=offset) for offset in range(24))
+    ]
+
+    top_products = [
+        {'id': pk, 'name': name, 'views': views}
+        for pk, name, views in ProductViewTotal.objects.filter(seller_id=seller_id)
+        .order_by('-views').values_list('product_id', 'product__name', 'views')[:TOP_PRODUCTS]
+    ]
+    return {
+        'views': total,
+        'views_today': daily[-1]['views'],
+        'views_7d': sum(entry['views'] for entry in daily[-7:]),
+        'views_30d': sum(entry['views'] for entry in daily),
+        'daily': daily,
+        'hourly': hourly,
+        'top_products': top_products,
+    }
@@ -0,0 +1,155 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from favorites.models import Favorite
+from products.tests import make_catalog
+from . import buffer
+from .models import (
+    ProductViewTotal, ProductViewsDaily, ProductViewsHourly, ShopViewTotal, ShopViewsDaily, TrendingProduct,
+)
+from .trending import trending_scores
+from .views import AnalyticsRateThrottle
+
+
+class ViewBufferTests(TestCase):
+    def setUp(self):
+        self.shop = make_catalog(3, images_per_product=1)[0]
+        self.ids = list(self.shop.products.order_by("id").values_list("id", flat=True))
+        buffer._drain()
+        self.addCleanup(buffer._drain)
+
+    def test_endpoint_only_buffers(self):
+        with mock.patch.object(buffer, "_start_flusher"), self.assertNumQueries(0):
+            response = APIClient().post("/api/analytics/views/", {"product_ids": self.ids[:2]}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(buffer.pending_views(), 2)
+        self.assertFalse(ProductViewsHourly.objects.exists())
+
+    def test_rejects_bad_ids(self):
+        for ids in ("1,2", [0], [-1], [2 ** 63]):
+            response = APIClient().post("/api/analytics/views/", {"product_ids": ids}, format="json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_throttles_each_client(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        client = APIClient()
+        rates = mock.patch.dict(AnalyticsRateThrottle.THROTTLE_RATES, {"analytics": "2/min"})
+        with mock.patch.object(buffer, "_start_flusher"), rates:
+            statuses = [
+                client.post("/api/analytics/clicks/", {"product_ids": self.ids[:1]}, format="json").status_code
+                for _ in range(3)
+            ]
+        self.assertEqual(statuses, [202, 202, 429])
+
+    def test_flush_adds_to_rollups_in_one_batch(self):
+        now = timezone.now()
+        with mock.patch.object(buffer, "_start_flusher"):
+            for _ in range(5):
+                buffer.record_views(self.ids, when=now)
+            buffer.record_views([self.ids[0], 999999], when=now - timedelta(days=1))
+        # product lookup, savepoint, six upserts, release
+        with self.assertNumQueries(9):
+            self.assertEqual(buffer.flush_views(), 16)
+        self.assertEqual(buffer.pending_views(), 0)
+
+        # A second flush adds to the same rows instead of replacing them.
+        with mock.patch.object(buffer, "_start_flusher"):
+            buffer.record_views([self.ids[0]], when=now)
+        buffer.flush_views()
+
+        first = self.ids[0]
+        self.assertEqual(ProductViewTotal.objects.get(pk=first).views, 7)
+        self.assertEqual(ProductViewsDaily.objects.get(product_id=first, day=timezone.localdate(now)).views, 6)
+        self.assertEqual(ProductViewsHourly.objects.filter(product_id=first).count(), 2)
+        self.assertEqual(ShopViewTotal.objects.get(pk=self.shop.pk).views, 17)
+        self.assertEqual(ShopViewsDaily.objects.filter(seller=self.shop).count(), 2)
+
+    def test_failed_flush_keeps_counts(self):
+        with mock.patch.object(buffer, "_start_flusher"):
+            buffer.record_views(self.ids)
+        with mock.patch.object(buffer, "write_views", side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            buffer.flush_views()
+        self.assertEqual(buffer.pending_views(), 3)
+
+    def test_flush_drops_unwritable_keys(self):
+        with mock.patch.object(buffer, "_start_flusher"):
+            buffer.record_views([self.ids[0], 10 ** 20])
+        self.assertEqual(buffer.flush_views(), 1)
+        self.assertEqual(buffer.pending_views(), 0)
+        self.assertEqual(ProductViewTotal.objects.get(pk=self.ids[0]).views, 1)
+
+    @override_settings(VIEW_FLUSH_ASYNC=False)
+    def test_dashboard_reports_views(self):
+        client = APIClient()
+        client.post("/api/analytics/views/", {"product_ids": self.ids}, format="json")
+        client.post("/api/analytics/views/", {"product_ids": self.ids[1:2]}, format="json")
+
+        seller = APIClient()
+        seller.force_authenticate(User.objects.get(seller=self.shop))
+        # profile with its total, daily, hourly, top products
+        with self.assertNumQueries(4):
+            data = seller.get("/api/sellers/dashboard/").json()
+        self.assertEqual(data["views"], 4)
+        analytics = data["analytics"]
+        self.assertEqual((analytics["views_today"], analytics["views_30d"]), (4, 4))
+        self.assertEqual(len(analytics["daily"]), 30)
+        self.assertEqual(sum(entry["views"] for entry in analytics["hourly"]), 4)
+        top = analytics["top_products"][0]
+        self.assertEqual((top["id"], top["views"]), (self.ids[1], 2))
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.shop = make_catalog(4, images_per_product=1)[0]
+        self.ids = list(self.shop.products.order_by("id").values_list("id", flat=True))
+        buffer._drain()
+        self.addCleanup(buffer._drain)
+
+    def test_scores_decay_and_weigh_events(self):
+        # Events are bucketed by hour, so score from the top of the hour.
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        with mock.patch.object(buffer, "_start_flusher"):
+            # Ten views two days ago are worth 2.5 now; three fresh views, 3.
+            for _ in range(10):
+                buffer.record_views([self.ids[0]], when=now - timedelta(days=2))
+            for _ in range(3):
+                buffer.record_views([self.ids[1]], when=now)
+            buffer.record_clicks([self.ids[2]], when=now)
+            # Outside the window: ignored.
+            buffer.record_views([self.ids[3]], when=now - timedelta(days=8))
+        buffer.flush_views()
+        Favorite.objects.create(device_id="device-1234abcd", product_id=self.ids[3])
+
+        scores = trending_scores(now)
+        self.assertAlmostEqual(scores[self.ids[0]], 10 * 0.25, delta=0.1)
+        self.assertAlmostEqual(scores[self.ids[1]], 3, delta=0.1)
+        self.assertAlmostEqual(scores[self.ids[2]], 3, delta=0.1)
+        self.assertAlmostEqual(scores[self.ids[3]], 5, delta=0.1)
+
+        call_command("compute_trending", stdout=io.StringIO())
+        ranking = list(TrendingProduct.objects.order_by("rank").values_list("product_id", flat=True))
+        self.assertEqual(ranking, [self.ids[3], self.ids[2], self.ids[1], self.ids[0]])
+
+    def test_feed_pages_by_rank(self):
+        now = timezone.now()
+        for rank, pk in enumerate(reversed(self.ids), start=1):
+            TrendingProduct.objects.create(product_id=pk, rank=rank, top_category="men", score=10 - rank,
+                                           computed_at=now)
+        client = APIClient()
+        with self.assertNumQueries(2):
+            page = client.get("/api/products/products/trending/?page_size=3").json()
+        self.assertEqual([item["id"] for item in page["results"]], self.ids[::-1][:3])
+        page = client.get(page["next"]).json()
+        self.assertEqual(([item["id"] for item in page["results"]], page["next"]), ([self.ids[0]], None))
+
+        self.assertEqual(client.get("/api/products/products/trending/?category=kids").json()["results"], [])
+        self.assertEqual(client.get("/api/products/products/trending/?category=shoes").status_code, 400)
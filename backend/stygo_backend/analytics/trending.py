@@ -0,0 +1,78 @@
+"""
+Trending products.
+
+A product's score adds up its recent views, contact clicks and favorites,
+each weighted by kind and halved every ``TRENDING_HALF_LIFE_HOURS`` of age:
+
+    score = sum(weight[kind] * count * 0.5 ** (age_hours / half_life))
+
+over the last ``TRENDING_WINDOW_DAYS``. Inputs are the hourly rollups
+written by analytics.buffer and favorites grouped by hour, so the job reads
+at most one row per product per hour per kind. The top
+``TRENDING_SIZE`` products are written to TrendingProduct with a dense
+rank, which the feed pages through by index.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from favorites.models import Favorite
+from products.models import Product
+from stygo_backend.caching import invalidate
+from .models import ProductClicksHourly, ProductViewsHourly, TrendingProduct
+
+WEIGHTS = {'views': 1.0, 'clicks': 3.0, 'favorites': 5.0}
+
+
+def _hourly_events(since):
+    """Yield ``(kind, product_id, hour, count)`` for every input since ``since``."""
+    for pk, hour, count in ProductViewsHourly.objects.filter(hour__gte=since).values_list('product_id', 'hour', 'views'):
+        yield 'views', pk, hour, count
+    for pk, hour, count in ProductClicksHourly.objects.filter(hour__gte=since).values_list('product_id', 'hour', 'clicks'):
+        yield 'clicks', pk, hour, count
+    favorites = (
+        Favorite.objects.filter(created_at__gte=since)
+        .annotate(hour=TruncHour('created_at')).order_by()
+        .values_list('product_id', 'hour').annotate(count=Count('id'))
+    )
+    for pk, hour, count in favorites:
+        yield 'favorites', pk, hour, count
+
+
+def trending_scores(now=None):
+    """``{product_id: score}`` for every product with events in the window."""
+    now = now or timezone.now()
+    half_life = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24)
+    since = now - timedelta(days=getattr(settings, 'TRENDING_WINDOW_DAYS', 7))
+    scores = defaultdict(float)
+    for kind, pk, hour, count in _hourly_events(since):
+        age_hours = max((now - hour).total_seconds() / 3600, 0)
+        scores[pk] += WEIGHTS[kind] * count * 0.5 ** (age_hours / half_life)
+    return scores
+
+
+def rebuild_trending(now=None):
+    """Replace the ranking with the current top products; returns its size."""
+    now = now or timezone.now()
+    scores = trending_scores(now)
+    categories = dict(Product.objects.filter(pk__in=scores).values_list('pk', 'top_category'))
+    # Ties go to the newer product.
+    ranked = sorted(
+        (pk for pk in scores if pk in categories),
+        key=lambda pk: (-scores[pk], -pk),
+    )[:getattr(settings, 'TRENDING_SIZE', 1000)]
+
+    with transaction.atomic():
+        TrendingProduct.objects.all().delete()
+        TrendingProduct.objects.bulk_create(
+            TrendingProduct(product_id=pk, rank=rank, top_category=categories[pk],
+                            score=round(scores[pk], 4), computed_at=now)
+            for rank, pk in enumerate(ranked, start=1)
+        )
+    invalidate('trending')
+    return len(ranked)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import record_product_clicks, record_product_views
+
+urlpatterns = [
+    path('views/', record_product_views, name='record_product_views'),
+    path('clicks/', record_product_clicks, name='record_product_clicks'),
+]
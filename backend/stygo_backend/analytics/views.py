@@ -0,0 +1,44 @@
+from django.conf import settings
+from rest_framework.decorators import api_view, throttle_classes
+from rest_framework.response import Response
+from rest_framework.throttling import UserRateThrottle
+from .buffer import record_clicks, record_views, valid_product_id
+
+
+class AnalyticsRateThrottle(UserRateThrottle):
+    """Per user, or per IP for anonymous clients."""
+    scope = 'analytics'
+
+
+def _record(request, record):
+    limit = getattr(settings, 'FEED_MAX_PAGE_SIZE', 100)
+    ids = request.data.get('product_ids')
+    try:
+        if not isinstance(ids, list) or len(ids) > limit:
+            raise ValueError
+        ids = list(dict.fromkeys(int(pk) for pk in ids))
+        if not all(valid_product_id(pk) for pk in ids):
+            raise ValueError
+    except (TypeError, ValueError):
+        return Response({'error': f'product_ids must be a list of at most {limit} product ids'}, status=400)
+
+    record(ids)
+    return Response({'recorded': len(ids)}, status=202)
+
+
+# ✅ Count product views (buffered; see analytics.buffer)
+@api_view(['POST'])
+@throttle_classes([AnalyticsRateThrottle])
+def record_product_views(request):
+    """
+    ``{"product_ids": [...]}``, one view each. No queries: unknown ids are
+    dropped when the buffer is flushed.
+    """
+    return _record(request, record_views)
+
+
+# ✅ Count clicks on a product's call / WhatsApp buttons (buffered)
+@api_view(['POST'])
+@throttle_classes([AnalyticsRateThrottle])
+def record_product_clicks(request):
+    return _record(request, record_clicks)
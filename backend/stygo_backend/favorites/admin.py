@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Favorite
+
+
+@admin.register(Favorite)
+class FavoriteAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "device_id", "product", "created_at")
+    search_fields = ("device_id", "user__username")
+    raw_id_fields = ("user", "product")
+    readonly_fields = ("created_at",)
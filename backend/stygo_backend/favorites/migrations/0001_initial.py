@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0009_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Favorite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_id', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorites', to='products.product')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='favorites', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='favorite_user_created'), models.Index(condition=models.Q(('user__isnull', True)), fields=['device_id', '-created_at'], name='favorite_device_created')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('user', 'product'), name='unique_user_favorite'), models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('device_id', 'product'), name='unique_device_favorite'), models.CheckConstraint(condition=models.Q(('user__isnull', False), models.Q(('device_id', ''), _negated=True), _connector='OR'), name='favorite_has_owner')],
+            },
+        ),
+    ]
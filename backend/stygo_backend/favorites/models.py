@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Q
+
+from products.models import Product
+
+
+class Favorite(models.Model):
+    """
+    A saved product. Owned by a signed-in user, or by an anonymous browser
+    identified by the ``X-Device-ID`` header it sends.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="favorites")
+    device_id = models.CharField(max_length=64, blank=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="favorites")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], condition=Q(user__isnull=False),
+                                    name="unique_user_favorite"),
+            models.UniqueConstraint(fields=["device_id", "product"], condition=Q(user__isnull=True),
+                                    name="unique_device_favorite"),
+            models.CheckConstraint(condition=Q(user__isnull=False) | ~Q(device_id=""),
+                                   name="favorite_has_owner"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="favorite_user_created"),
+            models.Index(fields=["device_id", "-created_at"], condition=Q(user__isnull=True),
+                         name="favorite_device_created"),
+        ]
+
+    def __str__(self):
+        owner = self.user or self.device_id
+        return f"{owner} ♥ {self.product_id}"
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from products.tests import make_catalog
+from .models import Favorite
+
+DEVICE = "device-1234abcd"
+
+
+class FavoriteTests(TestCase):
+    def setUp(self):
+        self.products = list(make_catalog(4, images_per_product=1)[0].products.order_by("id"))
+        self.ids = [product.pk for product in self.products]
+        self.client = APIClient(HTTP_X_DEVICE_ID=DEVICE)
+
+    def test_requires_owner(self):
+        response = APIClient().get("/api/favorites/")
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_add_and_remove_by_device(self):
+        with self.assertNumQueries(3):  # products, insert, list
+            response = self.client.post("/api/favorites/add/", {"product_ids": [self.ids[0], self.ids[2], 999999]},
+                                        format="json")
+        self.assertEqual(response.json()["missing"], [999999])
+        self.assertCountEqual(response.json()["product_ids"], [self.ids[0], self.ids[2]])
+
+        # Adding again is a no-op rather than an integrity error.
+        self.client.post("/api/favorites/add/", {"product_ids": [self.ids[0]]}, format="json")
+        self.assertEqual(Favorite.objects.filter(device_id=DEVICE).count(), 2)
+
+        response = self.client.post("/api/favorites/remove/", {"product_ids": [self.ids[0]]}, format="json")
+        self.assertEqual(response.json()["product_ids"], [self.ids[2]])
+
+    def test_rejects_out_of_range_ids(self):
+        for url in ("/api/favorites/add/", "/api/favorites/remove/"):
+            for ids in ([2 ** 70], [0]):
+                response = self.client.post(url, {"product_ids": ids}, format="json")
+                self.assertEqual(response.status_code, 400, (url, ids))
+
+    def test_claim_moves_device_favorites_to_user(self):
+        self.client.post("/api/favorites/add/", {"product_ids": self.ids[:2]}, format="json")
+        user = User.objects.create_user(username="buyer@example.com")
+        Favorite.objects.create(user=user, product=self.products[1])
+
+        self.client.force_authenticate(user)
+        response = self.client.post("/api/favorites/claim/")
+        self.assertCountEqual(response.json()["product_ids"], self.ids[:2])
+        self.assertFalse(Favorite.objects.filter(device_id=DEVICE, user=None).exists())
+
+
+class ProductBatchTests(TestCase):
+    def setUp(self):
+        seller = make_catalog(5, images_per_product=2)[0]
+        self.ids = list(seller.products.order_by("id").values_list("id", flat=True))
+
+    def test_preserves_order_and_reports_missing(self):
+        wanted = [self.ids[3], 424242, self.ids[0], self.ids[3]]
+        with self.assertNumQueries(2):
+            response = APIClient().get("/api/products/batch/", {"ids": ",".join(map(str, wanted))})
+        data = response.json()
+        self.assertEqual([product["id"] for product in data["results"]], [self.ids[3], self.ids[0]])
+        self.assertEqual(data["missing"], [424242])
+        self.assertEqual(len(data["results"][0]["images"]), 2)
+
+    def test_sparse_fields_and_bad_ids(self):
+        response = APIClient().get("/api/products/batch/", {"ids": str(self.ids[1]), "fields": "name"})
+        self.assertEqual(response.json()["results"], [{"name": "Product 0-1"}])
+        for ids in ("1,x", "0", "-4", "99999999999999999999999"):
+            self.assertEqual(APIClient().get("/api/products/batch/", {"ids": ids}).status_code, 400)
+        self.assertEqual(APIClient().get("/api/products/batch/").status_code, 400)
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import add_favorites, claim_favorites, list_favorites, remove_favorites
+
+urlpatterns = [
+    path('', list_favorites, name='list_favorites'),
+    path('add/', add_favorites, name='add_favorites'),
+    path('remove/', remove_favorites, name='remove_favorites'),
+    path('claim/', claim_favorites, name='claim_favorites'),
+]
@@ -0,0 +1,112 @@
+import re
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from analytics.buffer import valid_product_id
+from products.models import Product
+from .models import Favorite
+
+DEVICE_ID = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+def device_id_for(request):
+    device_id = request.headers.get('X-Device-ID', '').strip()
+    return device_id if DEVICE_ID.match(device_id) else None
+
+
+def favorite_owner(request):
+    """Filter kwargs for the caller's favorites, or None if they are anonymous and sent no device id."""
+    if request.user.is_authenticated:
+        return {'user': request.user}
+    device_id = device_id_for(request)
+    if device_id:
+        return {'user': None, 'device_id': device_id}
+    return None
+
+
+def _product_ids(request):
+    """The ``product_ids`` list from the body, or None if it is malformed."""
+    ids = request.data.get('product_ids')
+    if not isinstance(ids, list) or len(ids) > getattr(settings, 'FEED_MAX_PAGE_SIZE', 100):
+        return None
+    try:
+        ids = list(dict.fromkeys(int(pk) for pk in ids))
+    except (TypeError, ValueError):
+        return None
+    return ids if all(valid_product_id(pk) for pk in ids) else None
+
+
+def _favorite_ids(owner):
+    return list(Favorite.objects.filter(**owner).values_list('product_id', flat=True))
+
+
+OWNER_ERROR = 'Sign in or send an X-Device-ID header'
+IDS_ERROR = 'product_ids must be a list of at most %s product ids'
+
+
+# ✅ Favorite product ids, newest first; hydrate them with /api/products/batch/
+@api_view(['GET'])
+def list_favorites(request):
+    owner = favorite_owner(request)
+    if owner is None:
+        return Response({'error': OWNER_ERROR}, status=400)
+    return Response({'product_ids': _favorite_ids(owner)})
+
+
+@api_view(['POST'])
+def add_favorites(request):
+    """
+    Bulk add: one query to check the products, one insert. Ids that are
+    already favorites are ignored; unknown ids are reported in ``missing``.
+    """
+    owner = favorite_owner(request)
+    if owner is None:
+        return Response({'error': OWNER_ERROR}, status=400)
+    ids = _product_ids(request)
+    if ids is None:
+        return Response({'error': IDS_ERROR % getattr(settings, 'FEED_MAX_PAGE_SIZE', 100)}, status=400)
+
+    found = set(Product.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    Favorite.objects.bulk_create(
+        [Favorite(product_id=pk, **owner) for pk in ids if pk in found],
+        ignore_conflicts=True,
+    )
+    return Response({
+        'product_ids': _favorite_ids(owner),
+        'missing': [pk for pk in ids if pk not in found],
+    })
+
+
+@api_view(['POST'])
+def remove_favorites(request):
+    owner = favorite_owner(request)
+    if owner is None:
+        return Response({'error': OWNER_ERROR}, status=400)
+    ids = _product_ids(request)
+    if ids is None:
+        return Response({'error': IDS_ERROR % getattr(settings, 'FEED_MAX_PAGE_SIZE', 100)}, status=400)
+
+    Favorite.objects.filter(product_id__in=ids, **owner).delete()
+    return Response({'product_ids': _favorite_ids(owner)})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def claim_favorites(request):
+    """Move the favorites saved under this browser's device id to the signed-in user."""
+    device_id = device_id_for(request)
+    if not device_id:
+        return Response({'error': 'X-Device-ID header is required'}, status=400)
+
+    with transaction.atomic():
+        device_favorites = Favorite.objects.filter(user=None, device_id=device_id)
+        Favorite.objects.bulk_create(
+            [Favorite(user=request.user, product_id=pk)
+             for pk in device_favorites.values_list('product_id', flat=True)],
+            ignore_conflicts=True,
+        )
+        device_favorites.delete()
+    return Response({'product_ids': _favorite_ids({'user': request.user})})
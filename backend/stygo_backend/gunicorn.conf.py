@@ -0,0 +1,19 @@
+# Read by gunicorn from the working directory. Sets up prometheus_client's
+# multiprocess mode so /metrics sums every worker (see monitoring.metrics).
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'stygo-metrics'))
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be added to this one's.
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
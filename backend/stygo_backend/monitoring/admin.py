@@ -0,0 +1,69 @@
+from django.contrib import admin
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import RequestProfile, SlowQuery
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "method", "path", "view", "status", "duration_ms", "query_count", "query_ms", "user")
+    list_filter = ("view", "status")
+    search_fields = ("path", "view")
+    readonly_fields = ("created_at", "user", "method", "path", "view", "status", "duration_ms",
+                       "query_count", "query_ms", "downloads", "stats")
+    exclude = ("profile", "queries")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path("<int:pk>/download/", self.admin_site.admin_view(self.download_profile),
+                 name="monitoring_requestprofile_download"),
+            path("<int:pk>/queries/", self.admin_site.admin_view(self.download_queries),
+                 name="monitoring_requestprofile_queries"),
+        ] + super().get_urls()
+
+    @admin.display(description="Downloads")
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">cProfile (.prof)</a> · <a href="{}">SQL log (.json)</a>',
+            reverse("admin:monitoring_requestprofile_download", args=[obj.pk]),
+            reverse("admin:monitoring_requestprofile_queries", args=[obj.pk]),
+        )
+
+    def download_profile(self, request, pk):
+        record = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(bytes(record.profile), content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="request-{record.pk}.prof"'
+        return response
+
+    def download_queries(self, request, pk):
+        record = get_object_or_404(RequestProfile, pk=pk)
+        response = JsonResponse(record.queries, safe=False, json_dumps_params={"indent": 2})
+        response["Content-Disposition"] = f'attachment; filename="request-{record.pk}-sql.json"'
+        return response
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "duration_ms", "view", "short_sql", "fingerprint")
+    list_filter = ("view",)
+    search_fields = ("sql", "view", "path", "fingerprint")
+    readonly_fields = ("created_at", "duration_ms", "view", "method", "path", "fingerprint", "sql", "params",
+                       "stack", "plan")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="SQL")
+    def short_sql(self, obj):
+        return obj.sql[:120]
@@ -0,0 +1,390 @@
+"""
+Latency benchmark for the API, used by the ``benchmark_endpoints``
+management command.
+
+Every route in products/urls.py, sellers/urls.py and otp/urls.py becomes
+one endpoint per HTTP method its view accepts. Path parameters are filled
+from the shop with the most products and its newest product, so shop pages
+and the dashboard are as heavy as the data allows; views that need a login
+get a JWT for that shop's owner, and ``REQUEST_DATA`` supplies query
+strings and bodies. Seed a catalog first with ``seed_marketplace``.
+
+Each endpoint gets ``warmup`` untimed requests (cached feeds are measured
+warm), then ``concurrency`` threads send ``requests`` more; concurrency 1
+runs in the calling thread. There are two drivers:
+
+* in-process (the default) calls the app through Django's test client and
+  counts queries per request with an execute_wrapper on the worker's
+  connection;
+* HTTP (``base_url``) sends real requests to a running server and reads
+  queries per request off the ``stygo_http_request_db_queries`` histogram
+  on ``/metrics``, diffed around the run, so other traffic to the same
+  views skews it.
+
+Requests that write are skipped unless ``writes`` is set, and then only
+in-process: each runs in a transaction that is rolled back, with email
+going to the locmem backend. At concurrency above 1 they queue on the
+same rows, so they measure lock contention as well.
+
+Reports are plain JSON (see ``summarize``); ``compare`` lines up two of
+them by endpoint.
+"""
+import itertools
+import json
+import math
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+from django.db import connection, connections, transaction
+from django.test import Client, override_settings
+from django.urls import URLResolver, get_resolver, resolve
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from products.models import Product
+from sellers.models import SellerProfile
+
+URLCONFS = ['products.urls', 'sellers.urls', 'otp.urls']
+METHODS = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+PATH_PARAMS = {
+    'pk': lambda s: s.product.pk,
+    'product_id': lambda s: s.product.pk,
+    'shop_slug': lambda s: s.seller.slug,
+    'seller_slug': lambda s: s.seller.slug,
+}
+# "METHOD route" -> callable(samples) giving the query string or body.
+REQUEST_DATA = {
+    'GET api/products/search/': lambda s: {'q': s.product.name.split()[-1]},
+    'GET api/products/filter/': lambda s: {'top_category': s.product.top_category, 'max_price': 999},
+    'GET api/products/batch/': lambda s: {'ids': ','.join(map(str, s.product_ids))},
+    'POST api/products/create/': lambda s: {'name': 'Benchmark product', 'price': '499', 'size': 'M',
+                                           'category': s.product.category},
+    'PUT api/products/<int:product_id>/update/': lambda s: {'price': str(s.product.price)},
+    'PATCH api/products/<int:product_id>/update/': lambda s: {'price': str(s.product.price)},
+    'POST api/sellers/create-shop/': lambda s: {'shop_name': 'Benchmark shop', 'category': 'men'},
+    'PUT api/sellers/shop/update/': lambda s: {'shop_name': s.seller.shop_name},
+    'POST api/auth/login/': lambda s: {'email': s.seller.user.email, 'password': s.password},
+    'POST api/auth/password-reset-request/': lambda s: {'email': s.seller.user.email},
+    # Issued codes are 100000-999999, so this always takes the
+    # invalid-code path and never resets the password.
+    'POST api/auth/password-reset-confirm/': lambda s: {'email': s.seller.user.email, 'code': '000000',
+                                                        'new_password': 'not-applied'},
+}
+# Requests that only read, despite their method.
+READ_ONLY = {'POST api/auth/login/', 'POST api/auth/password-reset-confirm/'}
+QUERIES_METRIC = 'stygo_http_request_db_queries'
+
+
+@dataclass
+class Samples:
+    seller: SellerProfile
+    product: Product
+    product_ids: list
+    password: str
+
+
+@dataclass
+class Endpoint:
+    method: str
+    route: str
+    path: str
+    view: str
+    auth: bool = False
+    json: bool = True
+    write: bool = False
+    data: dict = field(default_factory=dict)
+
+    @property
+    def key(self):
+        return f"{self.method} {self.route}"
+
+    @property
+    def url(self):
+        if self.method == 'GET' and self.data:
+            return f"{self.path}?{urlencode(self.data)}"
+        return self.path
+
+    def body(self):
+        """``(bytes, content_type)``, or ``(None, None)`` for a GET."""
+        if self.method == 'GET':
+            return None, None
+        if self.json:
+            return json.dumps(self.data).encode(), 'application/json'
+        return urlencode(self.data).encode(), 'application/x-www-form-urlencoded'
+
+
+def load_samples(password):
+    seller = SellerProfile.objects.select_related('user').order_by('-product_count', 'pk').first()
+    product = seller and Product.objects.filter(seller=seller).order_by('-created_at', '-id').first()
+    if product is None:
+        return None
+    product_ids = list(Product.objects.order_by('-created_at', '-id').values_list('pk', flat=True)[:20])
+    return Samples(seller, product, product_ids, password)
+
+
+def _routes(patterns, prefix=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _routes(pattern.url_patterns, prefix + str(pattern.pattern))
+        else:
+            yield prefix + str(pattern.pattern), pattern.callback
+
+
+def _view_class(callback):
+    # APIView.as_view() and @api_view both leave the class on the function.
+    return getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+
+
+def discover_endpoints(samples, urlconfs=URLCONFS):
+    """``(endpoints, skipped)``; ``skipped`` maps keys to the reason."""
+    endpoints, skipped = [], {}
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver) or getattr(resolver.urlconf_module, '__name__', None) not in urlconfs:
+            continue
+        for route, callback in _routes(resolver.url_patterns, str(resolver.pattern)):
+            cls = _view_class(callback)
+            methods = [m for m in METHODS if cls is not None and hasattr(cls, m.lower())] or ['GET']
+            params = re.findall(r'<(?:\w+:)?(\w+)>', route)
+            for method in methods:
+                key = f"{method} {route}"
+                if any(name not in PATH_PARAMS for name in params):
+                    skipped[key] = f"no sample value for {params}"
+                    continue
+                path = '/' + re.sub(r'<(?:\w+:)?(\w+)>', lambda m: str(PATH_PARAMS[m.group(1)](samples)), route)
+                endpoints.append(Endpoint(
+                    method=method, route=route, path=path, view=resolve(path).view_name,
+                    auth=cls is not None and not all(issubclass(p, AllowAny) for p in cls.permission_classes),
+                    json=cls is None or any(issubclass(p, JSONParser) for p in cls.parser_classes),
+                    write=method != 'GET' and key not in READ_ONLY,
+                    data=REQUEST_DATA[key](samples) if key in REQUEST_DATA else {},
+                ))
+    return endpoints, skipped
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, statuses, elapsed, queries):
+    ordered = sorted(latencies)
+
+    def ms(seconds):
+        return None if seconds is None else round(seconds * 1000, 2)
+
+    return {
+        'requests': len(ordered),
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'max_ms': ms(ordered[-1] if ordered else None),
+        'throughput_rps': round(len(ordered) / elapsed, 1) if elapsed else None,
+        'queries_per_request': None if queries is None else round(queries, 2),
+        'statuses': dict(sorted(statuses.items())),
+    }
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class InProcessDriver:
+    name = 'in-process'
+
+    def __init__(self, host):
+        self.host = host
+
+    def session(self):
+        return Client(HTTP_HOST=self.host, raise_request_exception=False)
+
+    def send(self, client, endpoint, headers):
+        body, content_type = endpoint.body()
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            if endpoint.write:
+                with transaction.atomic():
+                    response = client.generic(endpoint.method, endpoint.url, body or b'',
+                                              content_type or 'application/octet-stream', headers=headers)
+                    transaction.set_rollback(True)
+            else:
+                response = client.generic(endpoint.method, endpoint.url, body or b'',
+                                          content_type or 'application/octet-stream', headers=headers)
+        return response.status_code, counter.count
+
+    def close(self):
+        # Called from each worker thread, which opened its own connection.
+        connections.close_all()
+
+    def run_context(self, writes):
+        if writes:
+            return override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+        return nullcontext()
+
+    def query_totals(self):
+        return None
+
+
+class HTTPDriver:
+    name = 'http'
+
+    def __init__(self, base_url, metrics_token='', timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.metrics_token = metrics_token
+        self.timeout = timeout
+
+    def session(self):
+        return None
+
+    def send(self, _, endpoint, headers):
+        body, content_type = endpoint.body()
+        if content_type:
+            headers = {**headers, 'Content-Type': content_type}
+        request = urllib.request.Request(self.base_url + endpoint.url, data=body, method=endpoint.method,
+                                         headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            return exc.code, None
+        except OSError as exc:
+            return type(exc).__name__, None
+
+    def close(self):
+        pass
+
+    def run_context(self, writes):
+        return nullcontext()
+
+    def query_totals(self):
+        """view -> (queries, requests) from the server's /metrics, or None if unreadable."""
+        headers = {'Authorization': f"Bearer {self.metrics_token}"} if self.metrics_token else {}
+        request = urllib.request.Request(self.base_url + '/metrics', headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                text = response.read().decode()
+        except OSError:
+            return None
+        totals = {}
+        for family in text_string_to_metric_families(text):
+            if family.name != QUERIES_METRIC:
+                continue
+            for sample in family.samples:
+                queries, requests = totals.get(sample.labels.get('view'), (0, 0))
+                if sample.name == QUERIES_METRIC + '_sum':
+                    queries += sample.value
+                elif sample.name == QUERIES_METRIC + '_count':
+                    requests += sample.value
+                totals[sample.labels.get('view')] = (queries, requests)
+        return totals
+
+
+def run_endpoint(driver, endpoint, user, requests, concurrency, warmup=0):
+    """Drive one endpoint and return its ``summarize`` dict."""
+    headers = {}
+    if endpoint.auth:
+        # Access tokens are short-lived, so each endpoint gets a fresh one.
+        headers['Authorization'] = f"Bearer {RefreshToken.for_user(user).access_token}"
+
+    warm = driver.session()
+    for _ in range(warmup):
+        driver.send(warm, endpoint, headers)
+
+    before = driver.query_totals()
+    tickets = itertools.count()
+    results = []
+
+    def worker(client):
+        mine = []
+        # next() on itertools.count is atomic under the GIL.
+        while next(tickets) < requests:
+            started = time.perf_counter()
+            status, queries = driver.send(client, endpoint, headers)
+            mine.append((time.perf_counter() - started, status, queries))
+        results.extend(mine)
+
+    def threaded_worker():
+        try:
+            worker(driver.session())
+        finally:
+            driver.close()
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker(warm)
+    else:
+        threads = [threading.Thread(target=threaded_worker, name=f"benchmark-{n}") for n in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    counted = [queries for _, _, queries in results if queries is not None]
+    queries = sum(counted) / len(counted) if counted else None
+    after = driver.query_totals() if before is not None else None
+    if after is not None:
+        total_queries = after.get(endpoint.view, (0, 0))[0] - before.get(endpoint.view, (0, 0))[0]
+        total_requests = after.get(endpoint.view, (0, 0))[1] - before.get(endpoint.view, (0, 0))[1]
+        queries = total_queries / total_requests if total_requests else None
+    return summarize([latency for latency, _, _ in results], statuses, elapsed, queries)
+
+
+def run_benchmark(driver, endpoints, samples, requests=200, concurrency=8, warmup=5, writes=False,
+                  progress=None):
+    """Run every endpoint in turn; returns the report."""
+    report = {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'driver': driver.name,
+        'concurrency': concurrency,
+        'requests': requests,
+        'warmup': warmup,
+        'sample': {'seller': samples.seller.slug, 'product': samples.product.pk,
+                   'products': Product.objects.count(), 'sellers': SellerProfile.objects.count()},
+        'endpoints': {},
+        'skipped': {},
+    }
+    with driver.run_context(writes):
+        for endpoint in endpoints:
+            if endpoint.write and not writes:
+                report['skipped'][endpoint.key] = 'writes (pass --writes to include)'
+                continue
+            result = run_endpoint(driver, endpoint, samples.seller.user, requests, concurrency, warmup)
+            report['endpoints'][endpoint.key] = {'path': endpoint.url, **result}
+            if progress:
+                progress(endpoint, result)
+    return report
+
+
+def compare(old, new, metrics=('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request')):
+    """endpoint -> metric -> (old, new, change as a fraction of old) for endpoints in both reports."""
+    changes = {}
+    for key, result in new['endpoints'].items():
+        previous = old['endpoints'].get(key)
+        if previous is None:
+            continue
+        changes[key] = {}
+        for metric in metrics:
+            before, after = previous.get(metric), result.get(metric)
+            change = (after - before) / before if before and after is not None else None
+            changes[key][metric] = (before, after, change)
+    return changes
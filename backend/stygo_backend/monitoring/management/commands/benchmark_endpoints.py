@@ -0,0 +1,96 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from monitoring.benchmark import (
+    HTTPDriver, InProcessDriver, compare, discover_endpoints, load_samples, run_benchmark,
+)
+
+
+class Command(BaseCommand):
+    help = ('Load-test every endpoint in products, sellers and otp urls and report p50/p95/p99 latency, '
+            'throughput and queries per request (see monitoring/benchmark.py)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Parallel clients per endpoint')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint first')
+        parser.add_argument('--only', nargs='+', default=[],
+                            help='Only endpoints whose "METHOD route" contains one of these')
+        parser.add_argument('--writes', action='store_true',
+                            help='Include writes, each rolled back (in-process only)')
+        parser.add_argument('--password', default='stygo-seed',
+                            help="The sample seller's password, for the login endpoint")
+        parser.add_argument('--host', default='api.stygo.in', help='Host header in-process (must be allowed)')
+        parser.add_argument('--base-url', help='Benchmark a running server over HTTP instead')
+        parser.add_argument('--metrics-token', default=getattr(settings, 'METRICS_TOKEN', ''),
+                            help="The server's METRICS_TOKEN, for queries per request over HTTP")
+        parser.add_argument('--output', help='Write the report here as JSON')
+        parser.add_argument('--compare', help='An earlier report to print changes against')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be positive')
+        if options['base_url'] and options['writes']:
+            raise CommandError('--writes can only be rolled back in-process; drop --base-url')
+        baseline = None
+        if options['compare']:
+            if not os.path.exists(options['compare']):
+                raise CommandError(f"No such report: {options['compare']}")
+            with open(options['compare']) as handle:
+                baseline = json.load(handle)
+
+        samples = load_samples(options['password'])
+        if samples is None:
+            raise CommandError('No products to benchmark; run seed_marketplace first')
+        endpoints, skipped = discover_endpoints(samples)
+        if options['only']:
+            endpoints = [e for e in endpoints if any(part in e.key for part in options['only'])]
+        if options['base_url']:
+            driver = HTTPDriver(options['base_url'], options['metrics_token'])
+        else:
+            driver = InProcessDriver(options['host'])
+
+        self.stdout.write(
+            f"{driver.name}: {len(endpoints)} endpoints, {options['requests']} requests each "
+            f"at concurrency {options['concurrency']}"
+        )
+        self.stdout.write(f"{'endpoint':<58} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'queries':>8}  statuses")
+        report = run_benchmark(
+            driver, endpoints, samples, requests=options['requests'], concurrency=options['concurrency'],
+            warmup=options['warmup'], writes=options['writes'], progress=self.write_result,
+        )
+        report['skipped'].update(skipped)
+        for key, reason in report['skipped'].items():
+            self.stdout.write(f"skipped {key}: {reason}")
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        if baseline:
+            self.write_changes(compare(baseline, report))
+
+    def write_result(self, endpoint, result):
+        def cell(value):
+            return '-' if value is None else f"{value:.1f}"
+
+        statuses = ' '.join(f"{code}x{count}" for code, count in result['statuses'].items())
+        self.stdout.write(
+            f"{endpoint.key[:58]:<58} {cell(result['p50_ms']):>8} {cell(result['p95_ms']):>8} "
+            f"{cell(result['p99_ms']):>8} {cell(result['throughput_rps']):>8} "
+            f"{cell(result['queries_per_request']):>8}  {statuses}"
+        )
+
+    def write_changes(self, changes):
+        if not changes:
+            self.stdout.write('No endpoints in common with the earlier report')
+            return
+        self.stdout.write('Changes against the earlier report:')
+        for key, metrics in changes.items():
+            parts = [
+                f"{metric} {before}->{after} ({change:+.0%})" if change is not None else f"{metric} {before}->{after}"
+                for metric, (before, after, change) in metrics.items()
+            ]
+            self.stdout.write(f"  {key}: " + ', '.join(parts))
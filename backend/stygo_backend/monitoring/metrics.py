@@ -0,0 +1,58 @@
+"""
+Prometheus metrics for every request, labelled by resolved URL name.
+
+Under gunicorn each worker is its own process, so the metrics use
+prometheus_client's multiprocess mode: with ``PROMETHEUS_MULTIPROC_DIR``
+set (gunicorn.conf.py sets it) every worker writes its samples to
+memory-mapped files in that directory and ``/metrics`` sums them across
+live and exited workers. Without it (runserver, tests) the metrics live in
+the process's default registry.
+"""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUESTS = Counter(
+    'stygo_http_requests_total', 'Requests by view, method and status code.',
+    ['view', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'stygo_http_request_duration_seconds', 'Time spent handling the request.',
+    ['view', 'method'], buckets=LATENCY_BUCKETS,
+)
+QUERIES = Histogram(
+    'stygo_http_request_db_queries', 'SQL queries run per request.',
+    ['view'], buckets=QUERY_BUCKETS,
+)
+QUERY_TIME = Histogram(
+    'stygo_http_request_db_seconds', 'Time spent in SQL per request.',
+    ['view'], buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'stygo_http_response_size_bytes', 'Response body size; streamed responses are not counted.',
+    ['view'], buckets=SIZE_BUCKETS,
+)
+
+
+def observe(view, method, status, duration, queries, query_time, size=None):
+    REQUESTS.labels(view, method, str(status)).inc()
+    LATENCY.labels(view, method).observe(duration)
+    QUERIES.labels(view).observe(queries)
+    QUERY_TIME.labels(view).observe(query_time)
+    if size is not None:
+        RESPONSE_SIZE.labels(view).observe(size)
+
+
+def exposition():
+    """``(body, content_type)`` for /metrics, summed over every worker."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,54 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from .metrics import observe
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` that counts and times every query."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    # The URL name, or the view's dotted path for unnamed routes.
+    return match.view_name
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL query count and time, response size and status
+    per resolved URL name (see monitoring.metrics). Goes first in
+    MIDDLEWARE so the timings cover the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        size = None if response.streaming else len(response.content)
+        observe(view_label(request), request.method, response.status_code, duration,
+                timer.count, timer.seconds, size)
+        return response
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('duration_ms', models.FloatField()),
+                ('sql', models.TextField()),
+                ('fingerprint', models.CharField(db_index=True, max_length=16)),
+                ('params', models.TextField(blank=True)),
+                ('view', models.CharField(blank=True, db_index=True, max_length=200)),
+                ('method', models.CharField(blank=True, max_length=10)),
+                ('path', models.TextField(blank=True)),
+                ('stack', models.TextField(blank=True)),
+                ('plan', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """One profiled request, recorded by monitoring.profiling for a staff user."""
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    method = models.CharField(max_length=10)
+    path = models.TextField()
+    view = models.CharField(max_length=200, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    query_ms = models.FloatField()
+    # Top functions by cumulative time, as printed by pstats.
+    stats = models.TextField()
+    # marshal-ed pstats data, loadable with pstats / snakeviz once downloaded.
+    profile = models.BinaryField()
+    # [{"sql", "params", "ms", "many"}, ...] in execution order.
+    queries = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class SlowQuery(models.Model):
+    """A query that took longer than SLOW_QUERY_MS, recorded by monitoring.slowqueries."""
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    duration_ms = models.FloatField()
+    # SQL with placeholders, so repeats of one statement share a fingerprint.
+    sql = models.TextField()
+    fingerprint = models.CharField(max_length=16, db_index=True)
+    params = models.TextField(blank=True)
+    view = models.CharField(max_length=200, blank=True, db_index=True)
+    method = models.CharField(max_length=10, blank=True)
+    path = models.TextField(blank=True)
+    # Innermost project frames that led to the query, outermost first.
+    stack = models.TextField(blank=True)
+    # EXPLAIN (ANALYZE, BUFFERS) on PostgreSQL, filled in after the request.
+    # Blank for repeats of a fingerprint explained within the last
+    # SLOW_QUERY_EXPLAIN_INTERVAL.
+    plan = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms {self.view or '-'}: {self.sql[:80]}"
@@ -0,0 +1,115 @@
+"""
+Opt-in profiling of single requests for staff users.
+
+A request is profiled only when it carries ``X-Profile: 1`` or
+``?profile=1`` and comes from a staff user, whether signed in to the admin
+or sending a JWT. Everything else pays for two dictionary lookups. A
+profiled request runs under cProfile with every SQL statement logged with
+its timing; the result is stored as a RequestProfile, downloadable from the
+admin, and its id is returned in the ``X-Profile-ID`` response header.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .middleware import view_label
+from .models import RequestProfile
+
+STATS_LINES = 60
+
+
+def requested(request):
+    return request.META.get('HTTP_X_PROFILE') == '1' or request.GET.get('profile') == '1'
+
+
+def staff_user(request):
+    """The staff user making ``request``, or None. Only called when profiling was asked for."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except (InvalidToken, TokenError):
+            return None
+        user = authenticated[0] if authenticated else None
+    return user if user is not None and user.is_active and user.is_staff else None
+
+
+class QueryLog:
+    """``connection.execute_wrapper`` keeping every statement with its timing."""
+
+    def __init__(self):
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.entries.append({
+                'sql': sql,
+                'params': repr(params)[:2000],
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+                'many': many,
+            })
+
+
+def _stats_text(profiler):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(STATS_LINES)
+    return out.getvalue()
+
+
+def profile_request(get_response, request, user):
+    log = QueryLog()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        response = profiler.runcall(get_response, request)
+    duration = time.perf_counter() - start
+
+    profiler.create_stats()
+    # Dumped before pstats.Stats takes (and clears) profiler.stats.
+    data = marshal.dumps(profiler.stats)
+    record = RequestProfile.objects.create(
+        user=user,
+        method=request.method,
+        path=request.get_full_path()[:2000],
+        view=view_label(request)[:200],
+        status=response.status_code,
+        duration_ms=round(duration * 1000, 3),
+        query_count=len(log.entries),
+        query_ms=round(sum(entry['ms'] for entry in log.entries), 3),
+        stats=_stats_text(profiler),
+        profile=data,
+        queries=log.entries,
+    )
+    keep = getattr(settings, 'REQUEST_PROFILES_KEPT', 200)
+    stale = RequestProfile.objects.values_list('pk', flat=True)[keep:]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
+    response['X-Profile-ID'] = str(record.pk)
+    return response
+
+
+class ProfilerMiddleware:
+    """Goes after AuthenticationMiddleware so admin sessions count as staff."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not requested(request):
+            return self.get_response(request)
+        user = staff_user(request)
+        if user is None:
+            return self.get_response(request)
+        return profile_request(self.get_response, request, user)
@@ -0,0 +1,194 @@
+"""
+Slow query capture.
+
+SlowQueryMiddleware puts an ``execute_wrapper`` on the database
+connections for the length of each request. A query slower than
+``SLOW_QUERY_MS`` is handed, with its parameters, the calling view and the
+project frames of its stack, to a background thread that stores a
+SlowQuery row. On PostgreSQL the thread also captures the plan: SELECTs
+are re-run under ``EXPLAIN (ANALYZE, BUFFERS)`` inside a transaction that
+is rolled back, other statements get a plain EXPLAIN so nothing is written
+twice. SQLite gets ``EXPLAIN QUERY PLAN``. Set ``SLOW_QUERY_MS = None`` to
+turn capture off.
+
+Capture must not add load when the database is already slow. At most
+``SLOW_QUERY_QUEUE_SIZE`` queries wait for the thread; more are dropped.
+Each fingerprint is explained once per ``SLOW_QUERY_EXPLAIN_INTERVAL``
+seconds, and repeats within that window are stored without a plan.
+"""
+import hashlib
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections, transaction
+
+from .middleware import view_label
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+STACK_FRAMES = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+_queue_slots = None
+# fingerprint -> time.monotonic() of its last EXPLAIN, per process.
+_explained = {}
+_explained_lock = threading.Lock()
+# Set while this thread records a query, so the recorder's own statements
+# are not captured in turn (only happens when SLOW_QUERY_ASYNC is off).
+_local = threading.local()
+
+
+def _executor_instance():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query')
+        return _executor
+
+
+def _slots():
+    global _queue_slots
+    with _executor_lock:
+        if _queue_slots is None:
+            _queue_slots = threading.BoundedSemaphore(getattr(settings, 'SLOW_QUERY_QUEUE_SIZE', 100))
+        return _queue_slots
+
+
+def due_for_explain(fp):
+    """True at most once per SLOW_QUERY_EXPLAIN_INTERVAL for each fingerprint."""
+    interval = getattr(settings, 'SLOW_QUERY_EXPLAIN_INTERVAL', 300)
+    now = time.monotonic()
+    with _explained_lock:
+        last = _explained.get(fp)
+        if last is not None and now - last < interval:
+            return False
+        if len(_explained) >= 10000:
+            for key, when in list(_explained.items()):
+                if now - when >= interval:
+                    del _explained[key]
+        _explained[fp] = now
+        return True
+
+
+def fingerprint(sql):
+    return hashlib.sha1(sql.encode()).hexdigest()[:16]
+
+
+def project_stack():
+    """Frames from this project's code (not Django or site-packages), innermost last."""
+    root = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(root) and 'site-packages' not in frame.filename
+        and not frame.filename.endswith(('monitoring/slowqueries.py', 'monitoring/middleware.py'))
+    ]
+    return ''.join(traceback.format_list(frames[-STACK_FRAMES:]))
+
+
+def explain(sql, params):
+    """The plan for ``sql`` on the default database, or '' when it cannot be explained."""
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        analyze = sql.lstrip()[:6].upper() == 'SELECT'
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+    elif vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        return ''
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if vendor == 'postgresql':
+                    timeout = int(getattr(settings, 'SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 10000))
+                    cursor.execute(f"SET LOCAL statement_timeout = {timeout}")
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+            # EXPLAIN ANALYZE ran the statement; undo anything it did.
+            transaction.set_rollback(True)
+    except Exception as exc:
+        return f"EXPLAIN failed: {type(exc).__name__}: {exc}"
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def store(entry, explain_params=None, many=False):
+    fp = fingerprint(entry['sql'])
+    # executemany batches are recorded but not explained.
+    plan = explain(entry['sql'], explain_params) if not many and due_for_explain(fp) else ''
+    SlowQuery.objects.create(fingerprint=fp, plan=plan, **entry)
+    keep = getattr(settings, 'SLOW_QUERIES_KEPT', 1000)
+    stale = SlowQuery.objects.values_list('pk', flat=True)[keep:]
+    SlowQuery.objects.filter(pk__in=list(stale)).delete()
+
+
+def _store_in_worker(entry, params, many):
+    close_old_connections()
+    try:
+        store(entry, params, many)
+    except Exception:
+        logger.exception("Recording a slow query failed")
+    finally:
+        close_old_connections()
+        _slots().release()
+
+
+class SlowQueryRecorder:
+    """``connection.execute_wrapper`` for one request."""
+
+    def __init__(self, request, threshold_ms):
+        self.request = request
+        self.threshold = threshold_ms / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, 'recording', False):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.record(sql, params, many, duration)
+
+    def record(self, sql, params, many, duration):
+        entry = {
+            'duration_ms': round(duration * 1000, 3),
+            'sql': sql,
+            'params': repr(params)[:2000],
+            'view': view_label(self.request)[:200],
+            'method': self.request.method,
+            'path': self.request.get_full_path()[:2000],
+            'stack': project_stack(),
+        }
+        if getattr(settings, 'SLOW_QUERY_ASYNC', True):
+            if not _slots().acquire(blocking=False):
+                logger.warning("Slow query queue is full; dropping %s", entry['sql'][:200])
+                return
+            _executor_instance().submit(_store_in_worker, entry, params, many)
+            return
+        _local.recording = True
+        try:
+            store(entry, params, many)
+        finally:
+            _local.recording = False
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = getattr(settings, 'SLOW_QUERY_MS', None)
+        if threshold is None:
+            return self.get_response(request)
+        recorder = SlowQueryRecorder(request, threshold)
+        with ExitStack() as stack:
+            for db in connections.all():
+                stack.enter_context(db.execute_wrapper(recorder))
+            return self.get_response(request)
@@ -0,0 +1,185 @@
+import io
+import json
+import marshal
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from products.models import Product
+from products.tests import make_catalog
+from .benchmark import InProcessDriver, compare, discover_endpoints, load_samples, percentile, run_benchmark
+from .models import RequestProfile, SlowQuery
+from . import slowqueries
+from .slowqueries import explain
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(METRICS_TOKEN="scrape-token")
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.seller = make_catalog(2)[0]
+
+    def test_records_per_view_metrics(self):
+        view = "latest_products"
+        before = {
+            "requests": sample("stygo_http_requests_total", view=view, method="GET", status="200"),
+            "queries": sample("stygo_http_request_db_queries_sum", view=view),
+            "bytes": sample("stygo_http_response_size_bytes_count", view=view),
+        }
+        with self.assertNumQueries(3):
+            APIClient().get("/api/products/products/latest/")
+        self.assertEqual(sample("stygo_http_requests_total", view=view, method="GET", status="200"),
+                         before["requests"] + 1)
+        self.assertEqual(sample("stygo_http_request_db_queries_sum", view=view), before["queries"] + 3)
+        self.assertEqual(sample("stygo_http_response_size_bytes_count", view=view), before["bytes"] + 1)
+
+        APIClient().get("/api/products/999999/")
+        self.assertGreaterEqual(sample("stygo_http_requests_total", view="product-detail", method="GET", status="404"), 1)
+
+    def test_metrics_endpoint(self):
+        APIClient().get("/api/products/all/")
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('stygo_http_request_duration_seconds_bucket{le="0.005",method="GET",view="products.views.all_products"}',
+                      response.content.decode())
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        self.seller = make_catalog(2)[0]
+        self.staff = User.objects.create_user(username="ops@example.com", password="pw", is_staff=True,
+                                              is_superuser=True)
+
+    def jwt_client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def test_untriggered_requests_are_not_profiled(self):
+        # catalog version, JWT user, products, images: nothing added
+        with self.assertNumQueries(4):
+            response = self.jwt_client(self.staff).get("/api/products/products/latest/")
+        self.assertNotIn("X-Profile-ID", response)
+
+    def test_non_staff_trigger_is_ignored(self):
+        response = self.jwt_client(self.seller.user).get("/api/products/products/latest/?profile=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-ID", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_request_is_profiled_and_downloadable(self):
+        response = self.jwt_client(self.staff).get("/api/products/products/latest/", HTTP_X_PROFILE="1")
+        record = RequestProfile.objects.get(pk=response["X-Profile-ID"])
+        self.assertEqual((record.view, record.status, record.query_count), ("latest_products", 200, 4))
+        self.assertIn("products_product", record.queries[2]["sql"])
+        self.assertIn("latest_products", record.stats)
+
+        self.client.force_login(self.staff)
+        download = self.client.get(f"/admin/monitoring/requestprofile/{record.pk}/download/")
+        self.assertIn("latest_products", {name for _, _, name in marshal.loads(download.content)})
+        queries = self.client.get(f"/admin/monitoring/requestprofile/{record.pk}/queries/").json()
+        self.assertEqual(len(queries), 4)
+
+
+@override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_ASYNC=False)
+class SlowQueryTests(TestCase):
+    def setUp(self):
+        self.seller = make_catalog(2)[0]
+        slowqueries._explained.clear()
+        self.addCleanup(slowqueries._explained.clear)
+
+    def test_records_query_with_view_stack_and_plan(self):
+        APIClient().get("/api/products/products/latest/")
+        products = SlowQuery.objects.filter(view="latest_products", sql__contains='FROM "products_product"').get()
+        self.assertIn("products/views.py", products.stack)
+        self.assertIn("LIMIT", products.sql)
+        self.assertTrue(products.plan)
+        self.assertEqual(SlowQuery.objects.filter(fingerprint=products.fingerprint).count(), 1)
+        # The recorder's own inserts are not captured.
+        self.assertFalse(SlowQuery.objects.filter(sql__contains="monitoring_slowquery").exists())
+
+    def test_repeats_are_stored_without_a_plan(self):
+        for _ in range(2):
+            cache.clear()
+            APIClient().get("/api/products/products/latest/")
+        rows = SlowQuery.objects.filter(view="latest_products", sql__contains='FROM "products_product"')
+        self.assertEqual(sorted(bool(row.plan) for row in rows), [False, True])
+
+    @override_settings(SLOW_QUERY_ASYNC=True)
+    def test_drops_captures_when_queue_is_full(self):
+        full = threading.BoundedSemaphore(1)
+        full.acquire()
+        with (mock.patch.object(slowqueries, "_slots", return_value=full),
+              mock.patch.object(slowqueries, "_executor_instance") as executor):
+            APIClient().get("/api/products/products/latest/")
+        executor.assert_not_called()
+        self.assertFalse(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_MS=10000)
+    def test_fast_queries_are_ignored(self):
+        APIClient().get("/api/products/products/latest/")
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_explain_does_not_repeat_writes(self):
+        plan = explain('UPDATE "products_product" SET "name" = %s', ["renamed"])
+        self.assertTrue(plan)
+        self.assertFalse(Product.objects.filter(name="renamed").exists())
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        call_command("seed_marketplace", sellers=2, products_per_seller=6, seed=1, stdout=io.StringIO())
+        self.samples = load_samples("stygo-seed")
+        self.endpoints, self.skipped = discover_endpoints(self.samples)
+
+    def test_discovers_every_route_with_sample_values(self):
+        keys = {endpoint.key for endpoint in self.endpoints}
+        self.assertIn("GET api/products/<int:pk>/", keys)
+        self.assertIn("GET api/sellers/<slug:shop_slug>/", keys)
+        self.assertIn("POST api/auth/login/", keys)
+        self.assertIn("PATCH api/products/<int:product_id>/update/", keys)
+        self.assertEqual(self.skipped, {})
+        dashboard = next(e for e in self.endpoints if e.key == "GET api/sellers/dashboard/")
+        self.assertTrue(dashboard.auth)
+        self.assertFalse(next(e for e in self.endpoints if e.key == "POST api/auth/login/").write)
+
+    def test_report_has_latency_percentiles_and_queries(self):
+        endpoints = [e for e in self.endpoints if e.route in ("api/products/<int:pk>/", "api/sellers/dashboard/",
+                                                              "api/products/<int:product_id>/delete/")]
+        report = run_benchmark(InProcessDriver("testserver"), endpoints, self.samples,
+                               requests=4, concurrency=1, warmup=1)
+        detail = report["endpoints"]["GET api/products/<int:pk>/"]
+        self.assertEqual(detail["requests"], 4)
+        self.assertEqual(detail["statuses"], {"200": 4})
+        self.assertEqual(detail["queries_per_request"], 3)
+        self.assertLessEqual(detail["p50_ms"], detail["p95_ms"])
+        self.assertLessEqual(detail["p95_ms"], detail["p99_ms"])
+        self.assertEqual(report["endpoints"]["GET api/sellers/dashboard/"]["statuses"], {"200": 4})
+        self.assertIn("DELETE api/products/<int:product_id>/delete/", report["skipped"])
+        json.dumps(report)
+
+    def test_writes_are_rolled_back(self):
+        endpoints = [e for e in self.endpoints if e.key == "DELETE api/products/<int:product_id>/delete/"]
+        report = run_benchmark(InProcessDriver("testserver"), endpoints, self.samples,
+                               requests=2, concurrency=1, warmup=0, writes=True)
+        self.assertEqual(report["endpoints"][endpoints[0].key]["statuses"], {"200": 2})
+        self.assertTrue(Product.objects.filter(pk=self.samples.product.pk).exists())
+
+    def test_percentiles_and_compare(self):
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(percentile([5], 99), 5)
+        old = {"endpoints": {"GET x": {"p50_ms": 10.0, "queries_per_request": 4}}}
+        new = {"endpoints": {"GET x": {"p50_ms": 5.0, "queries_per_request": 4}, "GET y": {}}}
+        changes = compare(old, new, metrics=("p50_ms", "queries_per_request"))
+        self.assertEqual(changes, {"GET x": {"p50_ms": (10.0, 5.0, -0.5), "queries_per_request": (4, 4, 0.0)}})
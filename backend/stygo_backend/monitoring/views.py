@@ -0,0 +1,23 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from .metrics import exposition
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint. Requires ``Authorization: Bearer
+    <METRICS_TOKEN>`` when the token is set; without one it is only served
+    with DEBUG on.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+
+    body, content_type = exposition()
+    return HttpResponse(body, content_type=content_type)
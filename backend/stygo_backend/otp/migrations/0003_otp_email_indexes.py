@@ -0,0 +1,37 @@
+# The OTP model moved from phone numbers to email addresses without a
+# migration; this brings the schema in line and adds its lookup indexes.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('otp', '0002_passwordresettoken'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='otp',
+            name='phone',
+        ),
+        migrations.AddField(
+            model_name='otp',
+            name='email',
+            field=models.EmailField(default='', max_length=254),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='otp',
+            name='is_used',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['email'], name='otp_email'),
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['email', 'code', 'created_at'], name='otp_unused_lookup'),
+        ),
+    ]
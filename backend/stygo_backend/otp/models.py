@@ -11,6 +11,15 @@ class OTP(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # update_or_create(email=...) when a code is sent.
+            models.Index(fields=['email'], name='otp_email'),
+            # Password reset confirmation only ever looks for unused codes.
+            models.Index(fields=['email', 'code', 'created_at'], condition=models.Q(is_used=False),
+                         name='otp_unused_lookup'),
+        ]
+
     def __str__(self):
         return f"{self.email} - {self.code}"
 
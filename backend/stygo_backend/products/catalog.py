@@ -0,0 +1,334 @@
+"""
+Bulk catalog import and export, used by the ``import_catalog`` and
+``export_catalog`` management commands.
+
+Rows are flat records, one product each, in CSV, JSON Lines or a JSON array:
+
+    seller_slug, name, price, original_price, size, category, description, images
+
+``images`` lists file names (``;``-separated in CSV, a list in JSON); the
+first one becomes the primary image. Imports run in batches: the batch's
+images are uploaded from a local directory by a thread pool, then its
+products and images are written with two ``bulk_create`` calls in one
+transaction, and a checkpoint records how many rows are done and which
+shops they touched so an interrupted run can resume where it stopped.
+The batch after the checkpoint may have been committed before the run
+died; on resume its rows are skipped if their shop already has a product
+of that name created since the checkpoint was written.
+
+``bulk_create`` skips ``save()`` and model signals, so this module sets
+``top_category`` and search vectors itself and leaves facet counts, shop
+product counts and timestamps, and the feed cache to ``refresh_catalog``.
+Imports are not held to SHOP_PRODUCT_LIMIT.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from sellers.models import SellerProfile
+from stygo_backend.caching import invalidate, shop_group
+from .facets import rebuild_facet_counts
+from .models import Product, ProductImage
+from .search import update_search_vectors
+from .variants import render_variants
+
+FIELDS = ['seller_slug', 'name', 'price', 'original_price', 'size', 'category', 'description', 'images']
+FORMATS = {'.csv': 'csv', '.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+CATEGORIES = dict(Product.SUBCATEGORY_CHOICES)
+
+
+class RowError(ValueError):
+    pass
+
+
+def format_for(path, fmt=None):
+    if fmt:
+        return fmt
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path!r}; pass --format")
+    return fmt
+
+
+# Reading and writing
+
+def read_rows(handle, fmt):
+    """
+    Yield row dicts from an open text file. CSV and JSON Lines are read one
+    line at a time; a JSON array has to be parsed whole.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(handle)
+    elif fmt == 'jsonl':
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from json.load(handle)
+
+
+def export_rows(queryset, chunk_size=500):
+    """Yield one row dict per product, images in upload order, primary first."""
+    products = queryset.select_related('seller').prefetch_related('images').order_by('id')
+    for product in products.iterator(chunk_size=chunk_size):
+        images = sorted(product.images.all(), key=lambda image: (not image.is_primary, image.created_at, image.pk))
+        names = [image.image.name for image in images if image.image]
+        if not names and product.image:
+            names = [product.image.name]
+        yield {
+            'seller_slug': product.seller.slug,
+            'name': product.name,
+            'price': product.price,
+            'original_price': product.original_price,
+            'size': product.size,
+            'category': product.category,
+            'description': product.description,
+            'images': names,
+        }
+
+
+def write_rows(rows, handle, fmt):
+    """Write rows to an open text file as they come; returns the row count."""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(handle, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, 'images': ';'.join(row['images'])})
+            count += 1
+        return count
+
+    if fmt == 'json':
+        handle.write('[')
+    for row in rows:
+        if fmt == 'json' and count:
+            handle.write(',')
+        handle.write(json.dumps(row, cls=JSONEncoder, ensure_ascii=False))
+        if fmt == 'jsonl':
+            handle.write('\n')
+        count += 1
+    if fmt == 'json':
+        handle.write(']\n')
+    return count
+
+
+# Checkpoints
+
+def read_checkpoint(path, source):
+    """
+    Progress on ``source`` according to the checkpoint file: ``(rows done,
+    seller ids touched, when it was written)``, or ``(0, [], None)``.
+    """
+    try:
+        with open(path) as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return 0, [], None
+    if state.get('source') != os.path.abspath(source):
+        return 0, [], None
+    written_at = state.get('written_at')
+    return state['rows'], state.get('sellers', []), written_at and datetime.fromisoformat(written_at)
+
+
+def write_checkpoint(path, source, rows, seller_ids=()):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as handle:
+        json.dump({
+            'source': os.path.abspath(source),
+            'rows': rows,
+            'sellers': sorted(seller_ids),
+            'written_at': timezone.now().isoformat(),
+        }, handle)
+    os.replace(tmp, path)
+
+
+# Importing
+
+def _decimal(value, field, required=False):
+    if value in (None, ''):
+        if required:
+            raise RowError(f"{field} is required")
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise RowError(f"{field} is not a number: {value!r}")
+
+
+def _image_names(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(';')
+    return [name.strip() for name in value if name and name.strip()]
+
+
+def clean_row(row, sellers):
+    """Validate one row against the resolved ``sellers`` (slug -> pk)."""
+    slug = (row.get('seller_slug') or '').strip()
+    if slug not in sellers:
+        raise RowError(f"unknown seller_slug {slug!r}")
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise RowError("name is required")
+    category = (row.get('category') or '').strip() or None
+    if category is not None and category not in CATEGORIES:
+        raise RowError(f"unknown category {category!r}")
+    return {
+        'seller_id': sellers[slug],
+        'name': name[:100],
+        'price': _decimal(row.get('price'), 'price', required=True),
+        'original_price': _decimal(row.get('original_price'), 'original_price'),
+        'size': (row.get('size') or '').strip()[:20],
+        'category': category,
+        'description': row.get('description') or None,
+        'images': _image_names(row.get('images')),
+    }
+
+
+def upload_image(name, images_dir):
+    """
+    Store one image and render its variants. Returns ``(stored_name, variants)``.
+
+    Without ``images_dir`` the name is taken to be a file already in storage
+    (as written by ``export_catalog``) and is attached as is.
+    """
+    if images_dir is None:
+        if not default_storage.exists(name):
+            raise FileNotFoundError(name)
+        return name, {}
+    with open(os.path.join(images_dir, name), 'rb') as handle:
+        stored = default_storage.save(f"products/images/{os.path.basename(name)}", File(handle))
+        handle.seek(0)
+        return stored, render_variants(handle, stored)
+
+
+class CatalogImporter:
+    """
+    Imports rows in batches. ``errors`` collects ``(row_number, message)``
+    for rows that were skipped and images that could not be attached.
+
+    When resuming, pass the checkpoint's ``touched_sellers`` and its time as
+    ``resumed_at``: the first batch then skips rows whose products that
+    run already committed.
+    """
+
+    def __init__(self, images_dir=None, workers=8, touched_sellers=(), resumed_at=None):
+        self.images_dir = images_dir
+        self.workers = workers
+        self.sellers = {}
+        self.touched_sellers = set(touched_sellers)
+        self.resumed_at = resumed_at
+        self.errors = []
+        self.imported = 0
+        self.images = 0
+
+    def _resolve_sellers(self, rows):
+        wanted = {(row.get('seller_slug') or '').strip() for _, row in rows} - set(self.sellers)
+        if wanted:
+            self.sellers.update(SellerProfile.objects.filter(slug__in=wanted).values_list('slug', 'pk'))
+
+    def _upload_all(self, names):
+        """Upload every distinct name once, in parallel; returns name -> result or exception."""
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+
+        def attempt(name):
+            try:
+                return upload_image(name, self.images_dir)
+            except Exception as exc:
+                return exc
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='catalog-import') as pool:
+            return dict(zip(names, pool.map(attempt, names)))
+
+    def _skip_committed(self, cleaned):
+        """Drop rows the interrupted run wrote after its last checkpoint."""
+        committed = set(Product.objects.filter(
+            seller_id__in={row['seller_id'] for _, row in cleaned},
+            name__in={row['name'] for _, row in cleaned},
+            created_at__gte=self.resumed_at,
+        ).values_list('seller_id', 'name'))
+        self.touched_sellers.update(seller_id for seller_id, _ in committed)
+        return [(number, row) for number, row in cleaned if (row['seller_id'], row['name']) not in committed]
+
+    def import_batch(self, rows):
+        """``rows`` is a list of ``(row_number, row_dict)``."""
+        self._resolve_sellers(rows)
+        cleaned = []
+        for number, row in rows:
+            try:
+                cleaned.append((number, clean_row(row, self.sellers)))
+            except RowError as exc:
+                self.errors.append((number, str(exc)))
+        if self.resumed_at is not None:
+            cleaned = self._skip_committed(cleaned)
+            self.resumed_at = None
+
+        uploads = self._upload_all(name for _, row in cleaned for name in row['images'])
+        products, image_sets = [], []
+        for number, row in cleaned:
+            stored = []
+            for name in row.pop('images'):
+                result = uploads[name]
+                if isinstance(result, Exception):
+                    self.errors.append((number, f"image {name!r}: {type(result).__name__}: {result}"))
+                else:
+                    stored.append(result)
+            primary_name, primary_variants = stored[0] if stored else ('', {})
+            products.append(Product(
+                **row,
+                top_category=Product.top_category_for(row['category']),
+                image=primary_name,
+                image_variants=primary_variants,
+            ))
+            image_sets.append(stored)
+
+        with transaction.atomic():
+            Product.objects.bulk_create(products)
+            now = timezone.now()
+            ProductImage.objects.bulk_create(
+                ProductImage(product=product, image=name, variants=variants,
+                             is_primary=index == 0, created_at=now)
+                for product, stored in zip(products, image_sets)
+                for index, (name, variants) in enumerate(stored)
+            )
+            update_search_vectors(Product.objects.filter(pk__in=[product.pk for product in products]))
+
+        self.imported += len(products)
+        self.images += sum(len(stored) for stored in image_sets)
+        self.touched_sellers.update(product.seller_id for product in products)
+
+    def finish_import(self):
+        """Bring facet counts, shop timestamps and cached feeds up to date."""
+        refresh_catalog(self.touched_sellers)
+
+
+def refresh_catalog(seller_ids):
+    """
+    Bring facet counts, shop product counts and timestamps, and cached feeds
+    up to date after ``bulk_create`` wrote products for ``seller_ids``.
+    """
+    rebuild_facet_counts()
+    if not seller_ids:
+        return
+    # bulk_create bypassed Product.save, so recount rather than reserve.
+    counts = Product.objects.filter(seller=OuterRef('pk')).order_by().values('seller').annotate(n=Count('id'))
+    SellerProfile.objects.filter(pk__in=seller_ids).update(
+        catalog_updated_at=timezone.now(),
+        product_count=Coalesce(Subquery(counts.values('n')), 0),
+    )
+    slugs = SellerProfile.objects.filter(pk__in=seller_ids).values_list('slug', flat=True)
+    invalidate('products', 'shops', *(shop_group(slug) for slug in slugs))
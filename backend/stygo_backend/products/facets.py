@@ -0,0 +1,105 @@
+"""
+Facets for the product filter endpoint.
+
+Every product contributes one value to each facet. Counts live in
+ProductFacetCount and are adjusted by +/-1 as products are written, so
+reading them is a single scan of a tiny table. Anything that bypasses
+model signals (bulk_create, queryset.update) should finish with
+``rebuild_facet_counts()``.
+"""
+from collections import Counter, namedtuple
+from decimal import Decimal
+
+from django.db.models import F
+
+FacetRow = namedtuple('FacetRow', ['top_category', 'category', 'size', 'price', 'original_price'])
+
+# (value, exclusive lower bound, inclusive upper bound)
+PRICE_BANDS = [
+    ('under_599', None, Decimal('599')),
+    ('600_999', Decimal('599'), Decimal('999')),
+    ('1000_1999', Decimal('999'), Decimal('1999')),
+    ('2000_plus', Decimal('1999'), None),
+]
+
+FACETS = ['top_category', 'category', 'size', 'seller_category', 'price_band', 'discount']
+
+
+def price_band_for(price):
+    price = Decimal(price)
+    for value, low, high in PRICE_BANDS:
+        if (low is None or price > low) and (high is None or price <= high):
+            return value
+    return None
+
+
+def normalize_size(size):
+    return (size or '').strip().upper()
+
+
+def facet_values(product, seller_category):
+    """The (facet, value) pairs ``product`` contributes to, as a set."""
+    original_price = product.original_price
+    discounted = original_price is not None and Decimal(original_price) > Decimal(product.price)
+    pairs = {
+        ('top_category', product.top_category),
+        ('category', product.category),
+        ('size', normalize_size(product.size)),
+        ('seller_category', seller_category),
+        ('price_band', price_band_for(product.price)),
+        ('discount', 'discounted' if discounted else 'full_price'),
+    }
+    return {(facet, value) for facet, value in pairs if value}
+
+
+def adjust_facet_counts(removed=(), added=(), step=1):
+    """Move counts from ``removed`` pairs to ``added`` pairs, ``step`` at a time."""
+    from .models import ProductFacetCount
+
+    changes = Counter()
+    for pair in removed:
+        changes[pair] -= step
+    for pair in added:
+        changes[pair] += step
+
+    for (facet, value), delta in changes.items():
+        if not delta:
+            continue
+        updated = ProductFacetCount.objects.filter(facet=facet, value=value).update(count=F('count') + delta)
+        if not updated:
+            _, created = ProductFacetCount.objects.get_or_create(
+                facet=facet, value=value, defaults={'count': delta},
+            )
+            if not created:
+                ProductFacetCount.objects.filter(facet=facet, value=value).update(count=F('count') + delta)
+
+
+def read_facet_counts():
+    from .models import ProductFacetCount
+
+    facets = {facet: {} for facet in FACETS}
+    for facet, value, count in ProductFacetCount.objects.filter(count__gt=0).values_list('facet', 'value', 'count'):
+        facets.setdefault(facet, {})[value] = count
+    return facets
+
+
+def rebuild_facet_counts(Product=None, ProductFacetCount=None):
+    """Recount every facet from scratch. Models are injectable for migrations."""
+    if Product is None:
+        from .models import Product, ProductFacetCount
+
+    totals = Counter()
+    rows = Product.objects.values_list(
+        'top_category', 'category', 'size', 'price', 'original_price', 'seller__category',
+    )
+    for top_category, category, size, price, original_price, seller_category in rows.iterator(chunk_size=2000):
+        product = FacetRow(top_category, category, size, price, original_price)
+        totals.update(facet_values(product, seller_category))
+
+    ProductFacetCount.objects.all().delete()
+    ProductFacetCount.objects.bulk_create(
+        ProductFacetCount(facet=facet, value=value, count=count)
+        for (facet, value), count in totals.items()
+    )
+    return totals
+
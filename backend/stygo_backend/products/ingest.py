@@ -0,0 +1,177 @@
+"""
+Background image ingestion for product uploads.
+
+The request only writes each upload to a local staging directory and
+records a pending ProductImage row. A small thread pool then pushes the
+staged files and their resized variants to the configured storage backend
+(Cloudinary or the local filesystem), retrying failures with backoff and
+recording the attempt count and last error on the row. Rows left pending
+by a restart are picked up again by ``manage.py process_staged_images``.
+"""
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from stygo_backend.caching import invalidate, shop_group
+from .variants import delete_stored, render_variants
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def staging_root():
+    return getattr(settings, 'IMAGE_STAGING_ROOT', os.path.join(settings.MEDIA_ROOT, 'staging'))
+
+
+def _executor_instance():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_INGEST_WORKERS', 4),
+                thread_name_prefix='image-ingest',
+            )
+        return _executor
+
+
+def stage_upload(uploaded_file):
+    """Copy an uploaded file to the staging area; return its staged path."""
+    root = staging_root()
+    os.makedirs(root, exist_ok=True)
+    _, ext = os.path.splitext(uploaded_file.name)
+    staged_name = f"{uuid.uuid4().hex}{ext.lower()}"
+    with open(os.path.join(root, staged_name), 'wb') as out:
+        for chunk in uploaded_file.chunks():
+            out.write(chunk)
+    return staged_name
+
+
+def original_name(image):
+    """The file name the seller uploaded, kept in the staged row for storage."""
+    return image.upload_name or image.staged_path
+
+
+def schedule_ingest(image_ids):
+    """
+    Queue staged images for upload once the current transaction commits.
+
+    With ``IMAGE_INGEST_ASYNC = False`` the uploads run inline instead,
+    which keeps tests and one-off scripts deterministic.
+    """
+    image_ids = list(image_ids)
+    if not image_ids:
+        return
+
+    def submit():
+        if not getattr(settings, 'IMAGE_INGEST_ASYNC', True):
+            for image_id in image_ids:
+                process_staged_image(image_id, retry=False)
+            return
+        executor = _executor_instance()
+        for image_id in image_ids:
+            executor.submit(_run_in_worker, image_id)
+
+    transaction.on_commit(submit)
+
+
+def _run_in_worker(image_id):
+    close_old_connections()
+    try:
+        process_staged_image(image_id)
+    except Exception:
+        logger.exception("Image ingest crashed for ProductImage %s", image_id)
+    finally:
+        close_old_connections()
+
+
+def claim(image_id):
+    """
+    Atomically move a pending row to processing. Returns the claim's
+    timestamp, or None when another worker (the pool, a retry timer or
+    ``process_staged_images``) already has the row or it is done.
+    """
+    from .models import ProductImage
+
+    claimed_at = timezone.now()
+    claimed = ProductImage.objects.filter(pk=image_id, status=ProductImage.STATUS_PENDING).update(
+        status=ProductImage.STATUS_PROCESSING, claimed_at=claimed_at,
+    )
+    return claimed_at if claimed else None
+
+
+def process_staged_image(image_id, retry=True):
+    """
+    Push one staged image to storage. Returns the row's resulting status,
+    or None if the row was not pending or was claimed by another worker.
+
+    Failures are recorded on the row; while attempts remain and ``retry``
+    is set, the upload is rescheduled with exponential backoff. Results are
+    only written while this worker still holds the claim.
+    """
+    from sellers.models import SellerProfile
+    from .models import Product, ProductImage
+
+    claimed_at = claim(image_id)
+    if claimed_at is None:
+        return None
+    image = ProductImage.objects.select_related('product__seller').get(pk=image_id)
+    ours = ProductImage.objects.filter(pk=image_id, status=ProductImage.STATUS_PROCESSING, claimed_at=claimed_at)
+
+    staged = os.path.join(staging_root(), image.staged_path)
+    max_attempts = getattr(settings, 'IMAGE_INGEST_MAX_ATTEMPTS', 3)
+    try:
+        with open(staged, 'rb') as handle:
+            image.image.save(original_name(image), File(handle), save=False)
+            handle.seek(0)
+            image.variants = render_variants(handle, image.image.name)
+    except Exception as exc:
+        # Each attempt stores a fresh copy, so drop this one's original.
+        if image.image.name:
+            delete_stored([image.image.name])
+        attempts = image.attempts + 1
+        last_error = f"{type(exc).__name__}: {exc}"[:1000]
+        out_of_attempts = attempts >= max_attempts or not os.path.exists(staged)
+        status = ProductImage.STATUS_FAILED if out_of_attempts else ProductImage.STATUS_PENDING
+        if not ours.update(attempts=attempts, last_error=last_error, status=status, claimed_at=None):
+            logger.warning("Lost the claim on ProductImage %s while it failed: %s", image_id, last_error)
+            return None
+        logger.warning("Image ingest attempt %s failed for ProductImage %s: %s", attempts, image_id, last_error)
+        if retry and status == ProductImage.STATUS_PENDING:
+            delay = 2 ** attempts
+            timer = threading.Timer(delay, lambda: _executor_instance().submit(_run_in_worker, image_id))
+            timer.daemon = True
+            timer.start()
+        return status
+
+    with transaction.atomic():
+        stored = ours.update(
+            image=image.image.name, variants=image.variants, status=ProductImage.STATUS_READY,
+            staged_path='', last_error='', attempts=image.attempts + 1, claimed_at=None,
+        )
+        if stored:
+            now = timezone.now()
+            changes = {'updated_at': now}
+            # Still primary: a later upload may have replaced it meanwhile.
+            if ProductImage.objects.filter(pk=image_id, is_primary=True).exists():
+                changes.update(image=image.image.name, image_variants=image.variants)
+            Product.objects.filter(pk=image.product_id).update(**changes)
+            SellerProfile.objects.filter(pk=image.product.seller_id).update(catalog_updated_at=now)
+            invalidate('products', shop_group(image.product.seller.slug))
+    if not stored:
+        logger.warning("Lost the claim on ProductImage %s after uploading it", image_id)
+        delete_stored([image.image.name, *(name for sizes in image.variants.values() for name in sizes.values())])
+        return None
+    try:
+        os.remove(staged)
+    except OSError:
+        pass
+    return ProductImage.STATUS_READY
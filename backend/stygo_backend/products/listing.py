@@ -0,0 +1,203 @@
+"""
+Read-only serialization fast path for product list responses.
+
+``serialize_listing`` builds exactly what ``ProductSerializer`` (with
+``thumbnails=True``) returns for a list, but from ``.values()`` rows: no
+model instances, no serializer field machinery per row, and one absolute
+media URL prefix per request instead of a ``build_absolute_uri`` call per
+image. ``?fields=`` / ``?expand=`` (see stygo_backend.fieldsets) narrow both
+the JSON and the columns loaded, and skip the images query when neither
+``images`` nor ``image_status`` is wanted.
+
+The product detail view reads through here too, with thumbnails off;
+writes keep using ProductSerializer, which stays the reference for the
+response shape (see ListingSerializationTests).
+"""
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+from stygo_backend.fieldsets import requested_fields
+
+from .models import Product, ProductImage
+from .variants import smallest_variant, srcset
+
+# Default response shape, in ProductSerializer order.
+PRODUCT_FIELDS = (
+    'id', 'name', 'price', 'original_price', 'size', 'category', 'description',
+    'image', 'image_url', 'srcset', 'image_status', 'created_at', 'images',
+)
+# Only rendered when asked for with ?expand=.
+EXPANDABLE = ('seller',)
+SELLER_FIELDS = ('shop_name', 'slug', 'location', 'phone_number', 'category', 'logo', 'created_at', 'product_count')
+
+# Columns each field reads; id and created_at are always loaded for
+# grouping images and for keyset cursors.
+FIELD_COLUMNS = {
+    'image': ('image',),
+    'image_url': ('image', 'image_variants'),
+    'srcset': ('image_variants',),
+    'image_status': (),
+    'images': (),
+    'seller': tuple(f'seller__{name}' for name in SELLER_FIELDS),
+}
+IMAGE_COLUMNS = ('id', 'product_id', 'image', 'variants', 'is_primary', 'status')
+
+# Shared DRF fields so numbers and dates are formatted exactly as before.
+_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+_datetime = serializers.DateTimeField()
+
+
+def media_url_builder(request):
+    """
+    ``name -> absolute URL`` for files in the default storage.
+
+    For local storage the absolute prefix is computed once; other backends
+    (Cloudinary) build per-file URLs themselves, so only the host is reused.
+    """
+    host = request.build_absolute_uri('/')[:-1]
+    if isinstance(default_storage, FileSystemStorage):
+        prefix = request.build_absolute_uri(default_storage.base_url)
+        return lambda name: prefix + filepath_to_uri(name).lstrip('/')
+
+    def build(name):
+        url = default_storage.url(name)
+        return url if '://' in url else host + url
+    return build
+
+
+def product_fields(request):
+    """The product fields asked for with ``?fields=`` / ``?expand=``."""
+    return requested_fields(request, PRODUCT_FIELDS, EXPANDABLE)
+
+
+def listing_rows(queryset, fields=PRODUCT_FIELDS, extra_columns=()):
+    """Only the columns ``fields`` need; ordering and slicing still apply."""
+    columns = {'id', 'created_at', *extra_columns}
+    for name in fields:
+        columns.update(FIELD_COLUMNS.get(name, (name,)))
+    return queryset.values(*sorted(columns))
+
+
+def _image_status(images):
+    statuses = {image['status'] for image in images}
+    if ProductImage.STATUS_FAILED in statuses:
+        return ProductImage.STATUS_FAILED
+    if statuses.intersection(ProductImage.IN_FLIGHT):
+        return ProductImage.STATUS_PENDING
+    return ProductImage.STATUS_READY
+
+
+def _load_images(product_ids, fields):
+    images_by_product = {pk: [] for pk in product_ids}
+    if 'images' in fields:
+        columns = IMAGE_COLUMNS
+    elif 'image_status' in fields:
+        columns = ('product_id', 'status')
+    else:
+        return images_by_product
+    if images_by_product:
+        images = ProductImage.objects.filter(product_id__in=images_by_product).order_by('id')
+        for image in images.values(*columns):
+            images_by_product[image['product_id']].append(image)
+    return images_by_product
+
+
+def serialize_listing(rows, request, thumbnails=True, fields=PRODUCT_FIELDS):
+    """
+    Serialize ``listing_rows`` output, limited to ``fields``. Costs one
+    query for the images when ``images`` or ``image_status`` is wanted.
+    """
+    rows = list(rows)
+    url = media_url_builder(request)
+
+    def display_url(name, variants):
+        if thumbnails:
+            thumbnail = smallest_variant(variants)
+            if thumbnail:
+                return url(thumbnail)
+        return url(name) if name else None
+
+    def price(value):
+        return None if value is None else _price.to_representation(value)
+
+    def image(image):
+        return {
+            'id': image['id'],
+            'image': url(image['image']) if image['image'] else None,
+            'image_url': display_url(image['image'], image['variants']),
+            'srcset': srcset(image['variants'], url),
+            'is_primary': image['is_primary'],
+            'status': image['status'],
+        }
+
+    def seller(row):
+        logo = row['seller__logo']
+        return {
+            'shop_name': row['seller__shop_name'],
+            'slug': row['seller__slug'],
+            'location': row['seller__location'],
+            'phone_number': row['seller__phone_number'],
+            'category': row['seller__category'],
+            'logo': url(logo) if logo else None,
+            'created_at': _datetime.to_representation(row['seller__created_at']),
+            'product_count': row['seller__product_count'],
+        }
+
+    render = {
+        'price': lambda row, images: price(row['price']),
+        'original_price': lambda row, images: price(row['original_price']),
+        'image': lambda row, images: url(row['image']) if row['image'] else None,
+        'image_url': lambda row, images: display_url(row['image'], row['image_variants']),
+        'srcset': lambda row, images: srcset(row['image_variants'], url),
+        'image_status': lambda row, images: _image_status(images),
+        'created_at': lambda row, images: _datetime.to_representation(row['created_at']),
+        'images': lambda row, images: [image(item) for item in images],
+        'seller': lambda row, images: seller(row),
+    }
+    # Plain columns are copied as they are.
+    renderers = [(name, render.get(name)) for name in fields]
+
+    images_by_product = _load_images([row['id'] for row in rows], fields)
+    data = []
+    for row in rows:
+        images = images_by_product[row['id']]
+        data.append({
+            name: row[name] if build is None else build(row, images)
+            for name, build in renderers
+        })
+    return data
+
+
+def serialize_products(queryset, request, thumbnails=True, fields=PRODUCT_FIELDS):
+    """Shortcut for a queryset that is not paginated by cursor."""
+    rows = listing_rows(queryset, fields)
+    return serialize_listing(rows, request, thumbnails=thumbnails, fields=fields)
+
+
+# Card-sized shape for product previews embedded in other resources.
+PREVIEW_FIELDS = ('id', 'name', 'price', 'original_price', 'image_url', 'srcset', 'created_at')
+
+
+def latest_products_by_seller(seller_ids, request, per_seller, fields=PREVIEW_FIELDS):
+    """
+    ``{seller_id: [product, ...]}`` with each seller's newest ``per_seller``
+    products, from one ROW_NUMBER() OVER (PARTITION BY seller_id) query
+    (plus the images query when ``fields`` need it) however many sellers.
+    """
+    by_seller = {seller_id: [] for seller_id in seller_ids}
+    if not by_seller or per_seller < 1:
+        return by_seller
+    ranked = Product.objects.filter(seller_id__in=by_seller).annotate(
+        seller_rank=Window(
+            RowNumber(),
+            partition_by=F('seller_id'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ),
+    ).filter(seller_rank__lte=per_seller).order_by('seller_id', 'seller_rank')
+    rows = list(listing_rows(ranked, fields, extra_columns=('seller_id',)))
+    for row, product in zip(rows, serialize_listing(rows, request, fields=fields)):
+        by_seller[row['seller_id']].append(product)
+    return by_seller
@@ -0,0 +1,77 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from products.listing import serialize_products
+from products.models import Product, ProductImage
+from products.serializers import ProductSerializer
+from sellers.models import SellerProfile
+
+VARIANTS = {
+    'jpeg': {str(w): f"products/variants/bench_{w}.jpg" for w in (320, 640, 1280)},
+    'webp': {str(w): f"products/variants/bench_{w}.webp" for w in (320, 640, 1280)},
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare ProductSerializer with the products.listing fast path on synthetic catalogs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+        parser.add_argument('--images', type=int, default=2, help='Images per product')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of N runs')
+        parser.add_argument('--host', default='api.stygo.in', help='Host for absolute URLs (must be allowed)')
+
+    def seed(self, count, images):
+        user = User.objects.create_user(username=f"bench-{time.monotonic_ns()}")
+        seller = SellerProfile.objects.create(user=user, shop_name='Benchmark Shop')
+        products = Product.objects.bulk_create(
+            Product(seller=seller, name=f"Bench {n}", price=199 + n % 900, size='M',
+                    category='men_shirts', top_category='men', description='Cotton',
+                    image=f"products/bench_{n}.jpg", image_variants=VARIANTS)
+            for n in range(count)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=f"products/images/bench_{product.pk}_{i}.jpg",
+                         is_primary=i == 0, variants=VARIANTS)
+            for product in products
+            for i in range(images)
+        )
+        return Product.objects.filter(seller=seller).order_by('-created_at', '-id')
+
+    def measure(self, build, repeat):
+        best, queries = None, 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                build()
+                elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+            queries = len(captured)
+        return best, queries
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().get('/api/products/all/', HTTP_HOST=options['host'])
+        self.stdout.write(f"{'products':>9} {'serializer':>12} {'fast path':>12} {'speedup':>8} {'queries':>8}")
+        for size in options['sizes']:
+            # Seed inside a transaction that is rolled back afterwards.
+            with transaction.atomic():
+                products = self.seed(size, options['images'])
+                slow, slow_queries = self.measure(
+                    lambda: ProductSerializer(
+                        products.for_listing(), many=True, context={'request': request, 'thumbnails': True},
+                    ).data,
+                    options['repeat'],
+                )
+                fast, fast_queries = self.measure(
+                    lambda: serialize_products(products, request), options['repeat'],
+                )
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"{size:>9} {slow * 1000:>10.1f}ms {fast * 1000:>10.1f}ms {slow / fast:>7.1f}x "
+                f"{slow_queries:>3} / {fast_queries}"
+            )
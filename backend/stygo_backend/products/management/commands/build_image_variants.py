@@ -0,0 +1,52 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from products.models import Product, ProductImage
+from products.variants import render_variants
+
+
+class Command(BaseCommand):
+    help = 'Render resized JPEG/WebP variants for stored product images that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many images')
+
+    def render(self, name):
+        with default_storage.open(name, 'rb') as handle:
+            return render_variants(handle, name)
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        images = (
+            ProductImage.objects.filter(status=ProductImage.STATUS_READY, variants={})
+            .exclude(image='').order_by('id')
+        )
+        done = 0
+        rendered = {}
+        for image in images[:limit] if limit else images:
+            try:
+                image.variants = self.render(image.image.name)
+            except Exception as exc:
+                self.stderr.write(f"ProductImage {image.pk}: {exc}")
+                continue
+            image.save(update_fields=['variants'])
+            rendered[image.image.name] = image.variants
+            done += 1
+        self.stdout.write(f"Rendered variants for {done} product images")
+
+        products = Product.objects.filter(image_variants={}).exclude(image='').order_by('id')
+        done = 0
+        for product in products[:limit] if limit else products:
+            variants = rendered.get(product.image.name)
+            if variants is None:
+                variants = (
+                    ProductImage.objects.filter(image=product.image.name)
+                    .exclude(variants={}).values_list('variants', flat=True).first()
+                )
+            try:
+                product.image_variants = variants or self.render(product.image.name)
+            except Exception as exc:
+                self.stderr.write(f"Product {product.pk}: {exc}")
+                continue
+            Product.objects.filter(pk=product.pk).update(image_variants=product.image_variants)
+            done += 1
+        self.stdout.write(f"Set variants for {done} products")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from products.similarity import build_similar_products
+
+
+class Command(BaseCommand):
+    help = "Recompute 'similar products' for products changed since the last build (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every product')
+
+    def handle(self, *args, **options):
+        stats = build_similar_products(full=options['full'])
+        self.stdout.write(
+            f"{stats['changed']} of {stats['products']} products changed; "
+            f"rewrote neighbours for {stats['rewritten']}"
+        )
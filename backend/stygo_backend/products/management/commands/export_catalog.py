@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from products.catalog import export_rows, format_for, write_rows
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Export products as CSV, JSON Lines or JSON in the import_catalog row format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or '-' for stdout")
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'],
+                            help='Defaults to the file extension (jsonl for stdout)')
+        parser.add_argument('--seller', action='append', dest='sellers', metavar='SLUG',
+                            help='Only export these shops (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = options['format'] or ('jsonl' if path == '-' else format_for(path))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        products = Product.objects.all()
+        if options['sellers']:
+            products = products.filter(seller__slug__in=options['sellers'])
+        rows = export_rows(products, chunk_size=options['chunk_size'])
+
+        if path == '-':
+            count = write_rows(rows, sys.stdout, fmt)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as handle:
+                count = write_rows(rows, handle, fmt)
+            self.stdout.write(f"Exported {count} products to {path}")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from stygo_backend.caching import cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counts for the public response cache'
+
+    def handle(self, *args, **kwargs):
+        for name, value in cache_stats().items():
+            self.stdout.write(f"{name}: {value}")
@@ -0,0 +1,69 @@
+import itertools
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from products.catalog import CatalogImporter, format_for, read_checkpoint, read_rows, write_checkpoint
+
+
+class Command(BaseCommand):
+    help = 'Bulk import products for many sellers from CSV, JSON Lines or JSON (see products/catalog.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Catalog file to import')
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'],
+                            help='Defaults to the file extension')
+        parser.add_argument('--images-dir',
+                            help='Directory holding the image files named in the rows; '
+                                 'without it, names must already exist in storage')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=8, help='Parallel image uploads')
+        parser.add_argument('--checkpoint', help='Progress file (default: <path>.checkpoint)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore an existing checkpoint and import from the first row')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        images_dir = options['images_dir']
+        if images_dir and not os.path.isdir(images_dir):
+            raise CommandError(f"Not a directory: {images_dir}")
+        try:
+            fmt = format_for(path, options['format'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        checkpoint = options['checkpoint'] or path + '.checkpoint'
+        done, touched, written_at = (0, [], None) if options['restart'] else read_checkpoint(checkpoint, path)
+        if done:
+            self.stdout.write(f"Resuming after row {done}")
+
+        importer = CatalogImporter(
+            images_dir=images_dir, workers=options['workers'], touched_sellers=touched, resumed_at=written_at,
+        )
+        started = time.monotonic()
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            rows = enumerate(read_rows(handle, fmt), start=1)
+            rows = itertools.islice(rows, done, None)
+            while True:
+                batch = list(itertools.islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                reported = len(importer.errors)
+                importer.import_batch(batch)
+                for number, message in importer.errors[reported:]:
+                    self.stderr.write(f"Row {number}: {message}")
+                done = batch[-1][0]
+                write_checkpoint(checkpoint, path, done, importer.touched_sellers)
+                rate = importer.imported / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f"Row {done}: {importer.imported} products, {importer.images} images, "
+                    f"{len(importer.errors)} errors ({rate:.0f} products/s)"
+                )
+
+        importer.finish_import()
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(
+            f"Imported {importer.imported} products and {importer.images} images "
+            f"in {time.monotonic() - started:.1f}s"
+        )
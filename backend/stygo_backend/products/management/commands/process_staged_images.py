@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from products.ingest import process_staged_image
+from products.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = 'Upload product images still pending in the staging area (e.g. after a restart)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Also retry images that ran out of attempts')
+
+    def handle(self, *args, **options):
+        # Claims older than the timeout belong to a worker that died mid-upload.
+        stale = timezone.now() - timedelta(seconds=settings.IMAGE_INGEST_CLAIM_TIMEOUT)
+        reclaimed = ProductImage.objects.filter(
+            status=ProductImage.STATUS_PROCESSING, claimed_at__lt=stale,
+        ).update(status=ProductImage.STATUS_PENDING, claimed_at=None)
+        if reclaimed:
+            self.stdout.write(f"Reclaimed {reclaimed} abandoned uploads")
+
+        if options['retry_failed']:
+            ProductImage.objects.filter(status=ProductImage.STATUS_FAILED).exclude(staged_path='').update(
+                status=ProductImage.STATUS_PENDING, attempts=0,
+            )
+
+        pending = ProductImage.objects.filter(status=ProductImage.STATUS_PENDING).values_list('pk', flat=True)
+        results = {}
+        for image_id in list(pending):
+            status = process_staged_image(image_id, retry=False)
+            if status is None:
+                # Another worker claimed it first.
+                continue
+            results[status] = results.get(status, 0) + 1
+            self.stdout.write(f"ProductImage {image_id}: {status}")
+        self.stdout.write(f"Done: {results}")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount product facets from scratch (run after bulk imports)'
+
+    def handle(self, *args, **kwargs):
+        totals = rebuild_facet_counts()
+        self.stdout.write(f"Rebuilt {len(totals)} facet values")
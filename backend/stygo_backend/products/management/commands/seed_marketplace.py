@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from products.catalog import refresh_catalog
+from products.seeding import MarketplaceSeeder
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic marketplace of shops, products and images for load tests (see products/seeding.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sellers', type=int, required=True, help='Shops to create')
+        parser.add_argument('--products-per-seller', type=int, required=True)
+        parser.add_argument('--images-per-product', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=2000, help='Products per bulk_create')
+        parser.add_argument('--days', type=int, default=180, help='Spread created_at over this many days')
+        parser.add_argument('--prefix', default='seed', help='Username prefix for the generated sellers')
+        parser.add_argument('--password', default='stygo-seed', help='Password for every generated seller')
+        parser.add_argument('--seed', type=int, help='Random seed, for repeatable catalogs')
+
+    def handle(self, *args, **options):
+        if options['sellers'] < 1 or options['products_per_seller'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--sellers and --batch-size must be positive, --products-per-seller not negative')
+        seeder = MarketplaceSeeder(
+            prefix=options['prefix'], password=options['password'], seed=options['seed'],
+            days=options['days'], images_per_product=options['images_per_product'],
+        )
+        started = time.monotonic()
+        sellers = seeder.create_sellers(options['sellers'])
+        self.stdout.write(f"Created {len(sellers)} shops ({sellers[0].user.username} ...)")
+
+        total = len(sellers) * options['products_per_seller']
+        for _ in seeder.create_products(sellers, options['products_per_seller'], options['batch_size']):
+            rate = seeder.products / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f"{seeder.products}/{total} products, {seeder.images} images ({rate:.0f} products/s)")
+
+        refresh_catalog({seller.pk for seller in sellers})
+        self.stdout.write(
+            f"Seeded {len(sellers)} shops, {seeder.products} products and {seeder.images} images "
+            f"in {time.monotonic() - started:.1f}s; sellers log in with password {options['password']!r}"
+        )
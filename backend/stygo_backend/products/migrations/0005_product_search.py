@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:59
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# GIN indexes are PostgreSQL-only, so they are created here rather than in
+# Product.Meta where SQLite (tests, local dev) would also try to build them.
+SEARCH_INDEXES = [
+    ('products_product_search_vector_gin',
+     'products_product USING gin (search_vector)'),
+    ('products_product_name_trgm',
+     'products_product USING gin (name gin_trgm_ops)'),
+    ('sellers_sellerprofile_shop_name_trgm',
+     'sellers_sellerprofile USING gin (shop_name gin_trgm_ops)'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, target in SEARCH_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
+    from products.search import product_search_vector
+    Product = apps.get_model('products', 'Product')
+    Product.objects.update(search_vector=product_search_vector())
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_productimage'),
+        ('sellers', '0003_alter_sellerprofile_slug'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
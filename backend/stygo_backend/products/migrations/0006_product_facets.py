@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+TOP_CATEGORIES = ['men', 'women', 'kids', 'accessories', 'beauty']
+
+
+def backfill_facets(apps, schema_editor):
+    from products.facets import rebuild_facet_counts
+    Product = apps.get_model('products', 'Product')
+    ProductFacetCount = apps.get_model('products', 'ProductFacetCount')
+    for top in TOP_CATEGORIES:
+        Product.objects.filter(category__startswith=f'{top}_').update(top_category=top)
+    rebuild_facet_counts(Product, ProductFacetCount)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_search'),
+        ('sellers', '0003_alter_sellerprofile_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=30)),
+                ('value', models.CharField(max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='top_category',
+            field=models.CharField(blank=True, choices=[('men', 'Men'), ('women', 'Women'), ('kids', 'Kids'), ('accessories', 'Accessories'), ('beauty', 'Beauty')], editable=False, max_length=20, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['top_category', 'category', '-created_at'], name='product_topcat_cat_created'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['top_category', 'price'], name='product_topcat_price'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'price'], name='product_cat_price'),
+        ),
+        migrations.AddConstraint(
+            model_name='productfacetcount',
+            constraint=models.UniqueConstraint(fields=('facet', 'value'), name='unique_facet_value'),
+        ),
+        migrations.RunPython(backfill_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_catalog_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='staged_path',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='upload_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(blank=True, upload_to='products/images/'),
+        ),
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['status'], name='productimage_pending'),
+        ),
+    ]
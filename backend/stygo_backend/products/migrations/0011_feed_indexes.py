@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_similar_products'),
+        ('sellers', '0005_product_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='product_created'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['seller', '-created_at', '-id'], name='product_seller_created'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('price__lte', 599)), fields=['-created_at', '-id'], name='product_under_599_created'),
+        ),
+        # Only drop the plain seller index once the composite one covers it.
+        migrations.AlterField(
+            model_name='product',
+            name='seller',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='products', to='sellers.sellerprofile'),
+        ),
+    ]
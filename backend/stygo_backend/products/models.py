@@ -1,7 +1,27 @@
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from sellers.models import SellerProfile
+from stygo_backend.caching import invalidate, shop_group
 from django.utils import timezone
 
+
+class ProductLimitReached(Exception):
+    """The shop already has SHOP_PRODUCT_LIMIT products."""
+
+
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Load everything ProductSerializer touches up front.
+
+        Serializing any number of products then costs exactly two queries:
+        one for the products (joined to their seller) and one for all of
+        their images.
+        """
+        return self.select_related('seller').prefetch_related('images')
+
+
 class Product(models.Model):
     # Subcategory choices based on main categories
     SUBCATEGORY_CHOICES = [
@@ -49,32 +69,184 @@ class Product(models.Model):
         ('beauty_tools', 'Beauty Tools'),
     ]
 
-    seller = models.ForeignKey(SellerProfile, on_delete=models.CASCADE, related_name="products")
+    # Indexed by product_seller_created below, which leads with seller.
+    seller = models.ForeignKey(SellerProfile, on_delete=models.CASCADE, related_name="products", db_index=False)
     name = models.CharField(max_length=100)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     original_price = models.DecimalField( max_digits=10, decimal_places=2, help_text="Original price before discount", null=True,
     blank=True, )
     size = models.CharField(max_length=20)
     category = models.CharField(max_length=50, choices=SUBCATEGORY_CHOICES, help_text="Product subcategory", null=True, blank=True)
+    # Derived from the `category` prefix on save so it can be filtered by index.
+    top_category = models.CharField(max_length=20, choices=SellerProfile.CATEGORY_CHOICES, null=True, blank=True, editable=False)
     image = models.ImageField(upload_to="products/")
+    # Resized JPEG/WebP renditions of `image`, see products.variants.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     description = models.TextField(blank=True, null=True) 
+    # Maintained by products.signals; GIN-indexed on PostgreSQL only.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['top_category', 'category', '-created_at'], name='product_topcat_cat_created'),
+            models.Index(fields=['top_category', 'price'], name='product_topcat_price'),
+            models.Index(fields=['category', 'price'], name='product_cat_price'),
+            # Keyset feeds page by (created_at, id), newest first.
+            models.Index(fields=['-created_at', '-id'], name='product_created'),
+            models.Index(fields=['seller', '-created_at', '-id'], name='product_seller_created'),
+            # products_under_599 filters on the same constant.
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(price__lte=599),
+                         name='product_under_599_created'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def image_status(self):
+        """'failed' if any image failed, 'pending' while any is uploading, else 'ready'."""
+        statuses = {image.status for image in self.images.all()}
+        if ProductImage.STATUS_FAILED in statuses:
+            return ProductImage.STATUS_FAILED
+        if statuses.intersection(ProductImage.IN_FLIGHT):
+            return ProductImage.STATUS_PENDING
+        return ProductImage.STATUS_READY
+
+    @staticmethod
+    def top_category_for(category):
+        """'women_tops' -> 'women'; subcategories are prefixed by their top level."""
+        if not category:
+            return None
+        top = category.split('_', 1)[0]
+        return top if top in dict(SellerProfile.CATEGORY_CHOICES) else None
+
+    def save(self, *args, **kwargs):
+        self.top_category = self.top_category_for(self.category)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'category' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'top_category'}
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # New products take a slot in SellerProfile.product_count; the
+        # count goes back down in products.signals when one is deleted.
+        with transaction.atomic():
+            if not SellerProfile.reserve_product_slot(self.seller_id):
+                raise ProductLimitReached(getattr(settings, 'SHOP_PRODUCT_LIMIT', 10))
+            super().save(*args, **kwargs)
+
+
+class ProductImageQuerySet(models.QuerySet):
+    def attach(self, product, images, has_primary=None, touch=True):
+        """
+        Add unsaved ProductImage ``images`` to ``product`` with one INSERT.
+
+        The first image becomes primary unless the product already has one;
+        pass ``has_primary`` when the caller knows (a product created in this
+        transaction has none) to skip that lookup. If the new primary is
+        already stored, Product.image is set by the same UPDATE that bumps
+        ``updated_at``. bulk_create sends no post_save, so unless the caller
+        has just saved the product itself (``touch=False``), the shop's
+        catalog timestamp and cached feeds are refreshed here, once.
+        """
+        images = list(images)
+        if not images:
+            return images
+        if has_primary is None:
+            has_primary = self.filter(product=product, is_primary=True).exists()
+        for image in images:
+            image.product = product
+        primary = None if has_primary else images[0]
+        if primary is not None:
+            primary.is_primary = True
+
+        with transaction.atomic():
+            self.bulk_create(images)
+            changes = {'updated_at': timezone.now()} if touch else {}
+            if primary is not None and primary.image and primary.status == ProductImage.STATUS_READY:
+                changes.update(image=primary.image.name, image_variants=primary.variants)
+            if changes:
+                Product.objects.filter(pk=product.pk).update(**changes)
+            if touch:
+                SellerProfile.objects.filter(pk=product.seller_id).update(catalog_updated_at=changes['updated_at'])
+                invalidate('products', shop_group(product.seller.slug))
+        return images
+
 
 class ProductImage(models.Model):
+    STATUS_PENDING = 'pending'
+    # Claimed by an ingest worker; Product.image_status reports it as pending.
+    STATUS_PROCESSING = 'processing'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    IN_FLIGHT = (STATUS_PENDING, STATUS_PROCESSING)
+
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to="products/images/")
+    # Empty until products.ingest has pushed the staged upload to storage.
+    image = models.ImageField(upload_to="products/images/", blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     is_primary = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_READY)
+    staged_path = models.CharField(max_length=255, blank=True)
+    upload_name = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    variants = models.JSONField(default=dict, blank=True)
+    # When a worker claimed the row; also identifies that worker's claim.
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], condition=models.Q(status__in=['pending', 'processing']),
+                         name='productimage_in_flight'),
+        ]
+
+    objects = ProductImageQuerySet.as_manager()
 
     def __str__(self):
         return f"Image for {self.product.name}"
-    
-    def save(self, *args, **kwargs):
-        # If this is the first image for the product, set it as primary
-        if not self.pk and not self.product.images.exists():
-            self.is_primary = True
-        super().save(*args, **kwargs)
+
+
+class ProductFacetCount(models.Model):
+    """
+    Catalog-wide product count per facet value, kept current by
+    products.signals so the filter UI never GROUPs BY over every product.
+    """
+    facet = models.CharField(max_length=30)
+    value = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['facet', 'value'], name='unique_facet_value'),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+
+class SimilarProduct(models.Model):
+    """
+    A product's nearest neighbours, best first, written by
+    products.similarity (``manage.py build_similar_products``).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar')
+    neighbour = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar_to')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_similar_rank'),
+        ]
@@ -0,0 +1,132 @@
+"""
+Server-side product search.
+
+On PostgreSQL matches come from the GIN-indexed ``Product.search_vector``
+(name, category, description and the seller's shop name) and from pg_trgm
+similarity on product and shop names, which is what makes "shrit" still
+find shirts. Other databases (SQLite in tests and local development) use
+an in-Python engine that applies the same field weights and typo tolerance.
+"""
+import re
+from difflib import SequenceMatcher
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+
+from sellers.models import SellerProfile
+from .models import Product
+
+SEARCH_CONFIG = 'simple'
+TRIGRAM_THRESHOLD = 0.3
+
+# Field weights, highest first: (field, tsvector weight, fallback multiplier)
+SEARCH_FIELDS = [
+    ('name', 'A', 1.0),
+    ('seller__shop_name', 'B', 0.4),
+    ('category', 'B', 0.4),
+    ('description', 'C', 0.2),
+]
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def search_enabled_for(conn=connection):
+    return conn.vendor == 'postgresql'
+
+
+def product_search_vector():
+    shop_name = Subquery(
+        SellerProfile.objects.filter(pk=OuterRef('seller_id')).values('shop_name')[:1]
+    )
+    vector = None
+    for field, weight, _ in SEARCH_FIELDS:
+        source = shop_name if field == 'seller__shop_name' else field
+        part = SearchVector(source, weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vectors(queryset):
+    """Recompute ``search_vector`` for ``queryset``; a no-op off PostgreSQL."""
+    if not search_enabled_for():
+        return 0
+    return queryset.update(search_vector=product_search_vector())
+
+
+def search_products(query, queryset=None):
+    """
+    Return ``queryset`` filtered to products matching ``query``, annotated
+    with ``rank`` and ordered best match first.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    query = query.strip()
+    if search_enabled_for():
+        return _postgres_search(queryset, query)
+    return _fallback_search(queryset, query)
+
+
+def _postgres_search(queryset, query):
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    return (
+        queryset
+        .annotate(
+            rank=(
+                SearchRank(F('search_vector'), search_query)
+                + TrigramSimilarity('name', query)
+                + TrigramSimilarity('seller__shop_name', query) * 0.4
+            ),
+        )
+        .filter(
+            Q(search_vector=search_query)
+            | Q(name__trigram_similar=query)
+            | Q(seller__shop_name__trigram_similar=query)
+        )
+        .order_by('-rank', '-id')
+    )
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall((text or '').lower().replace('_', ' '))
+
+
+def _term_score(term, tokens):
+    """1.0 for an exact or prefix hit, the similarity ratio for a near miss."""
+    best = 0.0
+    for token in tokens:
+        if token == term or token.startswith(term):
+            return 1.0
+        ratio = SequenceMatcher(None, term, token).ratio()
+        if ratio > best:
+            best = ratio
+    return best if best >= 1 - TRIGRAM_THRESHOLD else 0.0
+
+
+def _fallback_search(queryset, query):
+    terms = _tokens(query)
+    if not terms:
+        return queryset.none()
+
+    fields = [field for field, _, _ in SEARCH_FIELDS]
+    scores = {}
+    for row in queryset.values_list('id', *fields).iterator(chunk_size=2000):
+        score = 0.0
+        for (_, _, multiplier), text in zip(SEARCH_FIELDS, row[1:]):
+            tokens = _tokens(text)
+            score += multiplier * sum(_term_score(term, tokens) for term in terms)
+        if score:
+            scores[row[0]] = score
+
+    if not scores:
+        return queryset.none()
+    rank = Case(
+        *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+        output_field=FloatField(),
+    )
+    return queryset.filter(pk__in=scores).annotate(rank=rank).order_by('-rank', '-id')
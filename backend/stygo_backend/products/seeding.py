@@ -0,0 +1,203 @@
+"""
+Synthetic marketplaces for load tests, used by the ``seed_marketplace``
+management command.
+
+Shops get a top-level category (women's and men's fashion dominate, as on
+the live site) and most of their products fall in that category's
+subcategories, weighted so a few subcategories are common and the rest
+form a long tail; the remainder are spread over all of
+``SUBCATEGORY_CHOICES``. Prices follow a log-normal curve per category,
+about a third of products are discounted, and ``created_at`` is spread
+over the last ``days`` days so feeds and keyset pages look like
+production.
+
+Everything is written with batched ``bulk_create`` calls, one transaction
+per batch. ``bulk_create`` skips ``save()`` and model signals, so slugs,
+``top_category``, search vectors and timestamps are set here and facet
+counts, shop product counts and the feed cache are left to
+``refresh_catalog``. Image rows point at file names that are never
+uploaded; seeded shops are not held to SHOP_PRODUCT_LIMIT.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from sellers.models import SellerProfile
+from sellers.slugs import SlugPool
+from .models import Product, ProductImage
+from .search import update_search_vectors
+
+SHOP_CATEGORY_WEIGHTS = {'women': 35, 'men': 30, 'accessories': 13, 'kids': 12, 'beauty': 10}
+# Share of a shop's products outside its own top-level category.
+OFF_CATEGORY_SHARE = 0.15
+DISCOUNTED_SHARE = 0.35
+
+# (median price, spread) for prices drawn from a log-normal curve.
+PRICE_CURVES = {'men': (799, 0.55), 'women': (899, 0.6), 'kids': (499, 0.5),
+                'accessories': (649, 0.7), 'beauty': (399, 0.6)}
+SIZES = {
+    'clothing': ['XS', 'S', 'M', 'L', 'XL', 'XXL'],
+    'shoes': ['6', '7', '8', '9', '10', '11'],
+    'kids': ['2-3Y', '4-5Y', '6-7Y', '8-9Y', '10-12Y'],
+    'other': ['Free Size'],
+}
+ADJECTIVES = ['Classic', 'Everyday', 'Premium', 'Slim Fit', 'Oversized', 'Vintage', 'Handcrafted',
+              'Printed', 'Embroidered', 'Casual', 'Festive', 'Summer', 'Linen', 'Cotton', 'Denim']
+COLOURS = ['Black', 'White', 'Navy', 'Olive', 'Maroon', 'Beige', 'Mustard', 'Pink', 'Grey', 'Teal']
+SHOP_WORDS = ['Trends', 'Closet', 'Boutique', 'Collective', 'Threads', 'Studio', 'Bazaar', 'Wardrobe']
+LOCATIONS = ['Kochi', 'Kozhikode', 'Thrissur', 'Bengaluru', 'Chennai', 'Mumbai', 'Hyderabad', 'Delhi']
+
+
+def subcategory_weights():
+    """top category -> ([subcategory, ...], [weight, ...]), a Zipf-like long tail."""
+    grouped = {}
+    for value, label in Product.SUBCATEGORY_CHOICES:
+        grouped.setdefault(Product.top_category_for(value), []).append((value, label))
+    return {
+        top: ([value for value, _ in choices], [1 / (rank + 1) ** 0.8 for rank in range(len(choices))])
+        for top, choices in grouped.items()
+    }
+
+
+def size_for(category):
+    if category.endswith('_shoes'):
+        return 'shoes'
+    if category.startswith('kids_') and category.endswith('_clothing'):
+        return 'kids'
+    if category.startswith(('men_', 'women_')) and not category.endswith(('_accessories', '_bags', '_jewelry')):
+        return 'clothing'
+    return 'other'
+
+
+@contextmanager
+def keep_timestamps(model, *names):
+    """
+    Let ``bulk_create`` write the given auto_now / auto_now_add fields as
+    set instead of stamping them with the current time. Only for one-off
+    commands: the flags are switched off process-wide while it runs.
+    """
+    fields = [model._meta.get_field(name) for name in names]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class MarketplaceSeeder:
+    """
+    Seeds shops, then their products in batches. ``prefix`` namespaces the
+    generated usernames so repeated runs add new shops instead of colliding.
+    """
+
+    def __init__(self, prefix='seed', password='stygo-seed', seed=None, days=180, images_per_product=3):
+        self.prefix = prefix
+        self.password = password
+        self.random = random.Random(seed)
+        self.days = days
+        self.images_per_product = images_per_product
+        self.subcategories = subcategory_weights()
+        self.labels = dict(Product.SUBCATEGORY_CHOICES)
+        self.now = timezone.now()
+        self.products = 0
+        self.images = 0
+
+    def create_sellers(self, count, batch_size=1000):
+        """Create ``count`` users and shops; returns the shops."""
+        start = User.objects.filter(username__startswith=f"{self.prefix}-").count()
+        # Hashing is deliberately slow, so every seeded user shares one hash.
+        password = make_password(self.password)
+        slugs = SlugPool(SellerProfile.objects.values_list('slug', flat=True))
+        tops, weights = zip(*SHOP_CATEGORY_WEIGHTS.items())
+        sellers = []
+        for offset in range(0, count, batch_size):
+            numbers = range(start + offset, start + min(offset + batch_size, count))
+            users = [
+                User(username=f"{self.prefix}-{n}@example.com", email=f"{self.prefix}-{n}@example.com",
+                     password=password)
+                for n in numbers
+            ]
+            profiles = []
+            for n, user in zip(numbers, users):
+                shop_name = f"{self.random.choice(COLOURS)} {self.random.choice(SHOP_WORDS)} {n}"
+                profiles.append(SellerProfile(
+                    user=user, shop_name=shop_name, slug=slugs.allocate(shop_name),
+                    category=self.random.choices(tops, weights)[0],
+                    location=self.random.choice(LOCATIONS),
+                    phone_number=f"+9190{self.random.randrange(10 ** 8):08d}",
+                ))
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                sellers.extend(SellerProfile.objects.bulk_create(profiles))
+        return sellers
+
+    def category_for(self, seller):
+        top = seller.category
+        if self.random.random() < OFF_CATEGORY_SHARE:
+            top = self.random.choice(list(self.subcategories))
+        values, weights = self.subcategories[top]
+        return self.random.choices(values, weights)[0]
+
+    def build_product(self, seller, number):
+        category = self.category_for(seller)
+        top = Product.top_category_for(category)
+        median, spread = PRICE_CURVES[top]
+        # Round to the usual ...49 / ...99 price points.
+        price = max(99, round(self.random.lognormvariate(0, spread) * median / 50) * 50 - 1)
+        original_price = None
+        if self.random.random() < DISCOUNTED_SHARE:
+            original_price = Decimal(max(price + 50, round(price * self.random.uniform(1.15, 2.0) / 50) * 50 - 1))
+        created_at = self.now - timedelta(seconds=self.random.uniform(0, self.days * 86400))
+        return Product(
+            seller=seller,
+            name=f"{self.random.choice(ADJECTIVES)} {self.random.choice(COLOURS)} {self.labels[category]}",
+            price=Decimal(price),
+            original_price=original_price,
+            size=self.random.choice(SIZES[size_for(category)]),
+            category=category,
+            top_category=top,
+            description=f"{self.labels[category]} from {seller.shop_name}. Item {number}.",
+            image=f"products/seed/{seller.pk}_{number}.jpg" if self.images_per_product else '',
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+    def create_products(self, sellers, per_seller, batch_size=2000):
+        """
+        Create ``per_seller`` products for each of ``sellers``, each with
+        ``images_per_product`` images; yields after every batch.
+        """
+        pending = (
+            self.build_product(seller, number)
+            for seller in sellers
+            for number in range(per_seller)
+        )
+        while True:
+            batch = [product for _, product in zip(range(batch_size), pending)]
+            if not batch:
+                return
+            self.write_batch(batch)
+            yield
+
+    def write_batch(self, products):
+        with transaction.atomic(), keep_timestamps(Product, 'created_at', 'updated_at'):
+            Product.objects.bulk_create(products)
+            ProductImage.objects.bulk_create(
+                ProductImage(product=product, is_primary=index == 0, created_at=product.created_at,
+                             image=product.image.name if index == 0
+                             else f"products/images/seed_{product.pk}_{index}.jpg")
+                for product in products
+                for index in range(self.images_per_product)
+            )
+            update_search_vectors(Product.objects.filter(pk__in=[product.pk for product in products]))
+        self.products += len(products)
+        self.images += len(products) * self.images_per_product
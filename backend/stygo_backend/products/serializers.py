@@ -1,22 +1,76 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
 from .models import Product, ProductImage
+from .ingest import schedule_ingest, stage_upload
+from .variants import smallest_variant, srcset
 
-class ProductImageSerializer(serializers.ModelSerializer):
+
+class VariantURLMixin:
+    """
+    ``image_url`` and ``srcset`` for serializers of objects with resized
+    variants. List views pass ``thumbnails=True`` in the context so
+    ``image_url`` points at the smallest rendition instead of the original.
+    """
+
+    def display_url(self, field_file, variants):
+        request = self.context.get("request")
+        if not request:
+            return None
+        if self.context.get("thumbnails"):
+            thumbnail = smallest_variant(variants)
+            if thumbnail:
+                return request.build_absolute_uri(default_storage.url(thumbnail))
+        if field_file and hasattr(field_file, 'url'):
+            return request.build_absolute_uri(field_file.url)
+        return None
+
+    def srcset_for(self, variants):
+        request = self.context.get("request")
+        if not request:
+            return {}
+        return srcset(variants, lambda name: request.build_absolute_uri(default_storage.url(name)))
+
+
+class ProductImageSerializer(VariantURLMixin, serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'image_url', 'is_primary']
-        read_only_fields = ['is_primary']
+        fields = ['id', 'image', 'image_url', 'srcset', 'is_primary', 'status']
+        read_only_fields = ['is_primary', 'status']
     
     def get_image_url(self, obj):
-        request = self.context.get("request")
-        if obj.image and hasattr(obj.image, 'url') and request:
-            return request.build_absolute_uri(obj.image.url)
-        return None
+        return self.display_url(obj.image, obj.variants)
+
+    def get_srcset(self, obj):
+        return self.srcset_for(obj.variants)
+
 
-class ProductSerializer(serializers.ModelSerializer):
+def stage_images(product, image_files, has_primary=None):
+    """
+    Stage uploads and record them as pending images of ``product`` in one
+    INSERT; the ingest workers push them to storage after the transaction
+    commits. The caller has just saved ``product``, which already refreshed
+    its feeds.
+    """
+    staged = ProductImage.objects.attach(product, [
+        ProductImage(
+            status=ProductImage.STATUS_PENDING,
+            staged_path=stage_upload(img),
+            upload_name=img.name,
+        )
+        for img in image_files
+    ], has_primary=has_primary, touch=False)
+    schedule_ingest(image.pk for image in staged)
+    return staged
+
+
+class ProductSerializer(VariantURLMixin, serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    image_status = serializers.CharField(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
     image = serializers.ImageField(required=False)  # Make main image optional
     image_files = serializers.ListField(
@@ -29,47 +83,39 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             "id", "name", "price", "original_price", "size", "category",
-            "description", "image", "image_url", "created_at", "images", "image_files"
+            "description", "image", "image_url", "srcset", "image_status", "created_at", "images", "image_files"
         ]
         read_only_fields = ['images']
 
     def get_image_url(self, obj):
-        request = self.context.get("request")
-        if obj.image and hasattr(obj.image, 'url') and request:
-            return request.build_absolute_uri(obj.image.url)
-        return None
+        return self.display_url(obj.image, obj.image_variants)
+
+    def get_srcset(self, obj):
+        return self.srcset_for(obj.image_variants)
     
-    def create(self, validated_data):
+    def _pop_uploads(self, validated_data):
+        """
+        ``(main image or None, uploads to stage)``. ``image`` is staged like
+        any other upload, ahead of ``image_files``; the ingest worker sets
+        Product.image once the primary image is stored.
+        """
+        image = validated_data.pop('image', None)
         image_files = validated_data.pop('image_files', None) or []
-        
-        # Create the product first
+        return image, [image, *image_files] if image else image_files
+
+    @transaction.atomic
+    def create(self, validated_data):
+        _, uploads = self._pop_uploads(validated_data)
         product = super().create(validated_data)
-        
-        # Create ProductImage instances for each uploaded image
-        for img in image_files:
-            ProductImage.objects.create(product=product, image=img)
-        
-        # Set the first image as the main product image if any images were uploaded
-        if image_files:
-            first_image = product.images.first()
-            if first_image:
-                product.image = first_image.image
-                product.save()
-        
+        stage_images(product, uploads, has_primary=False)
         return product
-    
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        image_files = validated_data.pop('image_files', None) or []
-        
-        # Handle new image uploads if any
-        if image_files:
-            for img in image_files:
-                ProductImage.objects.create(product=instance, image=img)
-            
-            # Update the main product image if it's the first update
-            if not instance.image:
-                first_image = instance.images.first()
-                if first_image:
-                    validated_data['image'] = first_image.image
-        
-        return super().update(instance, validated_data)
+        image, uploads = self._pop_uploads(validated_data)
+        instance = super().update(instance, validated_data)
+        if image:
+            # An explicit `image` replaces the main image.
+            instance.images.filter(is_primary=True).update(is_primary=False)
+        stage_images(instance, uploads, has_primary=False if image else None)
+        return instance
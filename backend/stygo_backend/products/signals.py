@@ -0,0 +1,129 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+from django.utils import timezone
+
+from sellers.models import SellerProfile
+from stygo_backend.caching import invalidate, shop_group
+from .facets import FacetRow, adjust_facet_counts, facet_values
+from .models import Product, ProductImage
+from .search import update_search_vectors
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_search_vector(sender, instance, **kwargs):
+    update_search_vectors(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=SellerProfile)
+def refresh_shop_search_vectors(sender, instance, created, **kwargs):
+    # A renamed shop changes what its products match on.
+    if not created:
+        update_search_vectors(Product.objects.filter(seller=instance))
+
+
+def _seller_slug(product):
+    try:
+        return product.seller.slug
+    except SellerProfile.DoesNotExist:
+        return None
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_feeds(sender, instance, **kwargs):
+    # Creates and deletes also change the shop list's product counts.
+    counted = kwargs.get('created', True)
+    invalidate('products', shop_group(_seller_slug(instance)), 'shops' if counted else None)
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def invalidate_product_image_feeds(sender, instance, **kwargs):
+    try:
+        product = instance.product
+    except Product.DoesNotExist:
+        return
+    invalidate('products', shop_group(_seller_slug(product)))
+
+
+@receiver(post_save, sender=Product)
+def touch_shop_catalog(sender, instance, **kwargs):
+    SellerProfile.objects.filter(pk=instance.seller_id).update(catalog_updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Product)
+def release_product_slot(sender, instance, **kwargs):
+    SellerProfile.objects.filter(pk=instance.seller_id).update(
+        catalog_updated_at=timezone.now(), product_count=Greatest(F('product_count') - 1, 0),
+    )
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def touch_product_for_image(sender, instance, **kwargs):
+    now = timezone.now()
+    Product.objects.filter(pk=instance.product_id).update(updated_at=now)
+    SellerProfile.objects.filter(products__pk=instance.product_id).update(catalog_updated_at=now)
+
+
+def _seller_category(product):
+    try:
+        return product.seller.category
+    except SellerProfile.DoesNotExist:
+        return None
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_facets(sender, instance, raw=False, **kwargs):
+    instance._previous_facets = set()
+    if raw or instance.pk is None:
+        return
+    row = Product.objects.filter(pk=instance.pk).values_list(
+        'top_category', 'category', 'size', 'price', 'original_price', 'seller_id', 'seller__category',
+    ).first()
+    if row:
+        instance._previous_seller = row[5:]
+        instance._previous_facets = facet_values(FacetRow(*row[:5]), row[6])
+
+
+@receiver(post_save, sender=Product)
+def update_product_facets(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous_seller_id, previous_category = getattr(instance, '_previous_seller', (None, None))
+    if previous_seller_id == instance.seller_id:
+        seller_category = previous_category
+    else:
+        seller_category = _seller_category(instance)
+        if previous_seller_id is not None:
+            _move_product_count(previous_seller_id, instance.seller_id)
+    adjust_facet_counts(
+        removed=getattr(instance, '_previous_facets', ()),
+        added=facet_values(instance, seller_category),
+    )
+
+
+def _move_product_count(from_seller_id, to_seller_id):
+    # An admin reassigning a product is not held to the shop limit.
+    SellerProfile.objects.filter(pk=from_seller_id).update(product_count=Greatest(F('product_count') - 1, 0))
+    SellerProfile.objects.filter(pk=to_seller_id).update(product_count=F('product_count') + 1)
+
+
+@receiver(post_delete, sender=Product)
+def discard_product_facets(sender, instance, **kwargs):
+    adjust_facet_counts(removed=facet_values(instance, _seller_category(instance)))
+
+
+@receiver(post_save, sender=SellerProfile)
+def move_shop_category_facets(sender, instance, created, raw=False, **kwargs):
+    # Stashed by sellers.signals.remember_shop_state.
+    previous_state = getattr(instance, '_previous_state', {})
+    previous = previous_state.get('category')
+    if raw or created or previous in (None, instance.category):
+        return
+    product_count = previous_state.get('product_count', 0)
+    if product_count:
+        adjust_facet_counts(
+            removed=[('seller_category', previous)],
+            added=[('seller_category', instance.category)],
+            step=product_count,
+        )
@@ -0,0 +1,202 @@
+"""
+Item-to-item "similar products", precomputed.
+
+Each product becomes one row of a feature matrix built from its
+subcategory, top-level category, price band, the seller's shop category
+and hashed name tokens. Every block is L2-normalised and scaled by the
+square root of its weight, so a dot product of two rows is the weighted sum
+of per-block cosine similarities (at most 1). Similarities are computed
+with NumPy a block of products at a time against the whole catalog and the
+top ``SIMILAR_PRODUCTS_K`` are stored in SimilarProduct, which the
+``similar`` endpoint reads with one indexed lookup.
+
+Builds are incremental: only products changed since their neighbours were
+last computed (``updated_at`` later than ``computed_at``, or no rows yet)
+are compared against the catalog, and every other product merges those
+products into its stored list, so a build costs O(changed x catalog) rather
+than O(catalog^2). ``full=True`` recomputes everything, which also refills
+lists that lost entries to deleted products.
+"""
+import re
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from stygo_backend.caching import invalidate
+from sellers.models import SellerProfile
+from .facets import PRICE_BANDS, price_band_for
+from .models import Product, SimilarProduct
+
+# Relative weights of the feature blocks; they sum to 1.
+WEIGHTS = {
+    'category': 0.35,
+    'name': 0.25,
+    'price_band': 0.2,
+    'top_category': 0.1,
+    'seller_category': 0.1,
+}
+NAME_DIMENSIONS = 512
+# Products compared against the catalog per matrix product.
+BLOCK_ROWS = 256
+# Neighbours scoring below this are not worth showing.
+MIN_SCORE = 0.05
+
+COLUMNS = ('id', 'name', 'category', 'top_category', 'price', 'seller__category')
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def _k():
+    return getattr(settings, 'SIMILAR_PRODUCTS_K', 12)
+
+
+def _name_column(token):
+    # crc32 rather than hash(): the same token must land in the same column
+    # in every process.
+    return zlib.crc32(token.encode()) % NAME_DIMENSIONS
+
+
+def _one_hot(matrix, offset, codes, weight):
+    rows = np.flatnonzero(codes >= 0)
+    matrix[rows, offset + codes[rows]] = np.sqrt(weight)
+
+
+def feature_matrix(rows):
+    """``(ids, features)`` for product rows with the COLUMNS values."""
+    vocabularies = {
+        'category': [value for value, _ in Product.SUBCATEGORY_CHOICES],
+        'top_category': [value for value, _ in SellerProfile.CATEGORY_CHOICES],
+        'seller_category': [value for value, _ in SellerProfile.CATEGORY_CHOICES],
+        'price_band': [value for value, _, _ in PRICE_BANDS],
+    }
+    sources = {
+        'category': lambda row: row['category'],
+        'top_category': lambda row: row['top_category'],
+        'seller_category': lambda row: row['seller__category'],
+        'price_band': lambda row: price_band_for(row['price']),
+    }
+    width = sum(len(values) for values in vocabularies.values()) + NAME_DIMENSIONS
+    ids = np.array([row['id'] for row in rows], dtype=np.int64)
+    matrix = np.zeros((len(rows), width), dtype=np.float32)
+
+    offset = 0
+    for block, values in vocabularies.items():
+        index = {value: position for position, value in enumerate(values)}
+        codes = np.array([index.get(sources[block](row), -1) for row in rows], dtype=np.int64)
+        _one_hot(matrix, offset, codes, WEIGHTS[block])
+        offset += len(values)
+
+    names = matrix[:, offset:]
+    token_rows, token_columns = [], []
+    for position, row in enumerate(rows):
+        for token in _TOKEN_RE.findall((row['name'] or '').lower()):
+            token_rows.append(position)
+            token_columns.append(_name_column(token))
+    np.add.at(names, (np.array(token_rows, dtype=np.int64), np.array(token_columns, dtype=np.int64)), 1.0)
+    norms = np.linalg.norm(names, axis=1, keepdims=True)
+    np.divide(names, norms, out=names, where=norms > 0)
+    names *= np.sqrt(WEIGHTS['name'])
+    return ids, matrix
+
+
+def _top_k(scores, k):
+    """Column indices of the ``k`` best scores per row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(best, order, axis=1)
+
+
+def changed_product_ids():
+    """Products whose neighbours are missing or older than the product."""
+    return set(
+        Product.objects.annotate(built=Max('similar__computed_at'))
+        .filter(Q(built__isnull=True) | Q(updated_at__gt=F('built')))
+        .values_list('pk', flat=True)
+    )
+
+
+def build_similar_products(full=False):
+    """
+    Recompute neighbour lists; returns ``{'products', 'changed', 'rewritten'}``.
+    """
+    # Taken before reading, so a product saved mid-build counts as changed
+    # next time.
+    now = timezone.now()
+    k = _k()
+    rows = list(Product.objects.order_by('id').values(*COLUMNS))
+    ids, features = feature_matrix(rows)
+    position = {int(pk): index for index, pk in enumerate(ids)}
+    changed = sorted(position) if full else sorted(changed_product_ids() & position.keys())
+    changed_positions = np.array([position[pk] for pk in changed], dtype=np.int64)
+
+    lists = {}
+    # Best scores each product has against the changed products, merged in
+    # block by block (unchanged products only).
+    others_best = np.full((len(ids), k), -np.inf, dtype=np.float32)
+    others_ids = np.full((len(ids), k), -1, dtype=np.int64)
+    for start in range(0, len(changed_positions), BLOCK_ROWS):
+        block = changed_positions[start:start + BLOCK_ROWS]
+        scores = features[block] @ features.T
+        scores[np.arange(len(block)), block] = -np.inf
+        best = _top_k(scores, k)
+        for offset, row in enumerate(block):
+            lists[int(ids[row])] = [
+                (int(ids[column]), float(scores[offset, column]))
+                for column in best[offset] if scores[offset, column] >= MIN_SCORE
+            ]
+        if not full:
+            candidates = scores.T
+            candidate_ids = np.broadcast_to(ids[block], candidates.shape)
+            merged = np.concatenate([others_best, candidates], axis=1)
+            merged_ids = np.concatenate([others_ids, candidate_ids], axis=1)
+            keep = _top_k(merged, k)
+            others_best = np.take_along_axis(merged, keep, axis=1)
+            others_ids = np.take_along_axis(merged_ids, keep, axis=1)
+
+    if not full and changed:
+        lists.update(_merge_unchanged(ids, set(changed), others_best, others_ids, k))
+
+    with transaction.atomic():
+        SimilarProduct.objects.filter(product_id__in=list(lists)).delete()
+        SimilarProduct.objects.bulk_create(
+            (
+                SimilarProduct(product_id=pk, neighbour_id=neighbour, rank=rank, score=round(score, 4), computed_at=now)
+                for pk, neighbours in lists.items()
+                for rank, (neighbour, score) in enumerate(neighbours, start=1)
+            ),
+            batch_size=1000,
+        )
+    invalidate('similar')
+    return {'products': len(ids), 'changed': len(changed), 'rewritten': len(lists)}
+
+
+def _merge_unchanged(ids, changed, best_scores, best_ids, k):
+    """New lists for unchanged products whose neighbours the changes affect."""
+    stored = {}
+    for pk, neighbour, score in (
+        SimilarProduct.objects.exclude(product_id__in=changed).order_by('product_id', 'rank')
+        .values_list('product_id', 'neighbour_id', 'score')
+    ):
+        stored.setdefault(pk, []).append((neighbour, score))
+
+    lists = {}
+    for index, pk in enumerate(ids.tolist()):
+        if pk in changed:
+            continue
+        current = stored.get(pk, [])
+        fresh = [
+            (int(neighbour), float(score))
+            for neighbour, score in zip(best_ids[index], best_scores[index])
+            if neighbour >= 0 and score >= MIN_SCORE
+        ]
+        kept = [(neighbour, score) for neighbour, score in current if neighbour not in changed]
+        merged = sorted(kept + fresh, key=lambda item: (-item[1], -item[0]))[:k]
+        if [neighbour for neighbour, _ in merged] != [neighbour for neighbour, _ in current]:
+            lists[pk] = merged
+    return lists
@@ -1,3 +1,783 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+
+from sellers.models import SellerProfile
+from stygo_backend.caching import cache_stats
+from .catalog import write_checkpoint
+from .facets import rebuild_facet_counts
+from .ingest import process_staged_image
+from .listing import serialize_products
+from .models import Product, ProductFacetCount, ProductImage, ProductLimitReached, SimilarProduct
+from .serializers import ProductSerializer
+from .similarity import build_similar_products
+
+
+def make_catalog(products_per_shop, images_per_product=2, shops=1):
+    sellers = []
+    for s in range(shops):
+        user = User.objects.create_user(username=f"seller{s}@example.com")
+        seller = SellerProfile.objects.create(user=user, shop_name=f"Shop {s}")
+        for p in range(products_per_shop):
+            product = Product.objects.create(
+                seller=seller,
+                name=f"Product {s}-{p}",
+                price=199 + p * 100,
+                size="M",
+                category="men_shirts",
+                image="products/main.jpg",
+            )
+            for i in range(images_per_product):
+                ProductImage.objects.create(product=product, image=f"products/images/{p}-{i}.jpg")
+        sellers.append(seller)
+    return sellers
+
+
+class ProductQueryBudgetTests(TestCase):
+    """Read endpoints must cost a constant number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assertBudget(self, url, budget):
+        for products in (2, 8):
+            Product.objects.all().delete()
+            SellerProfile.objects.all().delete()
+            User.objects.all().delete()
+            seller = make_catalog(products)[0]
+            path = url.format(slug=seller.slug, pk=seller.products.first().pk)
+            with self.assertNumQueries(budget):
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+
+    def test_all_products(self):
+        self.assertBudget("/api/products/all/", 3)
+
+    def test_products_under_599(self):
+        self.assertBudget("/api/products/products/under-599/", 3)
+
+    def test_latest_products(self):
+        self.assertBudget("/api/products/products/latest/", 3)
+
+    def test_products_by_seller(self):
+        self.assertBudget("/api/products/products/seller/{slug}/", 4)
+
+    def test_top_products_by_shop(self):
+        self.assertBudget("/api/products/shop/{slug}/latest-products/", 4)
+
+    def test_product_detail(self):
+        self.assertBudget("/api/products/{pk}/", 3)
+
+
+class ProductSearchTests(TestCase):
+    """Runs against the in-Python engine on SQLite, PostgreSQL FTS in CI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = make_catalog(0)[0]
+        seller.shop_name = "Kerala Handlooms"
+        seller.save()
+        for name, category, description in [
+            ("Linen Shirt", "men_shirts", "Breathable summer wear"),
+            ("Denim Jeans", "men_jeans", "Slim fit"),
+            ("Silk Saree", "women_dresses", "Handwoven linen border"),
+        ]:
+            Product.objects.create(
+                seller=seller, name=name, price=499, size="M",
+                category=category, description=description, image="products/main.jpg",
+            )
+
+    def search(self, q, **params):
+        response = APIClient().get("/api/products/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def names(self, data):
+        return [product["name"] for product in data["results"]]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.names(self.search("linen")), ["Linen Shirt", "Silk Saree"])
+
+    def test_tolerates_typos(self):
+        self.assertEqual(self.names(self.search("jeens")), ["Denim Jeans"])
+
+    def test_matches_shop_name(self):
+        self.assertEqual(self.search("handlooms")["count"], 3)
+
+    def test_paginates(self):
+        data = self.search("handlooms", page_size=2)
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIsNotNone(data["next"])
+
+    def test_requires_query(self):
+        self.assertEqual(APIClient().get("/api/products/search/").status_code, 400)
+
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        self.seller = make_catalog(0)[0]
+
+    def counts(self):
+        return {
+            (row.facet, row.value): row.count
+            for row in ProductFacetCount.objects.filter(count__gt=0)
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.counts()
+        rebuild_facet_counts()
+        self.assertEqual(incremental, self.counts())
+
+    def test_counts_follow_creates_updates_and_deletes(self):
+        shirt = Product.objects.create(
+            seller=self.seller, name="Shirt", price=499, original_price=799,
+            size="m", category="men_shirts", image="products/main.jpg",
+        )
+        Product.objects.create(
+            seller=self.seller, name="Dress", price=1499, size="S",
+            category="women_dresses", image="products/main.jpg",
+        )
+        counts = self.counts()
+        self.assertEqual(counts[("top_category", "men")], 1)
+        self.assertEqual(counts[("size", "M")], 1)
+        self.assertEqual(counts[("discount", "discounted")], 1)
+        self.assertEqual(counts[("price_band", "1000_1999")], 1)
+        self.assertEqual(counts[("seller_category", "men")], 2)
+
+        shirt.category = "women_tops"
+        shirt.save()
+        self.assertEqual(self.counts()[("top_category", "women")], 2)
+        self.assertMatchesRebuild()
+
+        shirt.delete()
+        self.assertEqual(self.counts()[("top_category", "women")], 1)
+        self.assertMatchesRebuild()
+
+    def test_shop_category_change_moves_seller_category(self):
+        for i in range(3):
+            Product.objects.create(
+                seller=self.seller, name=f"P{i}", price=299, size="M",
+                category="kids_toys", image="products/main.jpg",
+            )
+        self.seller.category = "kids"
+        self.seller.save()
+        counts = self.counts()
+        self.assertEqual(counts[("seller_category", "kids")], 3)
+        self.assertNotIn(("seller_category", "men"), counts)
+        self.assertMatchesRebuild()
+
+    def test_filter_endpoint(self):
+        for name, category, price in [("A", "men_shirts", 399), ("B", "men_jeans", 899), ("C", "women_tops", 399)]:
+            Product.objects.create(
+                seller=self.seller, name=name, price=price, size="M",
+                category=category, image="products/main.jpg",
+            )
+        with self.assertNumQueries(4):
+            data = APIClient().get("/api/products/filter/", {"top_category": "men", "max_price": 599}).json()
+        self.assertEqual([p["name"] for p in data["results"]], ["A"])
+        self.assertEqual(data["facets"]["top_category"], {"men": 2, "women": 1})
+
+    def test_filter_rejects_non_numeric_prices(self):
+        client = APIClient()
+        for params in ({"min_price": "nan"}, {"max_price": "Infinity"}, {"min_price": "-inf"}, {"max_price": "cheap"}):
+            response = client.get("/api/products/filter/", params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json(), {"error": "min_price and max_price must be numbers"})
+
+
+@override_settings(FEED_CACHE_TIMEOUT=300)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.shop_a, self.shop_b = make_catalog(2, images_per_product=1, shops=2)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_second_read_is_served_from_cache(self):
+        self.assertEqual(self.get("/api/products/all/")["X-Cache"], "MISS")
+        with self.assertNumQueries(1):  # the ETag state lookup
+            self.assertEqual(self.get("/api/products/all/")["X-Cache"], "HIT")
+        self.assertEqual(cache_stats()["hit"], 1)
+
+    def test_product_write_only_invalidates_affected_keys(self):
+        shop_a_url = f"/api/products/shop/{self.shop_a.slug}/latest-products/"
+        shop_b_url = f"/api/products/shop/{self.shop_b.slug}/latest-products/"
+        for url in ("/api/products/all/", shop_a_url, shop_b_url):
+            self.get(url)
+
+        Product.objects.create(
+            seller=self.shop_a, name="New", price=299, size="M",
+            category="men_shirts", image="products/main.jpg",
+        )
+
+        self.assertEqual(self.get("/api/products/all/")["X-Cache"], "MISS")
+        self.assertEqual(self.get(shop_a_url)["X-Cache"], "MISS")
+        self.assertEqual(self.get(shop_b_url)["X-Cache"], "HIT")
+
+    def test_shop_update_invalidates_shop_endpoints(self):
+        url = f"/api/sellers/{self.shop_a.slug}/"
+        self.get(url)
+        self.get("/api/sellers/shops/")
+        self.shop_a.location = "Kochi"
+        self.shop_a.save()
+        self.assertEqual(self.get(url).json()["location"], "Kochi")
+        self.assertEqual(self.get("/api/sellers/shops/")["X-Cache"], "MISS")
+
+    def test_shop_rename_refreshes_expanded_sellers(self):
+        url = "/api/products/all/?expand=seller"
+        first = self.get(url)
+        self.get("/api/products/all/")
+        self.shop_a.shop_name = "Renamed"
+        self.shop_a.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn("Renamed", {product["seller"]["shop_name"] for product in response.json()["results"]})
+        # Responses without sellers stay cached.
+        self.assertEqual(self.get("/api/products/all/")["X-Cache"], "HIT")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.seller = make_catalog(2, images_per_product=1)[0]
+        self.product = self.seller.products.first()
+
+    def test_matching_etag_skips_the_view(self):
+        for url in (
+            "/api/products/all/",
+            f"/api/products/{self.product.pk}/",
+            f"/api/products/products/seller/{self.seller.slug}/",
+            f"/api/sellers/{self.seller.slug}/",
+            "/api/sellers/shops/",
+        ):
+            first = self.client.get(url)
+            self.assertTrue(first.has_header("Last-Modified"), url)
+            with self.assertNumQueries(1):
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(second.status_code, 304, url)
+
+    def test_image_change_changes_etags(self):
+        detail = f"/api/products/{self.product.pk}/"
+        etags = [self.client.get(url)["ETag"] for url in (detail, "/api/products/all/")]
+        ProductImage.objects.create(product=self.product, image="products/images/new.jpg")
+        for url, etag in zip((detail, "/api/products/all/"), etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cursor_is_part_of_the_etag(self):
+        first = self.client.get("/api/products/all/", {"page_size": 1})
+        second = self.client.get(first.json()["next"])
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+
+def image_upload(name="photo.jpg", size=(32, 32)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format="JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(IMAGE_INGEST_ASYNC=False)
+class ImageIngestTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=self.media.name,
+            IMAGE_STAGING_ROOT=os.path.join(self.media.name, "staging"),
+        ))
+        self.seller = make_catalog(0)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller.user)
+
+    def create(self, files):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/products/create/", {
+                "name": "Kurta", "price": "799", "size": "M",
+                "category": "men_shirts", "image_files": files,
+            }, format="multipart")
+        self.assertEqual(response.status_code, 200, response.content)
+        return Product.objects.get(pk=response.json()["id"])
+
+    def test_uploads_are_staged_then_stored(self):
+        product = self.create([image_upload("a.jpg"), image_upload("b.jpg")])
+        images = list(product.images.order_by("id"))
+        self.assertEqual([image.status for image in images], ["ready", "ready"])
+        self.assertTrue(images[0].is_primary)
+        self.assertEqual(product.image.name, images[0].image.name)
+        self.assertEqual(os.listdir(os.path.join(self.media.name, "staging")), [])
+
+        status = self.client.get(f"/api/products/{product.pk}/image-status/").json()
+        self.assertEqual(status["status"], "ready")
+
+    def test_variants_are_rendered_and_listed_as_thumbnails(self):
+        product = self.create([image_upload("big.jpg", size=(800, 600))])
+        self.assertEqual(sorted(product.image_variants["webp"]), ["320", "640"])
+
+        listed = self.client.get("/api/products/all/").json()["results"][0]
+        self.assertTrue(listed["image_url"].endswith("_320.jpg"))
+        self.assertIn("640w", listed["srcset"]["webp"])
+        detail = self.client.get(f"/api/products/{product.pk}/").json()
+        self.assertTrue(detail["image_url"].endswith("big.jpg"))
+
+    def test_failures_are_recorded(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post("/api/products/create/", {
+                "name": "Kurta", "price": "799", "size": "M", "image_files": [image_upload()],
+            }, format="multipart")
+        image = ProductImage.objects.get(product_id=response.json()["id"])
+        self.assertEqual(image.status, "pending")
+
+        os.remove(os.path.join(self.media.name, "staging", image.staged_path))
+        self.assertEqual(process_staged_image(image.pk, retry=False), "failed")
+        image.refresh_from_db()
+        self.assertEqual(image.attempts, 1)
+        self.assertIn("FileNotFoundError", image.last_error)
+
+    def test_patch_image_replaces_main_image(self):
+        product = Product.objects.create(seller=self.seller, name="Kurta", price=799, size="M",
+                                         image="products/main.jpg")
+        ProductImage.objects.create(product=product, image="products/main.jpg", is_primary=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/products/{product.pk}/update/", {
+                "image": image_upload("new.jpg"), "image_files": [image_upload("extra.jpg")],
+            }, format="multipart")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        product.refresh_from_db()
+        primary = product.images.get(is_primary=True)
+        self.assertTrue(primary.image.name.endswith("new.jpg"))
+        self.assertEqual(product.image.name, primary.image.name)
+        self.assertEqual(product.images.count(), 3)
+
+    def stage(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post("/api/products/create/", {
+                "name": "Kurta", "price": "799", "size": "M", "image_files": [image_upload()],
+            }, format="multipart")
+        return ProductImage.objects.get(product_id=response.json()["id"])
+
+    def test_failed_attempts_leave_nothing_in_storage(self):
+        image = self.stage()
+        with mock.patch.dict("products.variants.VARIANT_FORMATS", {"webp": ("NO-SUCH-FORMAT", ".x", {})}):
+            self.assertEqual(process_staged_image(image.pk, retry=False), "pending")
+        stored = [files for root, _, files in os.walk(os.path.join(self.media.name, "products"))]
+        self.assertEqual(sum(stored, []), [])
+
+    def test_claimed_images_are_skipped(self):
+        image = self.stage()
+        ProductImage.objects.filter(pk=image.pk).update(status="processing", claimed_at=timezone.now())
+        self.assertIsNone(process_staged_image(image.pk, retry=False))
+        self.assertEqual(Product.objects.get(pk=image.product_id).image_status, "pending")
+
+        status = self.client.get(f"/api/products/{image.product_id}/image-status/").json()
+        self.assertEqual(status["status"], "pending")
+
+    def test_lost_claim_does_not_overwrite_result(self):
+        image = self.stage()
+
+        def finished_elsewhere(handle, name):
+            ProductImage.objects.filter(pk=image.pk).update(status="ready", claimed_at=None)
+            raise OSError("storage unavailable")
+
+        with mock.patch("products.ingest.render_variants", side_effect=finished_elsewhere):
+            self.assertIsNone(process_staged_image(image.pk, retry=False))
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.attempts, image.last_error), ("ready", 0, ""))
+
+    def test_command_reclaims_abandoned_uploads(self):
+        image = self.stage()
+        ProductImage.objects.filter(pk=image.pk).update(
+            status="processing", claimed_at=timezone.now() - timedelta(hours=1),
+        )
+        call_command("process_staged_images", stdout=io.StringIO())
+        image.refresh_from_db()
+        self.assertEqual(image.status, "ready")
+        self.assertIsNone(image.claimed_at)
+
+
+class StreamingTests(TestCase):
+    def test_all_products_streams_whole_catalog(self):
+        make_catalog(5, images_per_product=1, shops=2)
+        response = APIClient().get("/api/products/all/", {"stream": "1"})
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        self.assertEqual(chunks[0], b"[")
+        data = json.loads(b"".join(chunks))
+        self.assertEqual(len(data), 10)
+        self.assertEqual(data[0], APIClient().get("/api/products/all/").json()["results"][0])
+
+    @override_settings(STREAM_CHUNK_SIZE=3)
+    def test_stream_honours_fields_and_expand(self):
+        make_catalog(4, images_per_product=1, shops=2)
+        params = {"fields": "id,name,images", "expand": "seller"}
+        response = APIClient().get("/api/products/all/", {"stream": "1", **params})
+        streamed = json.loads(b"".join(response.streaming_content))
+        paged = APIClient().get("/api/products/all/", {"page_size": 8, **params}).json()["results"]
+        self.assertEqual(streamed, paged)
+
+    def test_shops_stream(self):
+        make_catalog(0, shops=3)
+        response = APIClient().get("/api/sellers/shops/", {"stream": "true"})
+        self.assertEqual(len(json.loads(b"".join(response.streaming_content))), 3)
+
+    def test_shops_stream_keeps_ordering(self):
+        for seller, count in zip(make_catalog(0, shops=3), (2, 5, 1)):
+            SellerProfile.objects.filter(pk=seller.pk).update(product_count=count)
+        response = APIClient().get("/api/sellers/shops/", {"stream": "1", "ordering": "-product_count"})
+        shops = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([shop["product_count"] for shop in shops], [5, 2, 1])
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media.name))
+        self.work = tempfile.TemporaryDirectory()
+        self.addCleanup(self.work.cleanup)
+        self.seller = make_catalog(0)[0]
+        for name in ("a.jpg", "b.jpg"):
+            with open(os.path.join(self.work.name, name), "wb") as out:
+                out.write(image_upload(name).read())
+
+    def write_csv(self, lines):
+        path = os.path.join(self.work.name, "catalog.csv")
+        with open(path, "w") as out:
+            out.write("seller_slug,name,price,original_price,size,category,description,images\n")
+            out.writelines(line + "\n" for line in lines)
+        return path
+
+    def test_import_creates_products_images_and_facets(self):
+        path = self.write_csv([
+            f"{self.seller.slug},Kurta,799,999,M,men_shirts,Cotton,a.jpg;b.jpg",
+            f"{self.seller.slug},Jeans,499,,32,men_jeans,,missing.jpg",
+            "nobody,Ghost,1,,M,men_shirts,,",
+        ])
+        err = io.StringIO()
+        call_command("import_catalog", path, images_dir=self.work.name, batch_size=2,
+                     stdout=io.StringIO(), stderr=err)
+
+        self.assertEqual(Product.objects.count(), 2)
+        kurta = Product.objects.get(name="Kurta")
+        self.assertEqual(kurta.top_category, "men")
+        self.assertEqual(kurta.images.count(), 2)
+        primary = kurta.images.get(is_primary=True)
+        self.assertEqual(kurta.image.name, primary.image.name)
+        self.assertTrue(kurta.image_variants["webp"])
+        self.assertEqual(ProductFacetCount.objects.get(facet="category", value="men_jeans").count, 1)
+        self.assertIn("Row 2: image 'missing.jpg'", err.getvalue())
+        self.assertIn("Row 3: unknown seller_slug 'nobody'", err.getvalue())
+        self.assertFalse(os.path.exists(path + ".checkpoint"))
+        self.seller.refresh_from_db()
+        self.assertEqual(self.seller.product_count, 2)
+
+    def test_resume_skips_rows_already_imported(self):
+        path = self.write_csv([f"{self.seller.slug},P{n},100,,M,men_shirts,," for n in range(5)])
+        with open(path + ".checkpoint", "w") as out:
+            json.dump({"source": os.path.abspath(path), "rows": 3}, out)
+        call_command("import_catalog", path, stdout=io.StringIO())
+        self.assertEqual(sorted(Product.objects.values_list("name", flat=True)), ["P3", "P4"])
+
+    def test_resume_after_crash_between_commit_and_checkpoint(self):
+        # The earlier run imported rows 1-2 for another shop, checkpointed,
+        # then died after committing rows 3-4 but before checkpointing them.
+        other = SellerProfile.objects.create(user=User.objects.create_user(username="other"), shop_name="Other")
+        path = self.write_csv(
+            [f"{other.slug},O{n},100,,M,men_shirts,," for n in range(2)]
+            + [f"{self.seller.slug},P{n},100,,M,men_shirts,," for n in range(3)]
+        )
+        Product.objects.bulk_create(
+            Product(seller=other, name=f"O{n}", price=100, size="M", category="men_shirts") for n in range(2)
+        )
+        write_checkpoint(path + ".checkpoint", path, 2, {other.pk})
+        Product.objects.bulk_create(
+            Product(seller=self.seller, name=f"P{n}", price=100, size="M", category="men_shirts") for n in range(2)
+        )
+
+        call_command("import_catalog", path, batch_size=2, stdout=io.StringIO())
+        self.assertEqual(sorted(Product.objects.filter(seller=self.seller).values_list("name", flat=True)),
+                         ["P0", "P1", "P2"])
+        other.refresh_from_db()
+        self.seller.refresh_from_db()
+        self.assertEqual((other.product_count, self.seller.product_count), (2, 3))
+
+    def test_export_round_trips(self):
+        for p in range(3):
+            product = Product.objects.create(seller=self.seller, name=f"P{p}", price=100, size="M",
+                                             category="men_shirts", image="products/main.jpg")
+            for i in range(2):
+                ProductImage.objects.create(product=product, image=f"products/images/{p}-{i}.jpg")
+        out = os.path.join(self.work.name, "export.jsonl")
+        call_command("export_catalog", out, stdout=io.StringIO())
+        with open(out) as handle:
+            rows = [json.loads(line) for line in handle]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["images"], ["products/images/0-0.jpg", "products/images/0-1.jpg"])
+
+
+class ListingSerializationTests(TestCase):
+    """products.listing must return exactly what ProductSerializer does."""
+
+    def test_matches_product_serializer(self):
+        seller = make_catalog(3, images_per_product=2)[0]
+        variants = {"jpeg": {"320": "products/variants/x_320.jpg", "640": "products/variants/x_640.jpg"},
+                    "webp": {"320": "products/variants/x_320.webp"}}
+        Product.objects.filter(name="Product 0-0").update(
+            image_variants=variants, original_price=Decimal("1299.5"), description="Linen",
+        )
+        ProductImage.objects.filter(pk=ProductImage.objects.first().pk).update(variants=variants)
+        ProductImage.objects.create(product=seller.products.last(), status="pending", staged_path="x.jpg")
+
+        request = APIRequestFactory().get("/api/products/all/")
+        products = Product.objects.order_by("-created_at", "-id")
+        for thumbnails in (True, False):
+            expected = ProductSerializer(
+                products.for_listing(), many=True, context={"request": request, "thumbnails": thumbnails},
+            ).data
+            self.assertEqual(
+                json.loads(json.dumps(serialize_products(products, request, thumbnails=thumbnails))),
+                json.loads(json.dumps(expected)),
+            )
+
+    def test_list_views_use_two_queries(self):
+        make_catalog(5)
+        request = APIRequestFactory().get("/api/products/all/")
+        with self.assertNumQueries(2):
+            serialize_products(Product.objects.all(), request)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.seller = make_catalog(3)[0]
+        self.client = APIClient()
+
+    def test_fields_trim_response_and_images_query(self):
+        with self.assertNumQueries(2):  # catalog version, products
+            response = self.client.get("/api/products/all/", {"fields": "id,name,image_url"})
+        self.assertEqual(list(response.json()["results"][0]), ["id", "name", "image_url"])
+
+    def test_expand_seller(self):
+        product = self.seller.products.first()
+        response = self.client.get(f"/api/products/{product.pk}/", {"fields": "id", "expand": "seller"})
+        shop = self.client.get(f"/api/sellers/{self.seller.slug}/").json()
+        self.assertEqual(response.json(), {"id": product.pk, "seller": shop})
+
+    def test_default_shape_has_images_but_no_seller(self):
+        result = self.client.get("/api/products/all/").json()["results"][0]
+        self.assertIn("images", result)
+        self.assertNotIn("seller", result)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/products/all/", {"fields": "name,password"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_shop_fields(self):
+        response = self.client.get("/api/sellers/shops/", {"fields": "slug,shop_name"})
+        self.assertEqual(response.json(), [{"shop_name": "Shop 0", "slug": self.seller.slug}])
+
+
+@override_settings(SHOP_PRODUCT_LIMIT=3)
+class ProductCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.seller = make_catalog(2, images_per_product=0)[0]
+
+    def product(self, **kwargs):
+        return Product(seller=self.seller, name="Extra", price=100, size="M", category="men_shirts", **kwargs)
+
+    def test_count_follows_creates_and_deletes(self):
+        self.seller.refresh_from_db()
+        self.assertEqual(self.seller.product_count, 2)
+        self.seller.products.first().delete()
+        self.seller.refresh_from_db()
+        self.assertEqual(self.seller.product_count, 1)
+
+    def test_limit_is_enforced_by_conditional_update(self):
+        self.product().save()
+        with self.assertRaises(ProductLimitReached):
+            self.product().save()
+        self.assertEqual(self.seller.products.count(), 3)
+        self.seller.refresh_from_db()
+        self.assertEqual(self.seller.product_count, 3)
+
+    def test_create_endpoint_rejects_full_shop_without_counting(self):
+        self.product().save()
+        client = APIClient()
+        client.force_authenticate(self.seller.user)
+        with self.assertNumQueries(1):  # the shop
+            response = client.post("/api/products/create/", {"name": "X", "price": "9", "size": "M"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Product limit reached (max 3 products)"})
+
+    def test_stale_shop_save_keeps_count(self):
+        stale = SellerProfile.objects.get(pk=self.seller.pk)
+        self.product().save()
+        stale.location = "Kochi"
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual((stale.location, stale.product_count), ("Kochi", 3))
+
+    def test_shop_list_ordering_and_filter(self):
+        for name in ("Empty A", "Empty B"):
+            SellerProfile.objects.create(user=User.objects.create_user(username=name), shop_name=name)
+        response = APIClient().get("/api/sellers/shops/", {"ordering": "-product_count", "fields": "slug,product_count"})
+        self.assertEqual(response.json()[0], {"slug": self.seller.slug, "product_count": 2})
+        response = APIClient().get("/api/sellers/shops/", {"min_products": "1"})
+        self.assertEqual([shop["slug"] for shop in response.json()], [self.seller.slug])
+
+
+class BulkImageAttachTests(TestCase):
+    """Attaching images costs the same number of queries for any image count."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=self.media.name,
+            IMAGE_STAGING_ROOT=os.path.join(self.media.name, "staging"),
+        ))
+        self.seller = make_catalog(0)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller.user)
+
+    def queries_for(self, method, url, files):
+        # Ingest runs on commit; leave it out so only the request is measured.
+        with self.captureOnCommitCallbacks(execute=False):
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(url, {
+                    "name": "Kurta", "price": "799", "size": "M", "image_files": files,
+                }, format="multipart")
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries), response.json()["id"]
+
+    def test_create_query_count_is_fixed(self):
+        # The first product also creates its facet count rows.
+        self.queries_for("post", "/api/products/create/", [image_upload("warm.jpg")])
+        one, _ = self.queries_for("post", "/api/products/create/", [image_upload("a.jpg")])
+        four, product_id = self.queries_for(
+            "post", "/api/products/create/", [image_upload(f"{n}.jpg") for n in range(4)],
+        )
+        self.assertEqual(one, four)
+        images = ProductImage.objects.filter(product_id=product_id).order_by("id")
+        self.assertEqual([image.is_primary for image in images], [True, False, False, False])
+
+    def test_update_query_count_is_fixed(self):
+        _, product_id = self.queries_for("post", "/api/products/create/", [image_upload("a.jpg")])
+        url = f"/api/products/{product_id}/update/"
+        one, _ = self.queries_for("patch", url, [image_upload("b.jpg")])
+        three, _ = self.queries_for("patch", url, [image_upload(f"{n}.jpg") for n in range(3)])
+        self.assertEqual(one, three)
+        self.assertEqual(ProductImage.objects.filter(product_id=product_id, is_primary=True).count(), 1)
+
+    def test_ready_primary_sets_product_image_in_one_update(self):
+        product = Product.objects.create(seller=self.seller, name="Bare", price=100, size="M")
+        variants = {"jpeg": {"320": "products/variants/p_320.jpg"}}
+        # has primary?, savepoint, insert, product, shop, release
+        with self.assertNumQueries(6):
+            ProductImage.objects.attach(product, [
+                ProductImage(image="products/images/p.jpg", variants=variants),
+                ProductImage(image="products/images/q.jpg"),
+            ])
+        product.refresh_from_db()
+        self.assertEqual((product.image.name, product.image_variants), ("products/images/p.jpg", variants))
+
+
+@override_settings(SHOP_PRODUCT_LIMIT=50)
+class SimilarProductTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = make_catalog(0)[0]
+        self.shirt = self.add("Blue linen shirt", "men_shirts", 499)
+        self.linen = self.add("White linen shirt", "men_shirts", 549)
+        self.cotton = self.add("Checked cotton shirt", "men_shirts", 1499)
+        self.dress = self.add("Floral summer dress", "women_dresses", 1299)
+        self.lipstick = self.add("Matte lipstick", "beauty_makeup", 299)
+
+    def add(self, name, category, price):
+        return Product.objects.create(seller=self.seller, name=name, price=price, size="M", category=category,
+                                      image="products/main.jpg")
+
+    def neighbours(self, product):
+        return list(SimilarProduct.objects.filter(product=product).order_by("rank").values_list("neighbour_id", flat=True))
+
+    def test_ranks_by_category_price_and_name(self):
+        self.assertEqual(build_similar_products(), {"products": 5, "changed": 5, "rewritten": 5})
+        self.assertEqual(self.neighbours(self.shirt), [self.linen.pk, self.cotton.pk, self.lipstick.pk, self.dress.pk])
+
+        with self.assertNumQueries(2):
+            response = APIClient().get(f"/api/products/{self.shirt.pk}/similar/")
+        self.assertEqual([item["id"] for item in response.json()][:2], [self.linen.pk, self.cotton.pk])
+        self.assertEqual(APIClient().get("/api/products/999999/similar/").json(), [])
+
+    def test_incremental_build_only_touches_affected_lists(self):
+        build_similar_products()
+        self.assertEqual(build_similar_products()["changed"], 0)
+
+        twin = self.add("Blue linen shirt", "men_shirts", 499)
+        stats = build_similar_products()
+        self.assertEqual(stats["changed"], 1)
+        self.assertEqual(self.neighbours(twin)[0], self.shirt.pk)
+        # The twin now leads the shirt's list without recomputing the shirt.
+        self.assertEqual(self.neighbours(self.shirt)[:2], [twin.pk, self.linen.pk])
+
+        self.dress.name = "Linen shirt dress"
+        self.dress.save()
+        self.assertEqual(build_similar_products()["changed"], 1)
+        self.assertEqual(build_similar_products(full=True)["changed"], 6)
+
+
+class SeedMarketplaceTests(TestCase):
+    def test_seeds_shops_products_and_images_in_batches(self):
+        call_command("seed_marketplace", sellers=3, products_per_seller=12, images_per_product=2,
+                     batch_size=5, seed=7, stdout=io.StringIO())
+        sellers = SellerProfile.objects.filter(user__username__startswith="seed-")
+        self.assertEqual(sellers.count(), 3)
+        # Not held to SHOP_PRODUCT_LIMIT, and counts are rebuilt afterwards.
+        self.assertEqual(set(sellers.values_list("product_count", flat=True)), {12})
+        self.assertEqual(len(set(sellers.values_list("slug", flat=True))), 3)
+
+        products = Product.objects.filter(seller__in=sellers)
+        self.assertEqual(products.count(), 36)
+        for product in products:
+            self.assertEqual(product.top_category, Product.top_category_for(product.category))
+            self.assertIn(product.category, dict(Product.SUBCATEGORY_CHOICES))
+            self.assertGreater(product.price, 0)
+            if product.original_price is not None:
+                self.assertGreater(product.original_price, product.price)
+        # created_at is spread out rather than stamped by bulk_create.
+        self.assertGreater(len(set(products.values_list("created_at", flat=True))), 30)
+        self.assertTrue(products.filter(created_at__lt=products.latest("created_at").created_at).exists())
+
+        images = ProductImage.objects.filter(product__in=products)
+        self.assertEqual(images.count(), 72)
+        self.assertEqual(images.filter(is_primary=True).count(), 36)
+        self.assertTrue(ProductFacetCount.objects.filter(facet="top_category").exists())
+
+        # Sellers can log in, and a second run adds shops instead of colliding.
+        self.assertTrue(sellers.first().user.check_password("stygo-seed"))
+        call_command("seed_marketplace", sellers=2, products_per_seller=1, stdout=io.StringIO())
+        self.assertEqual(SellerProfile.objects.filter(user__username__startswith="seed-").count(), 5)
@@ -9,7 +9,13 @@ from .views import (
     update_product,
     products_under_599,
     latest_products,
+    trending_products,
+    similar_products,
     products_by_seller,
+    product_search,
+    filter_products,
+    product_image_status,
+    products_batch,
   
     
 )
@@ -18,11 +24,17 @@ urlpatterns = [
     path('create/', create_product),             # POST: create product
     path('my/', my_products),                    # GET: seller's own products
     path('all/', all_products),                  # GET: all products (public)
+    path('search/', product_search, name='product-search'),  # GET: ?q=
+    path('filter/', filter_products, name='product-filter'),  # GET: faceted filter
+    path('batch/', products_batch, name='product-batch'),     # GET: ?ids=
     path('<int:pk>/', ProductDetailAPIView.as_view(), name='product-detail'), 
      path("shop/<str:shop_slug>/latest-products/", top_products_by_shop, name="top_products_by_shop"),
      path('products/under-599/', products_under_599, name='products_under_599'),
      path('<int:product_id>/delete/', delete_product, name='delete-product'),
     path('<int:product_id>/update/', update_product, name='update-product'),
+    path('<int:product_id>/image-status/', product_image_status, name='product-image-status'),
+    path('<int:product_id>/similar/', similar_products, name='product-similar'),
     path('products/latest/', latest_products, name='latest_products'),
+    path('products/trending/', trending_products, name='trending_products'),
      path('products/seller/<slug:seller_slug>/', products_by_seller, name='products-by-seller'),
     ]
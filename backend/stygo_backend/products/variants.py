@@ -0,0 +1,85 @@
+"""
+Resized JPEG and WebP renditions of product photos.
+
+Variants are rendered with Pillow when an upload is ingested and stored
+next to the original under ``products/variants/``. Their storage names are
+recorded as ``{"jpeg": {"320": name, ...}, "webp": {...}}`` on
+ProductImage.variants and, for the primary image, Product.image_variants.
+"""
+import io
+import logging
+import os
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+VARIANT_FORMATS = {
+    'jpeg': ('JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def variant_widths():
+    return sorted(getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 1280]))
+
+
+def render_variants(source, stored_name):
+    """
+    Render every width/format of the image in ``source`` (a file object) and
+    save them to the default storage. Returns the variants map; if any
+    rendition fails, the ones already saved are deleted again.
+    """
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    stem = os.path.splitext(os.path.basename(stored_name))[0]
+    widths = [w for w in variant_widths() if w < original.width] or [original.width]
+    variants = {key: {} for key in VARIANT_FORMATS}
+    try:
+        for width in widths:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.LANCZOS) if width != original.width else original
+            for key, (pil_format, ext, options) in VARIANT_FORMATS.items():
+                frame = resized
+                if pil_format == 'JPEG' and frame.mode not in ('RGB', 'L'):
+                    frame = frame.convert('RGB')
+                buffer = io.BytesIO()
+                frame.save(buffer, format=pil_format, **options)
+                name = default_storage.save(
+                    f"products/variants/{stem}_{width}{ext}", ContentFile(buffer.getvalue()),
+                )
+                variants[key][str(width)] = name
+    except Exception:
+        delete_stored(name for sizes in variants.values() for name in sizes.values())
+        raise
+    return variants
+
+
+def delete_stored(names):
+    """Best-effort removal of stored files that no row will point at."""
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.warning("Could not delete orphaned upload %s", name, exc_info=True)
+
+
+def smallest_variant(variants, key='jpeg'):
+    sizes = (variants or {}).get(key) or {}
+    if not sizes:
+        return None
+    return sizes[min(sizes, key=int)]
+
+
+def srcset(variants, build_url):
+    """``{"jpeg": "url 320w, url 640w", "webp": ...}`` ready for <source srcset>."""
+    return {
+        key: ', '.join(f"{build_url(name)} {width}w" for width, name in sorted(sizes.items(), key=lambda item: int(item[0])))
+        for key, sizes in (variants or {}).items()
+        if sizes
+    }
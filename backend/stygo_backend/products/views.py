@@ -1,7 +1,7 @@
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Product
+from .models import Product, ProductLimitReached
 from .serializers import ProductSerializer
 from sellers.models import SellerProfile
 from rest_framework.generics import RetrieveAPIView
@@ -9,9 +9,66 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from .serializers import ProductSerializer
 from rest_framework.generics import get_object_or_404
 from rest_framework import status
+from analytics.buffer import valid_product_id
+from stygo_backend.caching import cache_response, shop_group
+from stygo_backend.conditional import conditional_get
+from django.db.models import Count, Max
+from django.conf import settings
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from stygo_backend.pagination import KeysetPagination, RankPagination, SearchPagination
+from stygo_backend.streaming import stream_json_batches, wants_stream
+from .listing import listing_rows, product_fields, serialize_listing, serialize_products
+from .search import search_products
+from .facets import PRICE_BANDS, read_facet_counts
+from django.db.models import F, Q
+from decimal import Decimal, InvalidOperation
 import cloudinary
 from cloudinary.exceptions import AuthorizationRequired, Error as CloudinaryError
 
+def expands_seller(request):
+    """
+    ``?expand=seller`` embeds shop fields, which change without the catalog.
+    Also called from ``conditional_get`` states, before DRF wraps the request.
+    """
+    return 'seller' in [value.strip() for value in request.GET.get('expand', '').split(',')]
+
+
+def with_sellers(request, groups):
+    """Cache groups for a product response, plus ``shops`` when it embeds sellers."""
+    return [*groups, 'shops'] if expands_seller(request) else groups
+
+
+def catalog_state(request, *args, **kwargs):
+    """Version of the whole catalog: shop count plus latest catalog change."""
+    changes = {'changed': Max('catalog_updated_at')}
+    if expands_seller(request):
+        changes['profiles'] = Max('updated_at')
+    state = SellerProfile.objects.aggregate(shops=Count('id'), **changes)
+    changed = [state[name] for name in changes]
+    return f"{state['shops']}:{':'.join(map(str, changed))}", max(filter(None, changed), default=None)
+
+
+def shop_catalog_state(request, shop_slug=None, seller_slug=None):
+    columns = ['catalog_updated_at', 'updated_at'] if expands_seller(request) else ['catalog_updated_at']
+    row = SellerProfile.objects.filter(slug=shop_slug or seller_slug).values_list('pk', *columns).first()
+    if row is None:
+        return None
+    return f"{row[0]}:{':'.join(map(str, row[1:]))}", max(filter(None, row[1:]), default=None)
+
+
+def product_state(request, pk):
+    columns = ['updated_at', 'seller__updated_at'] if expands_seller(request) else ['updated_at']
+    row = Product.objects.filter(pk=pk).values_list(*columns).first()
+    if row is None:
+        return None
+    return f"{pk}:{':'.join(map(str, row))}", max(row)
+
+
+def product_limit_message():
+    return f'Product limit reached (max {settings.SHOP_PRODUCT_LIMIT} products)'
+
+
 # ✅ Create a product
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -24,9 +81,10 @@ def create_product(request):
     except SellerProfile.DoesNotExist:
         return Response({'error': 'Shop not found'}, status=404)
 
-    # ✅ Limit: one shop can only have 9 products
-    if Product.objects.filter(seller=shop).count() >= 10:
-        return Response({'error': 'Product limit reached (max 10 products)'}, status=400)
+    # ✅ Limit: one shop can only have SHOP_PRODUCT_LIMIT products. This is
+    # only an early exit; Product.save reserves the slot atomically.
+    if shop.product_count >= settings.SHOP_PRODUCT_LIMIT:
+        return Response({'error': product_limit_message()}, status=400)
 
     # (debug logging removed)
 
@@ -60,6 +118,8 @@ def create_product(request):
         instance = serializer.save(seller=shop)
         # (post-save diagnostics removed)
         return Response(serializer.data)
+    except ProductLimitReached:
+        return Response({'error': product_limit_message()}, status=400)
     except AuthorizationRequired as e:
         # Cloudinary credentials are wrong/missing – treat as client/config error, not server crash
         return Response({
@@ -85,6 +145,9 @@ def create_product(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_products(request):
+    """
+    Query budget: 3 (auth user, shop, products) + 1 for images.
+    """
     user = request.user
 
     try:
@@ -93,40 +156,96 @@ def my_products(request):
         return Response({'error': 'Shop not found'}, status=404)
 
     products = Product.objects.filter(seller=seller_profile)
-    serializer = ProductSerializer(products, many=True, context={"request": request})
-    return Response(serializer.data)
+    return Response(serialize_products(products, request, fields=product_fields(request)))
+
+def paginated_products(request, products, page_size=None):
+    """
+    Serialize one keyset page of ``products`` with a ``next`` cursor link.
+
+    Query budget: 2 (the page of products, then their images), whatever the
+    page size; 1 when ``?fields=`` leaves out images. Views add one for
+    their ETag state.
+    """
+    fields = product_fields(request)
+    paginator = KeysetPagination(page_size=page_size)
+    page = paginator.paginate_queryset(listing_rows(products, fields), request)
+    return paginator.get_paginated_response(serialize_listing(page, request, fields=fields))
+
 
 # ✅ List all products (public)
+@conditional_get(catalog_state)
 @api_view(['GET'])
+@cache_response(lambda request: with_sellers(request, ['products']))
 def all_products(request):
-    products = Product.objects.all().order_by('-id')
-    serializer = ProductSerializer(products, many=True, context={"request": request})
-    return Response(serializer.data)
+    """
+    Query budget: 3 (catalog version, products, images).
 
+    ``?stream=1`` streams the whole catalog as one JSON array instead, for
+    exports: two queries per STREAM_CHUNK_SIZE rows, flat memory.
+    """
+    if wants_stream(request):
+        # Same shape and ?fields= / ?expand= handling as the pages.
+        fields = product_fields(request)
+        rows = listing_rows(Product.objects.order_by('-created_at', '-id'), fields)
+        return stream_json_batches(rows, lambda batch: serialize_listing(batch, request, fields=fields))
+    return paginated_products(request, Product.objects.all())
 
 
 
 
+
+@method_decorator(conditional_get(product_state), name='get')
 class ProductDetailAPIView(RetrieveAPIView):
+    """
+    Query budget: 3 (version, product, then its images).
+
+    Reads through products.listing so ``?fields=`` / ``?expand=`` trim the
+    query as they do for lists; ProductSerializer documents the shape.
+    """
+    # serialize_products picks the columns; for_listing()'s prefetches would go unused.
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     lookup_field = "pk"  # or "id" if that's your field
 
+    def retrieve(self, request, *args, **kwargs):
+        fields = product_fields(request)
+        products = self.get_queryset().filter(pk=kwargs[self.lookup_field])
+        data = serialize_products(products, request, thumbnails=False, fields=fields)
+        if not data:
+            raise Http404
+        return Response(data[0])
+
 
 
+@conditional_get(shop_catalog_state)
 @api_view(['GET'])
+@cache_response(lambda request, shop_slug: [shop_group(shop_slug)])
 def top_products_by_shop(request, shop_slug):
+    """
+    Query budget: 4 (shop version, shop, products, images).
+    """
     try:
         shop = SellerProfile.objects.get(slug=shop_slug)  # ✅ changed shop_slug -> slug
     except SellerProfile.DoesNotExist:
         return Response({'error': 'Shop not found'}, status=404)
 
     latest_products = Product.objects.filter(seller=shop).order_by('-created_at')[:3]
-    serializer = ProductSerializer(latest_products, many=True, context={"request": request})
-    return Response(serializer.data)
+    return Response(serialize_products(latest_products, request, fields=product_fields(request)))
 
 
 
+# ✅ Similar products (precomputed by `manage.py build_similar_products`)
+@api_view(['GET'])
+@cache_response(lambda request, product_id: with_sellers(request, ['similar', 'products']))
+def similar_products(request, product_id):
+    """
+    Query budget: 2 (the stored neighbour list joined to its products, then
+    their images). Unknown or not yet indexed products have no neighbours.
+    """
+    neighbours = Product.objects.filter(similar_to__product_id=product_id).order_by('similar_to__rank')
+    return Response(serialize_products(neighbours, request, fields=product_fields(request)))
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_product(request, product_id):
@@ -177,16 +296,24 @@ def update_product(request, product_id):
 
 
 # Get products under 599
+@conditional_get(catalog_state)
 @api_view(['GET'])
+@cache_response(lambda request: with_sellers(request, ['products']))
 def products_under_599(request):
-    products = Product.objects.filter(price__lte=599).order_by('-created_at')
-    serializer = ProductSerializer(products, many=True, context={'request': request})
-    return Response(serializer.data)
+    """
+    Query budget: 3 (catalog version, products, images).
+    """
+    products = Product.objects.filter(price__lte=599)
+    return paginated_products(request, products)
 
 
+@conditional_get(catalog_state)
 @api_view(['GET'])
+@cache_response(lambda request, **kwargs: with_sellers(request, ['products']))
 def latest_products(request, limit=30):  # default limit 30
-
+    """
+    Query budget: 3 (catalog version, products, images).
+    """
     try:
         limit = int(limit)
         if limit > 100:  # optional safety limit
@@ -194,23 +321,190 @@ def latest_products(request, limit=30):  # default limit 30
     except:
         limit = 30
 
-    products = Product.objects.all().order_by('-created_at')[:limit]
-    serializer = ProductSerializer(products, many=True, context={"request": request})
-    return Response(serializer.data)
+    # `limit` is now the default page size; follow `next` for older products.
+    return paginated_products(request, Product.objects.all(), page_size=limit)
+
+
+# ✅ Trending this week (ranked by `manage.py compute_trending`)
+@api_view(['GET'])
+@cache_response(lambda request: with_sellers(request, ['trending', 'products']))
+def trending_products(request):
+    """
+    ``?category=<top category>`` narrows the ranking. Query budget: 2 (a
+    range scan of the ranking joined to its products, then their images).
+    """
+    products = Product.objects.filter(trending__isnull=False)
+    category = request.query_params.get('category')
+    if category:
+        if category not in dict(SellerProfile.CATEGORY_CHOICES):
+            return Response({'error': 'Unknown category'}, status=400)
+        products = products.filter(trending__top_category=category)
+
+    fields = product_fields(request)
+    paginator = RankPagination('trending__rank')
+    page = paginator.paginate_queryset(listing_rows(products, fields, extra_columns=('trending__rank',)), request)
+    return paginator.get_paginated_response(serialize_listing(page, request, fields=fields))
 
 
 
+@conditional_get(shop_catalog_state)
 @api_view(['GET'])
+@cache_response(lambda request, seller_slug: [shop_group(seller_slug)])
 def products_by_seller(request, seller_slug):
     """
     Fetch all products for a seller using seller slug.
+
+    Query budget: 4 (shop version, seller, products, images).
     """
     try:
         seller = SellerProfile.objects.get(slug=seller_slug)
     except SellerProfile.DoesNotExist:
         return Response({"detail": "Seller not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    products = Product.objects.filter(seller=seller).order_by('-created_at')
-    serializer = ProductSerializer(products, many=True, context={'request': request})
+    products = Product.objects.filter(seller=seller)
+    return paginated_products(request, products)
+
+
+@api_view(['GET'])
+def product_search(request):
+    """
+    Ranked, typo-tolerant search over product name, category, description
+    and shop name. Paginate with ``page`` and ``page_size``.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'Search query "q" is required'}, status=400)
+
+    fields = product_fields(request)
+    paginator = SearchPagination()
+    page = paginator.paginate_queryset(listing_rows(search_products(query, Product.objects.all()), fields), request)
+    return paginator.get_paginated_response(serialize_listing(page, request, fields=fields))
+
+
+def _csv_param(request, name):
+    return [value for value in request.query_params.get(name, '').split(',') if value]
+
+
+def _price_param(request, name):
+    """A finite Decimal, or None when absent; raises InvalidOperation otherwise."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    price = Decimal(value)
+    # Decimal() accepts 'nan' and 'Infinity', which the price column cannot.
+    if not price.is_finite():
+        raise InvalidOperation(value)
+    return price
+
 
-    return Response(serializer.data)
\ No newline at end of file
+@api_view(['GET'])
+def products_batch(request):
+    """
+    Many products by id in one round trip: ``?ids=12,7,30``.
+
+    Results keep the requested order; ids that do not exist (or were
+    deleted) are listed in ``missing``. Accepts ``?fields=`` / ``?expand=``.
+
+    Query budget: 2 (products, images).
+    """
+    try:
+        ids = list(dict.fromkeys(int(value) for value in _csv_param(request, 'ids')))
+    except ValueError:
+        return Response({'error': 'ids must be comma-separated integers'}, status=400)
+    if not all(valid_product_id(pk) for pk in ids):
+        return Response({'error': 'ids must be comma-separated integers'}, status=400)
+    max_ids = getattr(settings, 'FEED_MAX_PAGE_SIZE', 100)
+    if not ids or len(ids) > max_ids:
+        return Response({'error': f'Pass between 1 and {max_ids} ids'}, status=400)
+
+    fields = product_fields(request)
+    found = {
+        product['id']: product
+        for product in serialize_products(Product.objects.filter(pk__in=ids), request, fields=('id', *fields))
+    }
+    results = []
+    for pk in ids:
+        product = found.get(pk)
+        if product is not None:
+            results.append(product if 'id' in fields else {k: v for k, v in product.items() if k != 'id'})
+    return Response({'results': results, 'missing': [pk for pk in ids if pk not in found]})
+
+
+
+@conditional_get(catalog_state)
+@api_view(['GET'])
+def filter_products(request):
+    """
+    Filter the catalog and return one keyset page plus facet counts.
+
+    Query params (lists are comma-separated): ``top_category``, ``category``,
+    ``size``, ``seller_category``, ``min_price``, ``max_price``,
+    ``discounted`` (true/false). Facet counts are catalog-wide and read
+    from ProductFacetCount.
+
+    Query budget: 4 (catalog version, products, images, facet counts).
+    """
+    products = Product.objects.all()
+
+    top_categories = _csv_param(request, 'top_category')
+    if top_categories:
+        products = products.filter(top_category__in=top_categories)
+    categories = _csv_param(request, 'category')
+    if categories:
+        products = products.filter(category__in=categories)
+    seller_categories = _csv_param(request, 'seller_category')
+    if seller_categories:
+        products = products.filter(seller__category__in=seller_categories)
+    sizes = _csv_param(request, 'size')
+    if sizes:
+        size_filter = Q()
+        for size in sizes:
+            size_filter |= Q(size__iexact=size.strip())
+        products = products.filter(size_filter)
+
+    try:
+        min_price = _price_param(request, 'min_price')
+        max_price = _price_param(request, 'max_price')
+    except InvalidOperation:
+        return Response({'error': 'min_price and max_price must be numbers'}, status=400)
+    if min_price is not None:
+        products = products.filter(price__gte=min_price)
+    if max_price is not None:
+        products = products.filter(price__lte=max_price)
+
+    discounted = request.query_params.get('discounted', '').lower()
+    if discounted == 'true':
+        products = products.filter(original_price__gt=F('price'))
+    elif discounted == 'false':
+        products = products.exclude(original_price__gt=F('price'))
+
+    response = paginated_products(request, products)
+    response.data['facets'] = read_facet_counts()
+    response.data['price_bands'] = [
+        {'value': value, 'min': low, 'max': high} for value, low, high in PRICE_BANDS
+    ]
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def product_image_status(request, product_id):
+    """
+    Poll the ingest state of a product's uploads (owner only).
+    """
+    product = get_object_or_404(Product.objects.for_listing(), id=product_id)
+    if product.seller.user_id != request.user.id:
+        return Response({'error': 'Not authorized to view this product'}, status=403)
+
+    return Response({
+        'status': product.image_status,
+        'images': [
+            {
+                'id': image.id,
+                'status': image.status,
+                'attempts': image.attempts,
+                'last_error': image.last_error or None,
+            }
+            for image in product.images.all()
+        ],
+    })
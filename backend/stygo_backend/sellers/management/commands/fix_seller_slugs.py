@@ -1,19 +1,44 @@
 from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from sellers.models import SellerProfile
-from django.utils.text import slugify
+from sellers.slugs import SLUG_ATTEMPTS, SlugPool
+from stygo_backend.caching import invalidate
+
 
 class Command(BaseCommand):
-    help = 'Fix missing or duplicate slugs for sellers'
+    help = 'Fix missing slugs for sellers (one query for every slug in use, then batched bulk_update)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
 
-    def handle(self, *args, **kwargs):
-        for seller in SellerProfile.objects.all():
-            if not seller.slug:
-                base_slug = slugify(seller.shop_name)
-                unique_slug = base_slug
-                num = 1
-                while SellerProfile.objects.filter(slug=unique_slug).exists():
-                    unique_slug = f"{base_slug}-{num}"
-                    num += 1
-                seller.slug = unique_slug
-                seller.save()
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        missing = SellerProfile.objects.filter(Q(slug='') | Q(slug__isnull=True)).only('pk', 'shop_name', 'slug')
+        pending = list(missing.order_by('pk'))
+        if not pending:
+            self.stdout.write("All sellers have slugs")
+            return
+
+        fixed = 0
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            for attempt in range(SLUG_ATTEMPTS):
+                # Re-read the slugs in use on every attempt so a batch that
+                # raced with a new shop picks around it.
+                pool = SlugPool(SellerProfile.objects.exclude(slug='').values_list('slug', flat=True))
+                for seller in batch:
+                    seller.slug = pool.allocate(seller.shop_name)
+                try:
+                    with transaction.atomic():
+                        SellerProfile.objects.bulk_update(batch, ['slug'])
+                    break
+                except IntegrityError:
+                    if attempt == SLUG_ATTEMPTS - 1:
+                        raise
+            fixed += len(batch)
+            for seller in batch:
                 self.stdout.write(f"Slug set for {seller.shop_name}: {seller.slug}")
+
+        invalidate('shops')
+        self.stdout.write(f"Fixed {fixed} slugs")
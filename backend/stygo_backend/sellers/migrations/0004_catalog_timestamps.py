@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:03
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_catalog_updated_at(apps, schema_editor):
+    SellerProfile = apps.get_model('sellers', 'SellerProfile')
+    SellerProfile.objects.update(catalog_updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sellers', '0003_alter_sellerprofile_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sellerprofile',
+            name='catalog_updated_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sellerprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_catalog_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_product_count(apps, schema_editor):
+    SellerProfile = apps.get_model('sellers', 'SellerProfile')
+    Product = apps.get_model('products', 'Product')
+    counts = Product.objects.filter(seller=OuterRef('pk')).order_by().values('seller').annotate(n=Count('id'))
+    SellerProfile.objects.update(product_count=Coalesce(Subquery(counts.values('n')), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sellers', '0004_catalog_timestamps'),
+        ('products', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sellerprofile',
+            name='product_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_product_count, migrations.RunPython.noop),
+    ]
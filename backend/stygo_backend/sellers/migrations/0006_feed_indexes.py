@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sellers', '0005_product_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sellerprofile',
+            index=models.Index(fields=['-created_at', '-id'], name='seller_created'),
+        ),
+    ]
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
-from django.utils.text import slugify
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from .slugs import SLUG_ATTEMPTS, allocate_slug
 
 class SellerProfile(models.Model):
     CATEGORY_CHOICES = [
@@ -19,19 +21,62 @@ class SellerProfile(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='men')
     logo = models.ImageField(upload_to='shop_logos/', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Bumped by products.signals whenever one of the shop's products or
+    # their images change; drives ETags for product feeds.
+    catalog_updated_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
+    # Kept current by Product.save (which also enforces the per-shop limit)
+    # and products.signals; only ever changed with F() updates.
+    product_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+
+    # Written by concurrent F() updates, so never saved back from a
+    # possibly stale instance.
+    MAINTAINED_FIELDS = ('catalog_updated_at', 'product_count')
+
+    class Meta:
+        indexes = [
+            # The shop directory pages by (created_at, id), newest first.
+            models.Index(fields=['-created_at', '-id'], name='seller_created'),
+        ]
 
     def save(self, *args, **kwargs):
-        # Auto-generate slug only if it's empty
-        if not self.slug:
-            base_slug = slugify(self.shop_name)
-            slug = base_slug
-            counter = 1
-            # Ensure slug uniqueness
-            while SellerProfile.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        if self.slug:
+            super().save(*args, **kwargs)
+            return
+
+        # Auto-generate slug only if it's empty; the unique index settles
+        # races, so a conflicting writer just allocates again.
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocate_slug(SellerProfile.objects.exclude(pk=self.pk), self.shop_name)
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                taken = SellerProfile.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                self.slug = ''
+                if not taken or attempt == SLUG_ATTEMPTS - 1:
+                    raise
+
+    @classmethod
+    def reserve_product_slot(cls, seller_id):
+        """
+        Count one more product for the shop unless it is at the limit.
+
+        A single conditional UPDATE, so concurrent creates cannot overshoot;
+        returns False when the shop is full. Call inside the transaction that
+        inserts the product.
+        """
+        limit = getattr(settings, 'SHOP_PRODUCT_LIMIT', 10)
+        return bool(
+            cls.objects.filter(pk=seller_id, product_count__lt=limit)
+            .update(product_count=F('product_count') + 1)
+        )
 
     def __str__(self):
         return self.shop_name
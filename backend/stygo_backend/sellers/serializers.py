@@ -1,12 +1,13 @@
 from rest_framework import serializers
+from stygo_backend.fieldsets import SparseFieldsMixin
 from .models import SellerProfile
 
-class SellerProfileSerializer(serializers.ModelSerializer):
+class SellerProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     logo = serializers.SerializerMethodField()
 
     class Meta:
         model = SellerProfile
-        fields = ['shop_name', 'slug', 'location', 'phone_number', 'category', 'logo', 'created_at']
+        fields = ['shop_name', 'slug', 'location', 'phone_number', 'category', 'logo', 'created_at', 'product_count']
 
     def get_logo(self, obj):
         request = self.context.get('request')
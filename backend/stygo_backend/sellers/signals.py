@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from stygo_backend.caching import invalidate, shop_group
+from .models import SellerProfile
+
+
+@receiver(pre_save, sender=SellerProfile)
+def remember_shop_state(sender, instance, raw=False, **kwargs):
+    """Stash the stored slug, category and product count for post_save receivers."""
+    instance._previous_state = {}
+    if not raw and instance.pk is not None:
+        instance._previous_state = (
+            SellerProfile.objects.filter(pk=instance.pk).values('slug', 'category', 'product_count').first() or {}
+        )
+
+
+@receiver([post_save, post_delete], sender=SellerProfile)
+def invalidate_shop_feeds(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', {}).get('slug')
+    invalidate(
+        'shops',
+        shop_group(instance.slug),
+        shop_group(previous) if previous and previous != instance.slug else None,
+    )
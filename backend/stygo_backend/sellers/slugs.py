@@ -0,0 +1,64 @@
+"""
+Unique shop slugs.
+
+A new slug is the slugified shop name, or ``<base>-<n>`` with ``n`` one
+higher than the highest suffix already in use, found with one indexed
+prefix query (``slug LIKE 'base%'``) instead of probing ``-1``, ``-2``, ...
+one query at a time. The unique index stays the arbiter: a writer that
+loses a race gets an IntegrityError and allocates again.
+"""
+import re
+from bisect import bisect_left, insort
+
+from django.utils.text import slugify
+
+MAX_LENGTH = 50
+# Room for a "-<n>" suffix within SlugField's 50 characters.
+BASE_LENGTH = MAX_LENGTH - 6
+SLUG_ATTEMPTS = 5
+
+
+def base_slug(shop_name):
+    return slugify(shop_name)[:BASE_LENGTH].strip('-') or 'shop'
+
+
+def next_slug(base, taken):
+    """
+    ``base`` if it is free, else ``base-N`` for one more than the highest
+    ``N`` among ``taken`` (the slugs that start with ``base``).
+    """
+    taken = set(taken)
+    if base not in taken:
+        return base
+    suffix = re.compile(rf'^{re.escape(base)}-(\d+)$')
+    highest = max((int(match.group(1)) for match in map(suffix.match, taken) if match), default=0)
+    return f"{base}-{highest + 1}"
+
+
+def allocate_slug(queryset, shop_name):
+    """One query: the free slug for ``shop_name`` among ``queryset``'s rows."""
+    base = base_slug(shop_name)
+    return next_slug(base, queryset.filter(slug__startswith=base).values_list('slug', flat=True))
+
+
+class SlugPool:
+    """
+    In-memory allocator over a sorted list of every slug in use, for batch
+    passes that would otherwise run one prefix query per shop.
+    """
+
+    def __init__(self, slugs):
+        self.slugs = sorted(slugs)
+
+    def _with_prefix(self, base):
+        start = bisect_left(self.slugs, base)
+        for slug in self.slugs[start:]:
+            if not slug.startswith(base):
+                break
+            yield slug
+
+    def allocate(self, shop_name):
+        base = base_slug(shop_name)
+        slug = next_slug(base, self._with_prefix(base))
+        insort(self.slugs, slug)
+        return slug
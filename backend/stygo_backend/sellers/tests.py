@@ -1,3 +1,109 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products.models import Product
+from products.tests import make_catalog
+from .models import SellerProfile
+from .slugs import SlugPool
+
+
+class ShopDirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_embeds_latest_products_per_shop(self):
+        sellers = make_catalog(5, images_per_product=1, shops=3)
+        for shops in (3, 6):
+            if shops == 6:
+                for n in range(3):
+                    user = User.objects.create_user(username=f"more{n}")
+                    seller = SellerProfile.objects.create(user=user, shop_name=f"More {n}")
+                    Product.objects.create(seller=seller, name=f"M{n}", price=100, size="M", image="p.jpg")
+            cache.clear()
+            with self.assertNumQueries(3):
+                response = APIClient().get("/api/sellers/directory/", {"preview": "2"})
+            self.assertEqual(len(response.json()["results"]), shops)
+
+        first = response.json()["results"][-1]
+        self.assertEqual(first["slug"], sellers[0].slug)
+        expected = list(sellers[0].products.order_by("-created_at", "-id").values_list("id", flat=True)[:2])
+        self.assertEqual([product["id"] for product in first["products"]], expected)
+        self.assertEqual(
+            sorted(first["products"][0]), ["created_at", "id", "image_url", "name", "original_price", "price", "srcset"],
+        )
+
+    def test_pages_and_filters(self):
+        make_catalog(1, images_per_product=0, shops=3)
+        SellerProfile.objects.create(user=User.objects.create_user(username="empty"), shop_name="Empty")
+        data = APIClient().get("/api/sellers/directory/", {"page_size": "2", "min_products": "1"}).json()
+        self.assertEqual(len(data["results"]), 2)
+        rest = APIClient().get(data["next"]).json()
+        self.assertEqual(len(rest["results"]), 1)
+        self.assertIsNone(rest["next"])
+
+    def test_last_modified_follows_catalog_changes(self):
+        seller = make_catalog(1, images_per_product=0)[0]
+        for hours, url in enumerate(("/api/sellers/directory/", "/api/sellers/shops/"), start=1):
+            first = APIClient().get(url)
+            # A product write moves catalog_updated_at but not updated_at.
+            later = timezone.now() + timedelta(hours=hours)
+            SellerProfile.objects.filter(pk=seller.pk).update(catalog_updated_at=later)
+            response = APIClient().get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+            self.assertEqual(response.status_code, 200, url)
+
+
+class SellerSlugTests(TestCase):
+    def shop(self, name, **kwargs):
+        user = User.objects.create_user(username=f"{name}-{User.objects.count()}")
+        return SellerProfile.objects.create(user=user, shop_name=name, **kwargs)
+
+    def test_next_suffix_from_one_prefix_query(self):
+        for _ in range(4):
+            self.shop("Fashion Hub")
+        self.shop("Fashion Hubs")
+        user = User.objects.create_user(username="late")
+        # One prefix query for the slug, then the insert inside its savepoint.
+        with self.assertNumQueries(4):
+            shop = SellerProfile.objects.create(user=user, shop_name="Fashion Hub")
+        self.assertEqual(shop.slug, "fashion-hub-4")
+
+    def test_retries_when_slug_is_taken_concurrently(self):
+        self.shop("Fashion Hub")
+        from sellers import models as seller_models
+        real = seller_models.allocate_slug
+        calls = []
+
+        def stale(queryset, name):
+            # The first attempt misses a row another writer just committed.
+            calls.append(name)
+            return "fashion-hub" if len(calls) == 1 else real(queryset, name)
+
+        user = User.objects.create_user(username="racer")
+        with mock.patch.object(seller_models, "allocate_slug", stale):
+            shop = SellerProfile.objects.create(user=user, shop_name="Fashion Hub")
+        self.assertEqual((shop.slug, len(calls)), ("fashion-hub-1", 2))
+
+    def test_fix_seller_slugs_fills_blank_slugs(self):
+        self.shop("Fashion Hub")
+        blank = self.shop("Fashion Hub")
+        self.shop("Fashion Hub")
+        SellerProfile.objects.filter(pk=blank.pk).update(slug="")
+        call_command("fix_seller_slugs", stdout=io.StringIO())
+        blank.refresh_from_db()
+        self.assertEqual(blank.slug, "fashion-hub-3")
 
-# Create your tests here.
+    def test_slug_pool_allocates_in_memory(self):
+        pool = SlugPool(["fashion-hub", "fashion-hub-2", "fashion-hubs", "gadgets"])
+        self.assertEqual(
+            [pool.allocate(name) for name in ("Fashion Hub", "Fashion Hub", "Gadgets", "!!!")],
+            ["fashion-hub-3", "fashion-hub-4", "gadgets-1", "shop"],
+        )
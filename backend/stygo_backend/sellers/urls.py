@@ -1,10 +1,11 @@
 from django.urls import path
-from .views import create_shop, update_shop, dashboard, list_all_shops, get_shop_by_slug, delete_shop
+from .views import create_shop, update_shop, dashboard, list_all_shops, shop_directory, get_shop_by_slug, delete_shop
 
 urlpatterns = [
     path('create-shop/', create_shop),
     path('dashboard/', dashboard, name='dashboard'),
     path('shops/', list_all_shops),
+    path('directory/', shop_directory, name='shop_directory'),
     path('<slug:shop_slug>/', get_shop_by_slug, name='get_shop_by_slug'),
     path('shop/update/', update_shop, name='update_shop'),
     path('shop/delete/', delete_shop, name='delete_shop'),
@@ -2,6 +2,15 @@ from rest_framework.decorators import api_view, permission_classes, parser_class
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework import status
+from stygo_backend.caching import cache_response, shop_group
+from stygo_backend.conditional import conditional_get
+from stygo_backend.fieldsets import requested_fields
+from stygo_backend.pagination import KeysetPagination
+from analytics.reports import shop_report
+from products.listing import latest_products_by_seller
+from stygo_backend.streaming import stream_json_array, wants_stream
+from django.db.models import Count, Max
 from .models import SellerProfile
 from .serializers import SellerProfileSerializer
 
@@ -45,27 +54,112 @@ def dashboard(request):
     user = request.user
 
     try:
-        profile = SellerProfile.objects.get(user=user)
-        serializer = SellerProfileSerializer(profile, context={'request': request})  # ✅ context added
-        return Response(serializer.data)
+        profile = SellerProfile.objects.select_related('view_total').get(user=user)
     except SellerProfile.DoesNotExist:
         return Response({'error': 'Shop not found'}, status=404)
 
+    serializer = SellerProfileSerializer(profile, context={'request': request})  # ✅ context added
+    # View stats come from the analytics rollups: three bounded reads.
+    total = profile.view_total.views if hasattr(profile, 'view_total') else 0
+    analytics = shop_report(profile.pk, total)
+    return Response({**serializer.data, 'views': total, 'analytics': analytics})
+
+
+def shop_fields(request):
+    """Shop fields asked for with ``?fields=``; also the columns loaded."""
+    return requested_fields(request, SellerProfileSerializer.Meta.fields)
+
+
+def shops_state(request):
+    state = SellerProfile.objects.aggregate(
+        changed=Max('updated_at'), catalog=Max('catalog_updated_at'), shops=Count('id'),
+    )
+    # Product counts and embedded products move with catalog_updated_at.
+    return f"{state['shops']}:{state['changed']}:{state['catalog']}", max(
+        filter(None, (state['changed'], state['catalog'])), default=None,
+    )
+
+
+def shop_state(request, shop_slug):
+    # catalog_updated_at moves with product_count.
+    row = SellerProfile.objects.filter(slug=shop_slug).values_list('pk', 'updated_at', 'catalog_updated_at').first()
+    if row is None:
+        return None
+    return f"{row[0]}:{row[1]}:{row[2]}", max(filter(None, row[1:]))
+
 
 # ✅ 3. List All Shops (for buyers/public)
+@conditional_get(shops_state)
 @api_view(['GET'])
+@cache_response(lambda request: ['shops'])
 def list_all_shops(request):
-    shops = SellerProfile.objects.all()
-    serializer = SellerProfileSerializer(shops, many=True, context={'request': request})  # ✅ context added
+    """
+    ``?ordering=product_count`` or ``-product_count`` and ``?min_products=N``
+    use the maintained, indexed SellerProfile.product_count.
+    """
+    fields = shop_fields(request)
+    shops = SellerProfile.objects.only(*fields)
+    ordering = request.query_params.get('ordering')
+    if ordering in ('product_count', '-product_count'):
+        shops = shops.order_by(ordering, 'id')
+    elif ordering:
+        return Response({'error': 'ordering must be product_count or -product_count'}, status=400)
+    min_products = request.query_params.get('min_products')
+    if min_products:
+        try:
+            shops = shops.filter(product_count__gte=int(min_products))
+        except ValueError:
+            return Response({'error': 'min_products must be an integer'}, status=400)
+    context = {'request': request, 'fields': fields}
+    if wants_stream(request):
+        # Streaming iterates in chunks, so it needs a stable order.
+        return stream_json_array(shops if ordering else shops.order_by('id'), SellerProfileSerializer(context=context))
+    serializer = SellerProfileSerializer(shops, many=True, context=context)  # ✅ context added
     return Response(serializer.data)
 
 
 
+# ✅ Shop directory: shops with their newest products embedded
+@conditional_get(shops_state)
+@api_view(['GET'])
+@cache_response(lambda request: ['shops', 'products'])
+def shop_directory(request):
+    """
+    Keyset-paginated shops, newest first, each with its latest ``preview``
+    products (default 3, at most 12) in card shape. ``?fields=`` trims the
+    shop fields and ``?min_products=N`` hides smaller shops.
+
+    Query budget: 3 (shops version, shops, ranked products), whatever the
+    page size; the preview shape needs no images query.
+    """
+    try:
+        preview = min(int(request.query_params.get('preview', 3)), 12)
+        min_products = int(request.query_params.get('min_products', 0))
+    except ValueError:
+        return Response({'error': 'preview and min_products must be integers'}, status=400)
+
+    fields = shop_fields(request)
+    shops = SellerProfile.objects.only(*fields, 'created_at')
+    if min_products:
+        shops = shops.filter(product_count__gte=min_products)
+
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(shops, request)
+    products = latest_products_by_seller([shop.pk for shop in page], request, preview)
+    data = SellerProfileSerializer(page, many=True, context={'request': request, 'fields': fields}).data
+    for shop, item in zip(page, data):
+        item['products'] = products[shop.pk]
+    return paginator.get_paginated_response(data)
+
+
+@conditional_get(shop_state)
 @api_view(['GET'])
+@cache_response(lambda request, shop_slug: [shop_group(shop_slug)])
 def get_shop_by_slug(request, shop_slug):
     try:
-        shop = SellerProfile.objects.get(slug=shop_slug)
-        serializer = SellerProfileSerializer(shop, context={'request': request})
+        fields = shop_fields(request)
+        shop = SellerProfile.objects.only(*fields).get(slug=shop_slug)
+        serializer = SellerProfileSerializer(shop, context={'request': request, 'fields': fields})
         return Response(serializer.data)
     except SellerProfile.DoesNotExist:
         return Response({'error': 'Shop not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,132 @@
+"""
+Response cache for public read endpoints.
+
+Cached responses are grouped (``products``, ``shops``, ``shop:<slug>``).
+Each group has a version number in the cache and every key embeds the
+versions of its groups, so invalidating a group is one ``incr`` and only
+the responses built from that group stop being served; everything else
+stays warm. Model signals call ``invalidate()`` with the groups a write
+touched.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+VERSION_PREFIX = 'feed-version:'
+STATS_PREFIX = 'feed-stats:'
+
+
+def _timeout():
+    return getattr(settings, 'FEED_CACHE_TIMEOUT', 300)
+
+
+def _incr(key, delta=1):
+    if cache.add(key, delta, timeout=None):
+        return delta
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Evicted between add() and incr().
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def _record(outcome):
+    _incr(STATS_PREFIX + outcome)
+
+
+def cache_stats():
+    """Hit/miss counters since the cache was last cleared."""
+    keys = [STATS_PREFIX + outcome for outcome in ('hit', 'miss', 'wait')]
+    values = cache.get_many(keys)
+    stats = {key[len(STATS_PREFIX):]: values.get(key, 0) for key in keys}
+    lookups = stats['hit'] + stats['miss']
+    stats['hit_ratio'] = round(stats['hit'] / lookups, 4) if lookups else None
+    return stats
+
+
+def invalidate(*groups):
+    """
+    Retire every cached response built from any of ``groups``.
+
+    The bump runs now and again after the surrounding transaction commits,
+    so a reader that re-cached pre-commit data in between is retired too.
+    """
+    groups = [group for group in groups if group]
+    if not groups:
+        return
+
+    def bump():
+        for group in groups:
+            _incr(VERSION_PREFIX + group)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def shop_group(slug):
+    return f"shop:{slug}"
+
+
+def _cache_key(name, request, groups):
+    version_keys = [VERSION_PREFIX + group for group in groups]
+    versions = cache.get_many(version_keys)
+    stamp = ','.join(f"{key}={versions.get(key, 0)}" for key in version_keys)
+    raw = f"{name}|{request.build_absolute_uri()}|{stamp}"
+    return 'feed:' + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cache_response(groups):
+    """
+    Cache a GET view's ``Response.data``.
+
+    ``groups(request, *args, **kwargs)`` names the cache groups the response
+    is built from. Apply below ``@api_view`` so the view sees a DRF request.
+
+    Only one worker rebuilds a missing entry: the others wait up to
+    ``FEED_CACHE_LOCK_TIMEOUT`` seconds for it to appear before giving up
+    and building it themselves.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            timeout = _timeout()
+            if request.method != 'GET' or not timeout:
+                return view(request, *args, **kwargs)
+
+            key = _cache_key(view.__name__, request, groups(request, *args, **kwargs))
+            data = cache.get(key)
+            if data is not None:
+                _record('hit')
+                return Response(data, headers={'X-Cache': 'HIT'})
+
+            _record('miss')
+            lock_key = key + ':lock'
+            lock_timeout = getattr(settings, 'FEED_CACHE_LOCK_TIMEOUT', 5)
+            acquired = cache.add(lock_key, 1, timeout=lock_timeout)
+            if not acquired:
+                _record('wait')
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    data = cache.get(key)
+                    if data is not None:
+                        return Response(data, headers={'X-Cache': 'HIT'})
+
+            try:
+                response = view(request, *args, **kwargs)
+                # Streaming responses have no .data to keep.
+                if response.status_code == 200 and isinstance(response, Response):
+                    cache.set(key, response.data, timeout=timeout)
+                    response['X-Cache'] = 'MISS'
+                return response
+            finally:
+                if acquired:
+                    cache.delete(lock_key)
+        return wrapped
+    return decorator
@@ -0,0 +1,33 @@
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints.
+
+A view declares a cheap ``state(request, *args, **kwargs)`` function that
+returns ``(version, last_modified)`` from a few indexed columns, or None
+when the object does not exist. The ETag hashes that version with the
+request path and query string, so a matching ``If-None-Match`` is answered
+with 304 before the view, its queryset or its serializer ever run.
+"""
+import hashlib
+
+from django.views.decorators.http import condition
+
+
+def conditional_get(state):
+    """Apply above ``@api_view``; ``state`` is evaluated once per request."""
+    def current(request, *args, **kwargs):
+        if not hasattr(request, '_conditional_state'):
+            request._conditional_state = state(request, *args, **kwargs)
+        return request._conditional_state
+
+    def etag(request, *args, **kwargs):
+        found = current(request, *args, **kwargs)
+        if found is None:
+            return None
+        raw = f"{found[0]}|{request.get_full_path()}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        found = current(request, *args, **kwargs)
+        return found[1] if found else None
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,47 @@
+"""
+Sparse fieldsets for read endpoints: ``?fields=`` and ``?expand=``.
+
+``?fields=id,name,price`` limits a response to those fields and
+``?expand=seller`` adds a related object the default shape leaves out.
+Views use the resulting names to trim the columns and prefetches they load,
+not only the JSON they return.
+"""
+from rest_framework.exceptions import ParseError
+
+
+def _csv_param(request, name):
+    return [value.strip() for value in request.query_params.get(name, '').split(',') if value.strip()]
+
+
+def requested_fields(request, fields, expandable=()):
+    """
+    Field names to render, in declaration order.
+
+    ``fields`` is the full default shape; ``expandable`` lists the extras
+    that only appear through ``?expand=``. Unknown names are a 400.
+    """
+    selected = _csv_param(request, 'fields')
+    expand = _csv_param(request, 'expand')
+    unknown = sorted(
+        {name for name in selected if name not in fields and name not in expandable}
+        | {name for name in expand if name not in fields and name not in expandable}
+    )
+    if unknown:
+        raise ParseError(f"Unknown field(s): {', '.join(unknown)}")
+
+    wanted = set(selected or fields) | set(expand)
+    return tuple(name for name in (*fields, *expandable) if name in wanted)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin dropping every field not named in ``context['fields']``.
+    Without that context key the serializer is unchanged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
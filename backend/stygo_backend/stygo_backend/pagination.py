@@ -0,0 +1,158 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _bigint(value):
+    """``int(value)``, limited to what a bigint column can be compared with."""
+    number = int(value)
+    # Past this, the query itself fails (OverflowError on SQLite).
+    if not -2 ** 63 <= number < 2 ** 63:
+        raise ValueError(value)
+    return number
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (created_at, id), newest first.
+
+    The cursor is an opaque token holding the last row's position, so every
+    page is a single indexed range scan no matter how deep the client goes.
+    Ties on created_at are broken by id, which keeps pages stable while rows
+    are being inserted.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size or getattr(settings, 'FEED_PAGE_SIZE', 20)
+        self.max_page_size = getattr(settings, 'FEED_MAX_PAGE_SIZE', 100)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return min(self.page_size, self.max_page_size)
+
+    def encode_cursor(self, obj):
+        # Pages may hold model instances or .values() rows.
+        if isinstance(obj, dict):
+            created_at, pk = obj['created_at'], obj['id']
+        else:
+            created_at, pk = obj.created_at, obj.pk
+        raw = f"{created_at.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii')
+            created_at, pk = raw.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), _bigint(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by('-created_at', '-id')
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+
+        # Fetch one extra row to learn whether a next page exists.
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class RankPagination(KeysetPagination):
+    """
+    Cursor pagination over a precomputed, unique integer rank, best first;
+    each page is a range scan on the rank index.
+    """
+
+    def __init__(self, rank_field, page_size=None):
+        super().__init__(page_size)
+        self.rank_field = rank_field
+
+    def encode_cursor(self, obj):
+        rank = obj[self.rank_field] if isinstance(obj, dict) else getattr(obj, self.rank_field)
+        return base64.urlsafe_b64encode(str(rank).encode('ascii')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            return _bigint(base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        rank = self.decode_cursor(request)
+        queryset = queryset.order_by(self.rank_field)
+        if rank is not None:
+            queryset = queryset.filter(**{f'{self.rank_field}__gt': rank})
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Page-number pagination for ranked results, where there is no stable
+    (created_at, id) position to key on.
+    """
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'FEED_PAGE_SIZE', 20)
+        self.max_page_size = getattr(settings, 'FEED_MAX_PAGE_SIZE', 100)
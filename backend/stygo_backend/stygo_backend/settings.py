@@ -18,6 +18,7 @@ from datetime import timedelta
 import os
 import dj_database_url
 from django.core.exceptions import ImproperlyConfigured
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,12 +52,16 @@ INSTALLED_APPS = [
     'products',
     'subscribers',
     'suggestions',
+    'favorites',
+    'analytics',
+    'monitoring',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'cloudinary_storage', 
     'cloudinary',
@@ -65,8 +70,68 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        # Per client on the anonymous view and click counters.
+        'analytics': os.environ.get('ANALYTICS_THROTTLE_RATE', '120/min'),
+    },
+}
+
+# Public product feeds use keyset pagination (stygo_backend.pagination).
+FEED_PAGE_SIZE = int(os.environ.get('FEED_PAGE_SIZE', 20))
+FEED_MAX_PAGE_SIZE = int(os.environ.get('FEED_MAX_PAGE_SIZE', 100))
+
+# Cached public responses (stygo_backend.caching). Set REDIS_URL so every
+# gunicorn worker shares one cache. A per-process cache would only see the
+# invalidations made in its own worker and keep serving stale feeds, so
+# without Redis response caching is off unless DEBUG (a single runserver).
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHES = {
+    'default': (
+        {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+        if REDIS_URL
+        else {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stygo'}
+    ),
 }
+FEED_CACHE_TIMEOUT = int(os.environ.get('FEED_CACHE_TIMEOUT', 300 if REDIS_URL or DEBUG else 0))
+FEED_CACHE_LOCK_TIMEOUT = 5
+
+# Products a shop may list; enforced atomically via SellerProfile.product_count.
+SHOP_PRODUCT_LIMIT = int(os.environ.get('SHOP_PRODUCT_LIMIT', 10))
+
+# Rows fetched per round trip when a list is streamed with ?stream=1.
+STREAM_CHUNK_SIZE = 500
+
+# Product views are counted in memory and written in batches (analytics.buffer).
+VIEW_FLUSH_ASYNC = os.environ.get('VIEW_FLUSH_ASYNC', 'True').lower() == 'true'
+VIEW_FLUSH_INTERVAL = int(os.environ.get('VIEW_FLUSH_INTERVAL', 30))
+VIEW_FLUSH_THRESHOLD = 5000
+
+# Trending feed (analytics.trending), rebuilt by `manage.py compute_trending`.
+TRENDING_WINDOW_DAYS = 7
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_SIZE = 1000
+
+# Neighbours kept per product by `manage.py build_similar_products`.
+SIMILAR_PRODUCTS_K = 12
+
+# Bearer token Prometheus must send to scrape /metrics (monitoring.views).
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Profiled requests kept for download (monitoring.profiling).
+REQUEST_PROFILES_KEPT = 200
+
+# Queries slower than SLOW_QUERY_MS are stored with their plan for the
+# admin (monitoring.slowqueries); SLOW_QUERY_MS=off disables capture.
+_slow_query_ms = os.environ.get('SLOW_QUERY_MS', '200')
+SLOW_QUERY_MS = None if _slow_query_ms.lower() == 'off' else float(_slow_query_ms)
+SLOW_QUERY_ASYNC = True
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 10000
+# Seconds before a repeated query is explained again.
+SLOW_QUERY_EXPLAIN_INTERVAL = 300
+# Captures waiting for the recording thread; extras are dropped.
+SLOW_QUERY_QUEUE_SIZE = 100
+SLOW_QUERIES_KEPT = 1000
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
@@ -74,6 +139,9 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware.
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.slowqueries.SlowQueryMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -81,6 +149,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Staff-only, opt-in per request (X-Profile: 1 or ?profile=1).
+    'monitoring.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -213,6 +283,17 @@ STORAGES = {
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Product uploads are staged on local disk and pushed to STORAGES["default"]
+# by a background thread pool (products.ingest).
+IMAGE_STAGING_ROOT = os.environ.get('IMAGE_STAGING_ROOT', os.path.join(MEDIA_ROOT, 'staging'))
+IMAGE_INGEST_ASYNC = os.environ.get('IMAGE_INGEST_ASYNC', 'True').lower() == 'true'
+IMAGE_INGEST_WORKERS = int(os.environ.get('IMAGE_INGEST_WORKERS', 4))
+IMAGE_INGEST_MAX_ATTEMPTS = 3
+# Seconds before process_staged_images treats a claimed upload as abandoned.
+IMAGE_INGEST_CLAIM_TIMEOUT = int(os.environ.get('IMAGE_INGEST_CLAIM_TIMEOUT', 600))
+# Widths (px) of the JPEG/WebP renditions made for every product photo.
+IMAGE_VARIANT_WIDTHS = [320, 640, 1280]
+
 # Diagnostics
 try:
     from django.core.files.storage import default_storage
@@ -257,6 +338,9 @@ if backend_origin:
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Anonymous favorites are keyed by a per-browser id sent in X-Device-ID.
+CORS_ALLOW_HEADERS = (*default_headers, 'x-device-id')
+
 # Honor X-Forwarded-Proto so Django knows original scheme behind proxies (e.g., Render)
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
@@ -0,0 +1,72 @@
+"""
+Streaming JSON arrays for export-style list requests.
+
+``stream_json_array`` walks a queryset with ``.iterator(chunk_size=...)``
+and writes one array element at a time, so peak memory is one chunk of
+rows no matter how large the table is, and the opening bracket goes out
+before the first row is even fetched.
+"""
+import itertools
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+FLUSH_BYTES = 64 * 1024
+
+
+def wants_stream(request):
+    return request.query_params.get('stream', '').lower() in ('1', 'true')
+
+
+def _encode(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def iter_json_array(rows, to_representation):
+    yield b'['
+    buffer = bytearray()
+    first = True
+    for row in rows:
+        if not first:
+            buffer += b','
+        first = False
+        buffer += _encode(to_representation(row))
+        if len(buffer) >= FLUSH_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    yield bytes(buffer)
+
+
+def stream_json_array(queryset, serializer, chunk_size=None):
+    """
+    Stream ``queryset`` as a JSON array using ``serializer`` (an unbound
+    serializer instance carrying its context) for each element.
+    """
+    chunk_size = chunk_size or getattr(settings, 'STREAM_CHUNK_SIZE', 500)
+    rows = queryset.iterator(chunk_size=chunk_size)
+    return StreamingHttpResponse(
+        iter_json_array(rows, serializer.to_representation),
+        content_type='application/json',
+    )
+
+
+def stream_json_batches(queryset, serialize_batch, chunk_size=None):
+    """
+    Like ``stream_json_array``, but ``serialize_batch(rows)`` renders a whole
+    chunk into a list at once, so related rows can be loaded with one query
+    per chunk (as ``products.listing.serialize_listing`` does).
+    """
+    chunk_size = chunk_size or getattr(settings, 'STREAM_CHUNK_SIZE', 500)
+    rows = queryset.iterator(chunk_size=chunk_size)
+
+    def elements():
+        while True:
+            batch = list(itertools.islice(rows, chunk_size))
+            if not batch:
+                return
+            yield from serialize_batch(batch)
+
+    return StreamingHttpResponse(iter_json_array(elements(), lambda item: item), content_type='application/json')
@@ -0,0 +1,200 @@
+"""
+Tests for the shared stygo_backend layers: keyset pagination, and query
+plan regressions.
+
+The query plan suite seeds a catalog of a realistic shape, calls each hot endpoint, and runs
+EXPLAIN on every query it made against the large tables: none of them may
+read a whole table. On PostgreSQL that means no "Seq Scan" node (the tables
+are ANALYZEd first so the planner sees real row counts); on SQLite, no
+"SCAN <table>" step that is not driven by an index.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from analytics.models import TrendingProduct
+from favorites.models import Favorite
+from otp.models import OTP
+from products.models import Product, ProductImage, SimilarProduct
+from products.tests import make_catalog
+from sellers.models import SellerProfile
+
+SHOPS = 40
+PRODUCTS_PER_SHOP = 100
+CATEGORIES = ['men_shirts', 'men_jeans', 'women_tops', 'women_dresses', 'kids_toys', 'beauty_makeup']
+LARGE_TABLES = {
+    Product._meta.db_table, ProductImage._meta.db_table, Favorite._meta.db_table,
+    OTP._meta.db_table, SimilarProduct._meta.db_table, TrendingProduct._meta.db_table,
+}
+
+
+def full_scans(sql, params=()):
+    """Tables in LARGE_TABLES that the plan for ``sql`` reads in full."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            nodes, scanned = [plan[0]['Plan']], set()
+            while nodes:
+                node = nodes.pop()
+                if node['Node Type'] == 'Seq Scan':
+                    scanned.add(node['Relation Name'])
+                nodes.extend(node.get('Plans', []))
+        else:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            scanned = {
+                detail.split()[1] for *_, detail in cursor.fetchall()
+                if detail.startswith('SCAN ') and ' USING ' not in detail
+            }
+    return scanned & LARGE_TABLES
+
+
+@override_settings(FEED_PAGE_SIZE=4, FEED_MAX_PAGE_SIZE=6, SHOP_PRODUCT_LIMIT=20)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_catalog(11, images_per_product=0)
+        # Runs of equal created_at, so pages must break ties on id.
+        now = timezone.now()
+        ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        for index, pk in enumerate(ids):
+            Product.objects.filter(pk=pk).update(created_at=now - timedelta(minutes=index // 4))
+        self.expected = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, url):
+        seen, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [product['id'] for product in response.json()['results']]
+            url = response.json()['next']
+            pages += 1
+        return seen, pages
+
+    def test_walks_every_row_once_across_ties(self):
+        seen, pages = self.walk('/api/products/all/?page_size=3')
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 4)
+
+    def test_invalid_cursor_is_404(self):
+        huge = base64.urlsafe_b64encode(f'2026-01-01|{2 ** 63}'.encode()).decode().rstrip('=')
+        for cursor in ('not-base64!', 'bm9wZQ', 'MjAyNi0wMS0wMXx4', huge):
+            response = self.client.get(f'/api/products/all/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.json()['detail'], 'Invalid cursor')
+        rank = base64.urlsafe_b64encode(str(2 ** 63).encode()).decode().rstrip('=')
+        self.assertEqual(self.client.get(f'/api/products/products/trending/?cursor={rank}').status_code, 404)
+
+    def test_page_size_is_capped_and_falls_back_when_invalid(self):
+        def page_length(page_size):
+            return len(self.client.get(f'/api/products/all/?page_size={page_size}').json()['results'])
+
+        self.assertEqual(page_length(2), 2)
+        self.assertEqual(page_length(50), 6)
+        for invalid in ('0', '-3', 'abc'):
+            self.assertEqual(page_length(invalid), 4, invalid)
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        sellers = []
+        for s in range(SHOPS):
+            user = User.objects.create_user(username=f"plan-seller{s}@example.com")
+            sellers.append(SellerProfile.objects.create(user=user, shop_name=f"Plan Shop {s}"))
+        products = Product.objects.bulk_create(
+            Product(
+                seller=seller, name=f"Product {s}-{p}", price=199 + (p * 37) % 2800, size="M",
+                category=CATEGORIES[p % len(CATEGORIES)], top_category=CATEGORIES[p % len(CATEGORIES)].split('_')[0],
+                image="products/main.jpg", created_at=now - timedelta(minutes=s * PRODUCTS_PER_SHOP + p),
+            )
+            for s, seller in enumerate(sellers) for p in range(PRODUCTS_PER_SHOP)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=f"products/images/{product.pk}.jpg", is_primary=True)
+            for product in products
+        )
+        TrendingProduct.objects.bulk_create(
+            TrendingProduct(product=product, rank=rank, top_category=product.top_category, score=1.0 / rank,
+                            computed_at=now)
+            for rank, product in enumerate(products[:500], start=1)
+        )
+        SimilarProduct.objects.bulk_create(
+            SimilarProduct(product=product, neighbour=products[(index + offset) % len(products)], rank=offset,
+                           score=1.0 / offset, computed_at=now)
+            for index, product in enumerate(products) for offset in range(1, 4)
+        )
+        Favorite.objects.bulk_create(
+            Favorite(device_id=f"device-{index % 500:08d}", product=product)
+            for index, product in enumerate(products)
+        )
+        OTP.objects.bulk_create(
+            OTP(email=f"user{index}@example.com", code=f"{100000 + index}", is_used=index % 3 == 0)
+            for index in range(2000)
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        cls.seller = sellers[7]
+        cls.product = products[1234]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assertIndexed(self, url, client=None, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = (client or self.client).get(url, **headers)
+        self.assertEqual(response.status_code, 200, url)
+        selects = [query['sql'] for query in queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, url)
+        for sql in selects:
+            self.assertEqual(full_scans(sql), set(), f"{url}: {sql}")
+
+    def test_catalog_feeds(self):
+        for url in (
+            "/api/products/all/",
+            "/api/products/products/latest/",
+            "/api/products/products/under-599/",
+            "/api/products/products/trending/",
+            "/api/products/products/trending/?category=women",
+        ):
+            self.assertIndexed(url)
+
+    def test_shop_pages(self):
+        self.assertIndexed(f"/api/products/products/seller/{self.seller.slug}/")
+        self.assertIndexed(f"/api/products/shop/{self.seller.slug}/latest-products/")
+        self.assertIndexed("/api/sellers/directory/")
+
+    def test_seller_products(self):
+        client = APIClient()
+        client.force_authenticate(self.seller.user)
+        self.assertIndexed("/api/products/my/", client=client)
+
+    def test_product_pages(self):
+        self.assertIndexed(f"/api/products/{self.product.pk}/")
+        self.assertIndexed(f"/api/products/{self.product.pk}/similar/")
+        self.assertIndexed(f"/api/products/batch/?ids={self.product.pk},{self.product.pk + 1}")
+
+    def test_favorites(self):
+        self.assertIndexed("/api/favorites/", HTTP_X_DEVICE_ID="device-00000042")
+
+    def test_otp_lookups(self):
+        # The queries PasswordResetRequestView and PasswordResetConfirmView make.
+        confirm = OTP.objects.filter(
+            email="user7@example.com", code="100007",
+            created_at__gte=timezone.now() - timedelta(minutes=10), is_used=False,
+        )
+        for queryset in (confirm, OTP.objects.filter(email="user7@example.com")):
+            sql, params = queryset.query.sql_with_params()
+            self.assertEqual(full_scans(sql, params), set(), sql)
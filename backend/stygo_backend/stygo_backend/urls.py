@@ -19,16 +19,20 @@ from django.urls import path,include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from monitoring.views import metrics
 
 urlpatterns = [
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('api/auth/', include('otp.urls')), 
     path('api/sellers/', include('sellers.urls')),
     path("api/products/", include("products.urls")),
     path('api/', include('subscribers.urls')),
     path('api/suggestions/', include('suggestions.urls')),
+    path('api/favorites/', include('favorites.urls')),
+    path('api/analytics/', include('analytics.urls')),
 ]
 
 if settings.DEBUG:
@@ -3,11 +3,13 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from .serializers import SuggestionSerializer
 from .models import Suggestion
+from stygo_backend.streaming import stream_json_array, wants_stream
 
 
 class SuggestionListCreateView(APIView):
     """POST open to all for feedback submissions.
-    GET restricted to admin users to read submissions.
+    GET restricted to admin users to read submissions; ``?stream=1``
+    streams them as a JSON array for exports.
     """
 
     def get_permissions(self):
@@ -17,6 +19,8 @@ class SuggestionListCreateView(APIView):
 
     def get(self, request):
         qs = Suggestion.objects.all()
+        if wants_stream(request):
+            return stream_json_array(qs, SuggestionSerializer())
         serializer = SuggestionSerializer(qs, many=True)
         return Response(serializer.data)
 
@@ -0,0 +1,51 @@
+import React, { useEffect, useState } from "react";
+import { Link } from "react-router-dom";
+import { getSimilarProducts } from "../services/product";
+
+export default function SimilarProducts({ productId, linkFor = (product) => `/product/${product.id}` }) {
+  const [products, setProducts] = useState([]);
+
+  useEffect(() => {
+    if (!productId) return;
+    let cancelled = false;
+    getSimilarProducts(productId)
+      .then((data) => !cancelled && setProducts(data.slice(0, 6)))
+      .catch(() => !cancelled && setProducts([]));
+    return () => {
+      cancelled = true;
+    };
+  }, [productId]);
+
+  if (!products.length) return null;
+
+  return (
+    <div className="mt-10">
+      <h3 className="text-xl font-bold text-gray-900 mb-4">You may also like</h3>
+      <div className="grid grid-cols-2 sm:grid-cols-3 md:grid-cols-4 lg:grid-cols-6 gap-4">
+        {products.map((product) => (
+          <Link
+            key={product.id}
+            to={linkFor(product)}
+            className="group bg-white rounded-lg shadow-sm hover:shadow-md transition-all duration-300 border border-gray-100 overflow-hidden"
+          >
+            <div className="relative aspect-square bg-gray-50 overflow-hidden">
+              <img
+                src={product.image_url || "/placeholder.png"}
+                alt={product.name}
+                className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
+                onError={(e) => {
+                  e.target.onerror = null;
+                  e.target.src = "/placeholder.png";
+                }}
+              />
+            </div>
+            <div className="p-3">
+              <h4 className="font-medium text-sm text-gray-900 truncate mb-1">{product.name}</h4>
+              <p className="text-sm font-semibold text-pink-600">₹{product.price?.toLocaleString() || "0"}</p>
+            </div>
+          </Link>
+        ))}
+      </div>
+    </div>
+  );
+}
@@ -1,8 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { TrendingUp, ArrowRight, Star, Package } from "lucide-react";
 import { Link } from "react-router-dom";
-import { fetchBuyerShops } from "../services/buyerShops";
-import { getProductsByShop } from "../services/product";
+import { fetchShopDirectory } from "../services/buyerShops";
 
 export default function TrendingShop() {
   const [shops, setShops] = useState([]);
@@ -11,35 +10,14 @@ export default function TrendingShop() {
   useEffect(() => {
     async function fetchTrendingShops() {
       try {
-        const shopData = await fetchBuyerShops();
+        // Newest shops with their latest 3 products, in one request
+        const { results } = await fetchShopDirectory({ page_size: 6, preview: 3 });
+        const shopsWithProducts = results.map((shop) => ({
+          ...shop,
+          totalProducts: shop.product_count,
+        }));
         
-        // Fetch products for each shop
-        const shopsWithProducts = await Promise.all(
-          shopData.map(async (shop) => {
-            try {
-              const products = await getProductsByShop(shop.slug);
-              return {
-                ...shop,
-                products: products.slice(0, 3), // Take 3 products
-                totalProducts: products.length
-              };
-            } catch (error) {
-              console.error(`Failed to fetch products for shop ${shop.slug}:`, error);
-              return {
-                ...shop,
-                products: [],
-                totalProducts: 0
-              };
-            }
-          })
-        );
-        
-        // Sort shops by creation date (newest first) and take top 5
-        const sortedShops = shopsWithProducts
-          .sort((a, b) => new Date(b.created_at) - new Date(a.created_at))
-          .slice(0, 6);
-        
-        setShops(sortedShops);
+        setShops(shopsWithProducts);
       } catch (error) {
         console.error("Failed to fetch trending shops:", error);
       } finally {
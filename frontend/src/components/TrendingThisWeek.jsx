@@ -1,17 +1,22 @@
 import React, { useEffect, useState } from "react";
 import { Clock, ArrowRight, Zap } from "lucide-react";
 import { Link } from "react-router-dom";
-import { latest_products } from "../services/product";
+import { latest_products, trending_products } from "../services/product";
 
 export default function TrendingThisWeek() {
   const [products, setProducts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [isTrending, setIsTrending] = useState(true);
 
   useEffect(() => {
     async function fetchLatestProducts() {
       try {
-        const productData = await latest_products();
-        // Get the 6 most recent products
+        // Until the ranking has data, fall back to the newest products.
+        let productData = await trending_products({ page_size: 6 });
+        if (!productData.length) {
+          productData = await latest_products({ page_size: 6 });
+          setIsTrending(false);
+        }
         setProducts(productData.slice(0, 6));
       } catch (error) {
         console.error("Failed to fetch trending products:", error);
@@ -29,11 +34,11 @@ export default function TrendingThisWeek() {
         <div>
           <h3 className="text-3xl font-bold text-gray-900 flex items-center">
             <Zap className="w-6 h-6 mr-2 text-pink-500" />
-            New Arrivals
+            {isTrending ? "Trending This Week" : "New Arrivals"}
           </h3>
           <p className="mt-2 text-gray-600 flex items-center">
             <Clock className="w-4 h-4 mr-1" />
-            Freshly added to our collection
+            {isTrending ? "Most viewed and saved right now" : "Freshly added to our collection"}
           </p>
         </div>
         <Link 
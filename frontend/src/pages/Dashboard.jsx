@@ -7,12 +7,14 @@ import {
   Box,
   Users,
   Settings,
+  Eye,
 } from "lucide-react";
 
 export default function Dashboard() {
   const navigate = useNavigate();
   const [shop, setShop] = useState(null);
   const [stats, setStats] = useState({ products: 0, views: 0, orders: 0 });
+  const [analytics, setAnalytics] = useState(null);
   const [error, setError] = useState("");
   const [copied, setCopied] = useState(false);
 
@@ -26,6 +28,7 @@ export default function Dashboard() {
           views: data?.views || 0,
           orders: data?.orders || 0,
         });
+        setAnalytics(data?.analytics || null);
       } catch (err) {
         const status = err.response?.status;
         if (status === 401) {
@@ -104,6 +107,31 @@ export default function Dashboard() {
           />
         </div>
 
+        {/* Views */}
+        <div className="grid grid-cols-2 sm:grid-cols-4 gap-4 mb-8">
+          <StatCard label="Products" value={stats.products} />
+          <StatCard label="Views today" value={analytics?.views_today || 0} />
+          <StatCard label="Last 7 days" value={analytics?.views_7d || 0} />
+          <StatCard label="All time" value={stats.views} />
+        </div>
+
+        {analytics?.top_products?.length > 0 && (
+          <div className="bg-white border border-gray-200 rounded-xl p-4 mb-8">
+            <h2 className="font-semibold text-gray-800 mb-3">Most viewed products</h2>
+            <ul className="divide-y divide-gray-100">
+              {analytics.top_products.map((product) => (
+                <li key={product.id} className="flex items-center justify-between py-2 text-sm">
+                  <span className="text-gray-700 truncate">{product.name}</span>
+                  <span className="flex items-center gap-1 text-gray-500">
+                    <Eye className="h-4 w-4" />
+                    {product.views}
+                  </span>
+                </li>
+              ))}
+            </ul>
+          </div>
+        )}
+
         {/* Recent Activity */}
      
       </main>
@@ -141,6 +169,13 @@ const ActionCard = ({ icon, title, description, onClick, bg }) => (
   </button>
 );
 
+const StatCard = ({ label, value }) => (
+  <div className="bg-white border border-gray-200 rounded-xl p-4">
+    <p className="text-xs text-gray-500">{label}</p>
+    <p className="text-2xl font-bold text-gray-800">{value}</p>
+  </div>
+);
+
 const ActivityItem = ({ icon, title, time, bg }) => (
   <div className="flex items-start space-x-3">
     <div className={`${bg} p-2 rounded-full`}>{icon}</div>
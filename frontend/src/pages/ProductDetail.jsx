@@ -3,6 +3,8 @@ import { useParams, useNavigate } from "react-router-dom";
 import { ArrowLeft, Phone, MessageCircle, ShoppingBag, MapPin, Info, Star, ChevronRight, Heart } from "lucide-react";
 import { getProductById, getProductsByShop } from "../services/product";
 import { fetchBuyerShops } from "../services/buyerShops";
+import { trackProductClicks, trackProductViews } from "../services/analytics";
+import SimilarProducts from "../components/SimilarProducts";
 
 export default function ProductDetail() {
   const { productId, shopSlug } = useParams();
@@ -27,6 +29,7 @@ export default function ProductDetail() {
         // 1️⃣ Get product details
         const productData = await getProductById(productId);
         setProduct(productData);
+        trackProductViews(productData.id ?? productId);
         
 
         // 2️⃣ Get shop details (prioritize route slug, then product seller slug, then id, then shop name)
@@ -350,6 +353,7 @@ export default function ProductDetail() {
                       {displayShopPhone && (
                         <a
                           href={`tel:${displayShopPhone}`}
+                          onClick={() => trackProductClicks(product.id)}
                           className="flex items-center justify-center bg-white border border-gray-300 text-gray-700 px-4 py-2 rounded-lg hover:bg-gray-50 transition"
                         >
                           <Phone className="w-5 h-5 mr-2" />
@@ -359,6 +363,7 @@ export default function ProductDetail() {
                       {whatsappLink && (
                         <a
                           href={whatsappLink}
+                          onClick={() => trackProductClicks(product.id)}
                           target="_blank"
                           rel="noopener noreferrer"
                           className="flex items-center justify-center bg-green-500 hover:bg-green-600 text-white px-4 py-2 rounded-lg shadow-sm transition"
@@ -374,6 +379,7 @@ export default function ProductDetail() {
             </div>
           </div>
         </div>
+        <SimilarProducts productId={product?.id} />
       </div>
     </div>
   );
@@ -2,6 +2,8 @@ import React, { useEffect, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { getProductById } from "../services/product";
 import { fetchBuyerShops } from "../services/buyerShops";
+import { trackProductClicks, trackProductViews } from "../services/analytics";
+import SimilarProducts from "../components/SimilarProducts";
 import { ArrowLeft, Phone, MessageCircle, ShoppingBag, MapPin, Info, Star, ChevronRight } from "lucide-react";
 
 export default function PublicProductDetail() {
@@ -21,6 +23,7 @@ export default function PublicProductDetail() {
         // 1️⃣ Get product details
         const productData = await getProductById(productId);
         setProduct(productData);
+        trackProductViews(productData.id ?? productId);
 
         // 2️⃣ Get shop details
         const shops = await fetchBuyerShops();
@@ -262,6 +265,7 @@ export default function PublicProductDetail() {
                       {shop.phone_number && (
                         <a
                           href={`tel:${shop.phone_number}`}
+                          onClick={() => trackProductClicks(product.id)}
                           className="flex items-center justify-center bg-white border border-gray-300 text-gray-700 px-4 py-2 rounded-lg hover:bg-gray-50 transition"
                         >
                           <Phone className="w-5 h-5 mr-2" />
@@ -271,6 +275,7 @@ export default function PublicProductDetail() {
                       {whatsappLink && (
                         <a
                           href={whatsappLink}
+                          onClick={() => trackProductClicks(product.id)}
                           target="_blank"
                           rel="noopener noreferrer"
                           className="flex items-center justify-center bg-green-500 hover:bg-green-600 text-white px-4 py-2 rounded-lg shadow-sm transition"
@@ -286,6 +291,7 @@ export default function PublicProductDetail() {
             </div>
           </div>
         </div>
+        <SimilarProducts productId={product?.id} />
       </div>
     </div>
   );
@@ -0,0 +1,15 @@
+// src/services/analytics.js
+import axios from "./axios";
+
+// ✅ Count a product view; counts are buffered server-side, so this is cheap.
+// Failures are ignored: analytics must never break the page.
+export const trackProductViews = (productIds) =>
+  axios
+    .post("/api/analytics/views/", { product_ids: [].concat(productIds) })
+    .catch(() => {});
+
+// ✅ Count a click on a product's Call / WhatsApp button (feeds trending)
+export const trackProductClicks = (productIds) =>
+  axios
+    .post("/api/analytics/clicks/", { product_ids: [].concat(productIds) })
+    .catch(() => {});
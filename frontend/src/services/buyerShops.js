@@ -11,3 +11,10 @@ export const fetchBuyerShops = async () => {
     return [];
   }
 };
+
+// Shops, newest first, each with its latest `preview` products embedded:
+// { next, results: [{ ...shop, products: [...] }] } in a single request.
+export const fetchShopDirectory = async (params) => {
+  const response = await api.get(`${API_URL}/directory/`, { params });
+  return response.data;
+};
@@ -0,0 +1,50 @@
+// src/services/favorites.js
+import axios from "./axios";
+import { getProductsBatch } from "./product";
+
+// Anonymous visitors keep favorites under a random per-browser id; once they
+// sign in, claimFavorites() moves them to the account.
+const DEVICE_KEY = "device_id";
+
+const getDeviceId = () => {
+  let id = localStorage.getItem(DEVICE_KEY);
+  if (!id) {
+    id = crypto.randomUUID();
+    localStorage.setItem(DEVICE_KEY, id);
+  }
+  return id;
+};
+
+const withDevice = () => ({ headers: { "X-Device-ID": getDeviceId() } });
+
+// ✅ Favorite product ids, newest first
+export const getFavoriteIds = async () => {
+  const res = await axios.get("/api/favorites/", withDevice());
+  return res.data.product_ids;
+};
+
+// ✅ Add one or more products: { product_ids, missing }
+export const addFavorites = async (productIds) => {
+  const res = await axios.post("/api/favorites/add/", { product_ids: [].concat(productIds) }, withDevice());
+  return res.data;
+};
+
+// ✅ Remove one or more products: { product_ids }
+export const removeFavorites = async (productIds) => {
+  const res = await axios.post("/api/favorites/remove/", { product_ids: [].concat(productIds) }, withDevice());
+  return res.data;
+};
+
+// ✅ After login: attach this browser's favorites to the account
+export const claimFavorites = async () => {
+  const res = await axios.post("/api/favorites/claim/", null, withDevice());
+  return res.data.product_ids;
+};
+
+// ✅ Favorite products, hydrated with one batch request
+export const getFavoriteProducts = async (params) => {
+  const ids = await getFavoriteIds();
+  if (!ids.length) return [];
+  const { results } = await getProductsBatch(ids.slice(0, 100), params);
+  return results;
+};
@@ -1,6 +1,17 @@
 // src/services/product.js
 import axios from "./axios";
 
+// Public feeds are cursor-paginated: { next, results }. The getters below
+// return the first page's results; to page further, call fetchFeedPage
+// with the previous page's `next` URL.
+export const fetchFeedPage = async (url, params) => {
+  const res = await axios.get(url, { params });
+  return { next: res.data.next, results: res.data.results };
+};
+
+const fetchFeedResults = async (url, params) =>
+  (await fetchFeedPage(url, params)).results;
+
 // ✅ Add Product
 export const addProduct = async (formData) => {
   // Log form data for debugging
@@ -31,17 +42,13 @@ export const getMyProducts = async () => {
 };
 
 // ✅ Get all products (public)
-export const getAllProducts = async () => {
-  const res = await axios.get("/api/products/all/");
-  return res.data;
-};
+export const getAllProducts = async (params) =>
+  fetchFeedResults("/api/products/all/", params);
 
 // ✅ Get products from specific shop
 
-export const getProductsByShop = async (sellerSlug) => {
-  const res = await axios.get(`/api/products/products/seller/${sellerSlug}/`);
-  return res.data;
-};
+export const getProductsByShop = async (sellerSlug, params) =>
+  fetchFeedResults(`/api/products/products/seller/${sellerSlug}/`, params);
 
 
 // ✅ Latest top 3 products by shop
@@ -74,13 +81,31 @@ export const updateProduct = async (productId, formData) => {
 };
 
 // ✅ Get products under 599
-export const getProductsUnder599 = async () => {
-  const res = await axios.get("/api/products/products/under-599/");
+export const getProductsUnder599 = async (params) =>
+  fetchFeedResults("/api/products/products/under-599/", params);
+
+// ✅ Get latest products
+export const latest_products = async (params) =>
+  fetchFeedResults("/api/products/products/latest/", params);
+
+// ✅ Trending products, ranked from recent views, clicks and favorites
+export const trending_products = async (params) =>
+  fetchFeedResults("/api/products/products/trending/", params);
+
+// ✅ Similar products for a product page (precomputed server-side)
+export const getSimilarProducts = async (productId, params) => {
+  const res = await axios.get(`/api/products/${productId}/similar/`, { params });
   return res.data;
 };
 
-// ✅ Get latest products
-export const latest_products = async () => {
-  const res = await axios.get("/api/products/products/latest/");
+// ✅ Search products server-side (ranked, typo tolerant)
+export const searchProducts = async (q, params) => {
+  const res = await axios.get("/api/products/search/", { params: { q, ...params } });
+  return res.data;
+};
+
+// ✅ Get many products by id in one request: { results, missing }
+export const getProductsBatch = async (ids, params) => {
+  const res = await axios.get("/api/products/batch/", { params: { ids: ids.join(","), ...params } });
   return res.data;
 };